@@ -1,13 +1,13 @@
 from django.contrib import admin
-from .models import ChatSession, ChatMessage, QuickAction, ChatAnalytics
+from .models import ChatSession, ChatMessage, QuickAction, ChatAnalytics, ChatAnalyticsDaily, ChatAnalyticsHourly
 
 
 @admin.register(ChatSession)
 class ChatSessionAdmin(admin.ModelAdmin):
-    list_display = ['id', 'user', 'title', 'created_at', 'updated_at', 'is_active']
+    list_display = ['id', 'user', 'title', 'message_count', 'last_message_at', 'updated_at', 'is_active']
     list_filter = ['is_active', 'created_at', 'updated_at']
     search_fields = ['user__username', 'user__email', 'title']
-    readonly_fields = ['id', 'created_at', 'updated_at']
+    readonly_fields = ['id', 'created_at', 'updated_at', 'message_count', 'last_message_preview', 'last_message_at']
     ordering = ['-updated_at']
 
 
@@ -38,4 +38,12 @@ class ChatAnalyticsAdmin(admin.ModelAdmin):
     list_filter = ['query_type', 'satisfaction_score', 'created_at']
     search_fields = ['user__username', 'query_type']
     readonly_fields = ['id', 'created_at']
-    ordering = ['-created_at']
\ No newline at end of file
+    ordering = ['-created_at']
+
+
+@admin.register(ChatAnalyticsHourly, ChatAnalyticsDaily)
+class AnalyticsRollupAdmin(admin.ModelAdmin):
+    list_display = ['bucket_start', 'query_type', 'count', 'response_time_sum', 'satisfaction_count', 'updated_at']
+    list_filter = ['query_type', 'bucket_start']
+    readonly_fields = ['updated_at']
+    ordering = ['-bucket_start', 'query_type']
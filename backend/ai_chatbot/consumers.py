@@ -1,15 +1,44 @@
 import json
+from asgiref.sync import async_to_sync
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
 from django.contrib.auth import get_user_model
-from .services import ChatbotService
+from .outbound import OutboundPipeline
+from .scheduler import SchedulerBusy, chat_scheduler
+from .services import chatbot_service
+from .utils import MessageProcessor
 
 User = get_user_model()
 
+# Every connected chat socket, for fleet-wide system notifications
+BROADCAST_GROUP = 'chat_broadcast'
+
+
+def broadcast_notification(message, priority='normal'):
+    """Push a system_notification frame to every chat socket of this process"""
+    async_to_sync(get_channel_layer().group_send)(BROADCAST_GROUP, {
+        'type': 'system_notification',
+        'message': message,
+        'priority': priority
+    })
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
     """WebSocket consumer for real-time chat functionality"""
     
+    # Group events that only write to the socket. channels runs
+    # close_old_connections() in a worker thread before every handler; that
+    # hop dominates broadcast fan-out, so these handlers skip it.
+    SOCKET_ONLY_EVENTS = frozenset({'user_typing', 'system_notification'})
+    outbound_class = OutboundPipeline
+    
+    async def dispatch(self, message):
+        if message['type'] in self.SOCKET_ONLY_EVENTS:
+            await getattr(self, message['type'])(message)
+        else:
+            await super().dispatch(message)
+    
     async def connect(self):
         """Handle WebSocket connection"""
         self.user = self.scope["user"]
@@ -18,6 +47,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
         
+        self.session = None
         self.room_name = f"chat_{self.user.id}"
         self.room_group_name = f"chat_group_{self.user.id}"
         
@@ -26,22 +56,30 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.room_group_name,
             self.channel_name
         )
+        await self.channel_layer.group_add(BROADCAST_GROUP, self.channel_name)
         
         await self.accept()
         
+        # Frames go out through a bounded, coalescing send queue
+        self.outbound = self.outbound_class(self.send, self.close)
+        self.outbound.start()
+        
         # Send welcome message
-        await self.send(text_data=json.dumps({
+        self.outbound.push({
             'type': 'system_message',
             'message': 'Connected to AI Chatbot. How can I help you today?'
-        }))
+        })
 
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
+        if hasattr(self, 'outbound'):
+            await self.outbound.stop()
         if hasattr(self, 'room_group_name'):
             await self.channel_layer.group_discard(
                 self.room_group_name,
                 self.channel_name
             )
+            await self.channel_layer.group_discard(BROADCAST_GROUP, self.channel_name)
 
     async def receive(self, text_data):
         """Handle incoming WebSocket messages"""
@@ -57,10 +95,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 await self.handle_typing_indicator(text_data_json)
                 
         except json.JSONDecodeError:
-            await self.send(text_data=json.dumps({
+            self.outbound.push({
                 'type': 'error',
                 'message': 'Invalid JSON format'
-            }))
+            })
+        except Exception as e:
+            # Keep the socket open and report the failure, as the REST views do
+            self.outbound.push({
+                'type': 'error',
+                'message': str(e)
+            })
 
     async def handle_chat_message(self, data):
         """Handle chat message processing"""
@@ -68,36 +112,65 @@ class ChatConsumer(AsyncWebsocketConsumer):
         session_id = data.get('session_id')
         
         if not message:
-            await self.send(text_data=json.dumps({
+            self.outbound.push({
                 'type': 'error',
                 'message': 'Message cannot be empty'
-            }))
+            })
             return
         
         # Send typing indicator
-        await self.send(text_data=json.dumps({
+        self.outbound.push({
             'type': 'bot_typing',
             'is_typing': True
-        }))
+        })
         
-        # Process message with chatbot service
-        response_data = await self.process_chatbot_message(message, session_id)
+        # Process message on the event loop, reusing this socket's session, once
+        # the scheduler grants a slot; urgent messages are granted first.
+        # With "stream": true the reply is also sent as bot_message_delta frames
+        try:
+            response_data = await chat_scheduler.arun(
+                MessageProcessor.calculate_response_priority(message),
+                self.stream_reply if data.get('stream') else chatbot_service.aprocess_message,
+                user=self.user,
+                message=message,
+                session_id=session_id,
+                session=self.session
+            )
+        except Exception as e:
+            self.outbound.push({
+                'type': 'error',
+                'message': 'Chatbot is busy, please retry shortly' if isinstance(e, SchedulerBusy) else str(e)
+            })
+            self.outbound.push({
+                'type': 'bot_typing',
+                'is_typing': False
+            })
+            return
+        self.session = response_data.pop('session')
         
         # Send bot response
-        await self.send(text_data=json.dumps({
+        self.outbound.push({
             'type': 'bot_message',
             'message_id': response_data['message_id'],
             'content': response_data['content'],
             'quick_actions': response_data.get('quick_actions', []),
             'metadata': response_data.get('metadata', {}),
             'session_id': response_data['session_id']
-        }))
+        })
         
         # Stop typing indicator
-        await self.send(text_data=json.dumps({
+        self.outbound.push({
             'type': 'bot_typing',
             'is_typing': False
-        }))
+        })
+
+    async def stream_reply(self, **kwargs):
+        """Forward each chunk of the reply as it is generated; returns the full reply"""
+        async for event, payload in chatbot_service.astream_message(**kwargs):
+            if event == 'delta':
+                self.outbound.push({'type': 'bot_message_delta', **payload})
+            else:
+                return payload
 
     async def handle_quick_action(self, data):
         """Handle quick action processing"""
@@ -106,20 +179,20 @@ class ChatConsumer(AsyncWebsocketConsumer):
         session_id = data.get('session_id')
         
         if not action_type:
-            await self.send(text_data=json.dumps({
+            self.outbound.push({
                 'type': 'error',
                 'message': 'Action type is required'
-            }))
+            })
             return
         
         # Process quick action
         response_data = await self.process_quick_action(action_type, action_data, session_id)
         
-        await self.send(text_data=json.dumps({
+        self.outbound.push({
             'type': 'quick_action_response',
             'action_type': action_type,
             'response': response_data
-        }))
+        })
 
     async def handle_typing_indicator(self, data):
         """Handle typing indicator from user"""
@@ -135,16 +208,6 @@ class ChatConsumer(AsyncWebsocketConsumer):
             }
         )
 
-    @database_sync_to_async
-    def process_chatbot_message(self, message, session_id):
-        """Process message with chatbot service (database operation)"""
-        chatbot_service = ChatbotService()
-        return chatbot_service.process_message(
-            user=self.user,
-            message=message,
-            session_id=session_id
-        )
-
     @database_sync_to_async
     def process_quick_action(self, action_type, action_data, session_id):
         """Process quick action (database operation)"""
@@ -154,16 +217,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
     # Group message handlers
     async def user_typing(self, event):
         """Handle user typing broadcast"""
-        await self.send(text_data=json.dumps({
+        self.outbound.push({
             'type': 'user_typing',
             'user_id': event['user_id'],
             'is_typing': event['is_typing']
-        }))
+        })
 
     async def system_notification(self, event):
         """Handle system notifications"""
-        await self.send(text_data=json.dumps({
+        self.outbound.push({
             'type': 'system_notification',
             'message': event['message'],
             'priority': event.get('priority', 'normal')
-        }))
\ No newline at end of file
+        })
\ No newline at end of file
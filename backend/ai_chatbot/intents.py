@@ -0,0 +1,109 @@
+import re
+from typing import Dict, Iterable, List
+
+# Intent -> keywords. Order matters: it breaks ties between equally scored intents.
+INTENT_PATTERNS = {
+    'drone_status': ['drone', 'status', 'where', 'location', 'track'],
+    'delivery_management': ['delivery', 'order', 'package', 'eta', 'reschedule'],
+    'inventory': ['inventory', 'stock', 'supplies', 'low stock', 'supplier'],
+    'fleet_coordination': ['fleet', 'assign', 'nearest', 'reroute', 'coordinate'],
+    'disaster_priority': ['priority', 'critical', 'emergency', 'urgent', 'disaster'],
+    'analytics': ['report', 'analytics', 'stats', 'performance', 'data'],
+    'weather': ['weather', 'conditions', 'forecast', 'wind', 'rain'],
+    'communication': ['alert', 'notification', 'message', 'contact', 'support']
+}
+
+DEFAULT_INTENT = 'general'
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def surface_forms(word: str) -> List[str]:
+    """A keyword and the plural, -ing, -ed and -ion spellings that should also match it"""
+    forms = [word, word + 's', word + 'es']
+    if word.endswith('y') and word[-2:-1] not in 'aeiou':
+        forms.append(word[:-1] + 'ies')  # delivery -> deliveries
+    stem = word[:-1] if word.endswith('e') else word
+    forms += [stem + 'ing', stem + 'ed', stem + 'ion']  # track -> tracking, coordinate -> coordination
+    return forms
+
+
+class IntentMatcher:
+    """
+    Scores every intent in one pass over the message.
+
+    All keywords are compiled up front into a hash table of their surface
+    forms (singular, plural and the -ing/-ed/-ion forms). A message is split into words once with a
+    precompiled regex and each word is a single dict lookup, so matching is
+    whole-word: "data" no longer fires inside "update", nor "eta" inside
+    "metadata". Multi-word keywords ("low stock") are matched greedily before
+    their single words. The intent with the most keyword hits wins; ties go
+    to the intent listed first.
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]] = INTENT_PATTERNS, default: str = DEFAULT_INTENT):
+        self.default = default
+        self._rank = {intent: rank for rank, intent in enumerate(patterns)}
+        self._words = {}
+        self._phrases = {}
+        for intent, keywords in patterns.items():
+            for keyword in keywords:
+                words = WORD_RE.findall(keyword.lower())
+                for last in surface_forms(words[-1]):
+                    # First intent to claim a keyword keeps it, as with the old loop
+                    if len(words) == 1:
+                        self._words.setdefault(last, intent)
+                    else:
+                        self._phrases.setdefault(words[0], {}).setdefault(tuple(words[1:-1]) + (last,), intent)
+        # Longest phrase first for each leading word
+        self._phrases = {
+            first: sorted(tails.items(), key=lambda item: len(item[0]), reverse=True)
+            for first, tails in self._phrases.items()
+        }
+
+    def scores(self, message: str) -> Dict[str, int]:
+        """Keyword hit count per intent, only for intents that matched"""
+        words = WORD_RE.findall(message.lower())
+        lookup = self._words.get
+        phrases = self._phrases
+        scores = {}
+        index = 0
+        count = len(words)
+        while index < count:
+            word = words[index]
+            index += 1
+            intent = lookup(word)
+            if word in phrases:
+                for tail, phrase_intent in phrases[word]:
+                    if tuple(words[index:index + len(tail)]) == tail:
+                        intent = phrase_intent
+                        index += len(tail)
+                        break
+            if intent:
+                scores[intent] = scores.get(intent, 0) + 1
+        return scores
+
+    def classify(self, message: str) -> str:
+        scores = self.scores(message)
+        if len(scores) <= 1:
+            return next(iter(scores), self.default)
+        return min(scores, key=lambda intent: (-scores[intent], self._rank[intent]))
+
+    def classify_many(self, messages: Iterable[str]) -> List[str]:
+        """Classify a batch of messages, in order"""
+        classify = self.classify
+        return [classify(message) for message in messages]
+
+
+def substring_intent(message: str, patterns: Dict[str, List[str]] = INTENT_PATTERNS) -> str:
+    """The original first-match substring loop, kept as the benchmark baseline"""
+    message_lower = message.lower()
+
+    for intent, keywords in patterns.items():
+        if any(keyword in message_lower for keyword in keywords):
+            return intent
+
+    return DEFAULT_INTENT
+
+
+intent_matcher = IntentMatcher()
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import time
+from channels.layers import channel_layers, get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import AccessToken
+from ai_chatbot.consumers import BROADCAST_GROUP
+from drone_backend.asgi import application
+
+LAYERS = {
+    'in-memory': 'channels.layers.InMemoryChannelLayer',
+    'sharded': 'drone_backend.layers.ShardedInMemoryChannelLayer',
+}
+CONNECT_BATCH = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Connect many JWT-authenticated chat sockets through the ASGI router and time '
+        'system_notification broadcasts with the stock and the sharded in-memory channel layer'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sockets', type=int, default=10000, help='Connected chat sockets')
+        parser.add_argument('--broadcasts', type=int, default=20, help='Notifications to send')
+        parser.add_argument('--layers', default='in-memory,sharded',
+                            help=f'Comma-separated layers to compare: {", ".join(LAYERS)}')
+        parser.add_argument('--baseline-sockets', type=int, default=2000,
+                            help='Socket cap for the stock in-memory layer, whose sweeps grow quadratically')
+
+    def handle(self, *args, **options):
+        names = options['layers'].split(',')
+        unknown = set(names) - set(LAYERS)
+        if unknown:
+            raise CommandError(f'Unknown layers: {", ".join(sorted(unknown))}')
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            user = get_user_model().objects.create_user(username='benchmark', password='benchmark')
+            token = str(AccessToken.for_user(user))
+            for name in names:
+                sockets = options['sockets']
+                if name == 'in-memory':
+                    sockets = min(sockets, options['baseline_sockets'])
+                layers = {'default': {'BACKEND': LAYERS[name], 'CONFIG': {'capacity': 100}}}
+                with override_settings(CHANNEL_LAYERS=layers):
+                    channel_layers.backends.clear()
+                    asyncio.run(self._run(name, token, sockets, options['broadcasts']))
+        finally:
+            channel_layers.backends.clear()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    async def _run(self, name, token, sockets, broadcasts):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {name}: {sockets} sockets =='))
+        communicators = []
+        started = time.perf_counter()
+        for offset in range(0, sockets, CONNECT_BATCH):
+            batch = [
+                WebsocketCommunicator(application, f'/ws/chat/?token={token}')
+                for _ in range(min(CONNECT_BATCH, sockets - offset))
+            ]
+            results = await asyncio.gather(*(communicator.connect(timeout=60) for communicator in batch))
+            if not all(connected for connected, _ in results):
+                raise CommandError('A socket was refused; check JWT authentication')
+            await asyncio.gather(*(communicator.receive_from(timeout=60) for communicator in batch))
+            communicators.extend(batch)
+        self.stdout.write(f'connected and authenticated in {time.perf_counter() - started:.2f}s')
+
+        layer = get_channel_layer()
+        latencies = []
+        started = time.perf_counter()
+        for index in range(broadcasts):
+            sent_at = time.perf_counter()
+            await layer.group_send(BROADCAST_GROUP, {
+                'type': 'system_notification',
+                'message': f'Fleet notice {index}',
+                'priority': 'high',
+            })
+            frames = await asyncio.gather(*(communicator.receive_from(timeout=120) for communicator in communicators))
+            latencies.append(time.perf_counter() - sent_at)
+            if any(json.loads(frame)['message'] != f'Fleet notice {index}' for frame in frames):
+                raise CommandError('A socket received the wrong frame')
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        deliveries = broadcasts * len(communicators)
+        self.stdout.write(f'{deliveries} deliveries in {elapsed:.2f}s: {deliveries / elapsed:,.0f} frames/s')
+        self.stdout.write(
+            f'broadcast fan-out ms: p50 {latencies[len(latencies) // 2] * 1000:.1f}  '
+            f'max {latencies[-1] * 1000:.1f}'
+        )
+        await asyncio.gather(*(communicator.disconnect() for communicator in communicators))
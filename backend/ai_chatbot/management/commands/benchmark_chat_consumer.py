@@ -0,0 +1,137 @@
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from channels.db import database_sync_to_async
+from channels.layers import channel_layers
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from ai_chatbot.consumers import ChatConsumer
+from ai_chatbot.persistence import chat_analytics
+from ai_chatbot.services import ChatbotService
+from drone_app.models import Drone
+
+MESSAGES = {
+    # Handlers that query drones plus ones answered without the database
+    'mixed': [
+        'Where are the drones right now?',
+        'Assign the nearest drone to 28.6139, 77.2090',
+        'What is the weather forecast?',
+        'Show me this week\'s report',
+    ],
+    'static': [
+        'What is the weather forecast?',
+        'Show me this week\'s report',
+    ],
+}
+
+
+class ThreadedChatConsumer(ChatConsumer):
+    """The previous consumer: every turn hops to the sync thread pool with a fresh service"""
+
+    async def handle_chat_message(self, data):
+        response_data = await self.process_chatbot_message(data['message'], data.get('session_id'))
+        await self.send_json(response_data)
+
+    @database_sync_to_async
+    def process_chatbot_message(self, message, session_id):
+        return ChatbotService().process_message(user=self.user, message=message, session_id=session_id)
+
+    async def send_json(self, response_data):
+        await self.send(text_data=json.dumps({'type': 'bot_message', **response_data}))
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive ChatConsumer with many concurrent WebSocket clients through the '
+        'channels test communicator, comparing the thread-pool path with aprocess_message'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sockets', type=int, default=500, help='Concurrent WebSocket clients')
+        parser.add_argument('--messages', type=int, default=4, help='Chat messages per client')
+        parser.add_argument('--drones', type=int, default=200, help='Drones to generate')
+        parser.add_argument('--mix', choices=sorted(MESSAGES), default='mixed', help='Message set to send')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        if connection.vendor == 'sqlite':
+            # Shared-cache in-memory SQLite fails instead of waiting on locks;
+            # a file database behaves like a real deployment under concurrent writers
+            connection.settings_dict['TEST']['NAME'] = str(Path(tempfile.mkdtemp()) / 'benchmark.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        layers = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+        try:
+            with override_settings(CHANNEL_LAYERS=layers):
+                channel_layers.backends.clear()
+                self._populate(options['drones'])
+                user = get_user_model().objects.create_user(username='benchmark', password='benchmark')
+                for label, consumer in (('thread pool', ThreadedChatConsumer), ('async', ChatConsumer)):
+                    self._run(label, consumer.as_asgi(), user, options)
+                    chat_analytics.flush()
+        finally:
+            channel_layers.backends.clear()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _populate(self, count):
+        Drone.objects.bulk_create([
+            Drone(location_latitude=28 + i / count, location_longitude=77 + i / count, geohash='')
+            for i in range(count)
+        ])
+        for drone in Drone.objects.all():
+            drone.save()  # derive geohash
+
+    def _run(self, label, application, user, options):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {label} =='))
+        latencies = []
+        messages = MESSAGES[options['mix']]
+        peak_threads = [threading.active_count()]
+
+        async def client(index):
+            communicator = WebsocketCommunicator(application, '/ws/chat/')
+            communicator.scope['user'] = user
+            connected, _ = await communicator.connect(timeout=60)
+            assert connected
+            await communicator.receive_json_from(timeout=60)  # welcome
+            session_id = None
+            for turn in range(options['messages']):
+                start = time.perf_counter()
+                await communicator.send_json_to({
+                    'type': 'chat_message',
+                    'message': messages[(index + turn) % len(messages)],
+                    'session_id': session_id
+                })
+                frame = None
+                while frame is None:
+                    received = await communicator.receive_json_from(timeout=60)
+                    # Frames sent in the same tick arrive wrapped in a batch envelope
+                    for item in received['frames'] if received['type'] == 'batch' else [received]:
+                        if item['type'] == 'bot_message':
+                            frame = item
+                latencies.append((time.perf_counter() - start) * 1000)
+                session_id = frame['session_id']
+                peak_threads[0] = max(peak_threads[0], threading.active_count())
+            await communicator.disconnect()
+
+        async def main():
+            await asyncio.gather(*(client(index) for index in range(options['sockets'])))
+
+        start = time.perf_counter()
+        asyncio.run(main())
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        total = len(latencies)
+        self.stdout.write(f'{total} messages over {options["sockets"]} sockets in {elapsed:.2f}s')
+        self.stdout.write(f'throughput: {total / elapsed:,.0f} messages/s')
+        self.stdout.write(
+            f'latency ms: p50 {latencies[total // 2]:.1f}  p95 {latencies[int(total * 0.95)]:.1f}  '
+            f'max {latencies[-1]:.1f}'
+        )
+        self.stdout.write(f'peak threads: {peak_threads[0]}')
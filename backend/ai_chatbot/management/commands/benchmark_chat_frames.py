@@ -0,0 +1,177 @@
+import asyncio
+import json
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from channels.layers import channel_layers, get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from ai_chatbot.consumers import BROADCAST_GROUP, ChatConsumer
+from ai_chatbot.outbound import OutboundPipeline, outbound_totals
+from ai_chatbot.persistence import chat_analytics
+
+MESSAGES = ['What is the weather forecast?', 'Show me this week\'s report']
+
+
+class PerFramePipeline(OutboundPipeline):
+    """The previous behaviour: one json.dumps and one WebSocket message per frame, no limit"""
+
+    def push(self, frame):
+        self.stats['frames'] += 1
+        self._frames.append(frame)
+        self.stats['high_water'] = max(self.stats['high_water'], len(self._frames))
+        self._ready.set()
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while self._frames:
+                text = json.dumps(self._frames.popleft())
+                self.stats['messages'] += 1
+                self.stats['bytes'] += len(text.encode())
+                await self._send(text_data=text)
+
+
+class PerFrameChatConsumer(ChatConsumer):
+    outbound_class = PerFramePipeline
+
+
+class SlowChatConsumer(ChatConsumer):
+    """A client whose transport accepts one WebSocket message every `delay` seconds"""
+    delay = 0.5
+
+    async def send(self, *args, **kwargs):
+        await asyncio.sleep(self.delay)
+        await super().send(*args, **kwargs)
+
+
+def unwrap(message):
+    return message['frames'] if message['type'] == 'batch' else [message]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare WebSocket messages and bytes per chat turn for the coalescing outbound '
+        'pipeline and per-frame json.dumps sends, and show the send-queue limit on a slow client'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sockets', type=int, default=500, help='Concurrent chat sockets')
+        parser.add_argument('--messages', type=int, default=4, help='Chat messages per socket')
+        parser.add_argument('--broadcasts', type=int, default=5, help='Notifications broadcast during the run')
+        parser.add_argument('--slow-burst', type=int, default=1000,
+                            help='Notifications pushed at one slow socket in the backpressure test')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        if connection.vendor == 'sqlite':
+            # Concurrent writers need a file database, as in benchmark_chat_consumer
+            connection.settings_dict['TEST']['NAME'] = str(Path(tempfile.mkdtemp()) / 'benchmark.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            channel_layers.backends.clear()
+            user = get_user_model().objects.create_user(username='benchmark', password='benchmark')
+            for label, consumer in (('per-frame json', PerFrameChatConsumer), ('coalescing pipeline', ChatConsumer)):
+                asyncio.run(self._turns(label, consumer.as_asgi(), user, options))
+                chat_analytics.flush()
+            for policy in ('close', 'drop'):
+                with override_settings(CHAT_SOCKET_OVERFLOW=policy):
+                    asyncio.run(self._slow(policy, user, options['slow_burst']))
+        finally:
+            channel_layers.backends.clear()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    async def _turns(self, label, application, user, options):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {label} =='))
+        before = Counter(outbound_totals)
+        received = Counter()
+
+        async def client(index):
+            communicator = WebsocketCommunicator(application, '/ws/chat/')
+            communicator.scope['user'] = user
+            connected, _ = await communicator.connect(timeout=60)
+            assert connected
+            await communicator.receive_from(timeout=60)  # welcome
+            for turn in range(options['messages']):
+                await communicator.send_json_to({
+                    'type': 'chat_message', 'message': MESSAGES[(index + turn) % len(MESSAGES)]
+                })
+                replied = typing = False
+                while not replied or typing:
+                    text = await communicator.receive_from(timeout=60)
+                    received['messages'] += 1
+                    received['bytes'] += len(text.encode())
+                    for frame in unwrap(json.loads(text)):
+                        received['frames'] += 1
+                        if frame['type'] == 'bot_typing':
+                            typing = frame['is_typing']
+                        replied = replied or frame['type'] == 'bot_message'
+            return communicator
+
+        start = time.perf_counter()
+        communicators = await asyncio.gather(*(client(index) for index in range(options['sockets'])))
+        layer = get_channel_layer()
+        for index in range(options['broadcasts']):
+            await layer.group_send(BROADCAST_GROUP, {'type': 'system_notification', 'message': f'Notice {index}'})
+        for communicator in communicators:
+            for _ in range(options['broadcasts']):
+                text = await communicator.receive_from(timeout=60)
+                received['messages'] += 1
+                received['bytes'] += len(text.encode())
+                received['frames'] += len(unwrap(json.loads(text)))
+        elapsed = time.perf_counter() - start
+        await asyncio.gather(*(communicator.disconnect() for communicator in communicators))
+
+        sent = Counter(outbound_totals)
+        sent.subtract(before)
+        turns = options['sockets'] * options['messages']
+        self.stdout.write(f'{turns} turns + {options["broadcasts"]} broadcasts in {elapsed:.2f}s')
+        self.stdout.write(
+            f'client received {received["messages"]} WebSocket messages, {received["bytes"]:,} bytes, '
+            f'{received["frames"]} frames'
+        )
+        self.stdout.write(
+            f'server: {sent["frames"]} frames in {sent["messages"]} WebSocket messages '
+            f'({sent["batches"]} batches), {sent["bytes"]:,} bytes, {sent["elided"]} typing frames elided, '
+            f'queue high-water {outbound_totals["high_water"]}'
+        )
+
+    async def _slow(self, policy, user, burst):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== slow client, overflow policy "{policy}" =='))
+        communicator = WebsocketCommunicator(SlowChatConsumer.as_asgi(), '/ws/chat/')
+        communicator.scope['user'] = user
+        connected, _ = await communicator.connect(timeout=60)
+        assert connected
+        await communicator.receive_from(timeout=60)
+        before = Counter(outbound_totals)
+
+        layer = get_channel_layer()
+        for index in range(burst):
+            await layer.group_send(BROADCAST_GROUP, {'type': 'system_notification', 'message': f'Notice {index}'})
+            if index % 20 == 0:
+                # Stay under the channel layer's capacity so frames reach the socket's queue
+                await asyncio.sleep(0.005)
+        frames = 0
+        closed = None
+        # receive_output() kills the application on timeout, so poll for quiet first
+        while not await communicator.receive_nothing(timeout=SlowChatConsumer.delay * 3):
+            output = await communicator.receive_output()
+            if output['type'] == 'websocket.close':
+                closed = output.get('code')
+                break
+            frames += len(unwrap(json.loads(output['text'])))
+        await communicator.disconnect()
+
+        stats = Counter(outbound_totals)
+        stats.subtract(before)
+        self.stdout.write(
+            f'{burst} notifications: {frames} frames delivered, {stats["dropped"]} dropped, '
+            f'{stats["discarded"]} discarded at disconnect, closed with {closed}, '
+            f'queue high-water {outbound_totals["high_water"]}'
+        )
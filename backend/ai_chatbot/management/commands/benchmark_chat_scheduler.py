@@ -0,0 +1,121 @@
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from ai_chatbot.scheduler import PriorityScheduler, SchedulerBusy, percentile
+from ai_chatbot.utils import MessageProcessor
+
+URGENT_MESSAGE = 'SOS drone crash near the river, emergency'
+ROUTINE_MESSAGE = 'any news today?'
+TICK = 0.005  # seconds between submission batches
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the chat scheduler: a steady stream of urgent messages while routine '
+        'traffic ramps past capacity, with aging priority vs. FIFO ordering'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.CHAT_SCHEDULER_WORKERS)
+        parser.add_argument('--max-queue', type=int, default=settings.CHAT_SCHEDULER_MAX_QUEUE)
+        parser.add_argument('--aging', type=float, default=settings.CHAT_SCHEDULER_AGING_INTERVAL,
+                            help='Seconds of waiting worth one priority level')
+        parser.add_argument('--service-ms', type=float, default=10.0, help='Time one chat turn holds a worker')
+        parser.add_argument('--urgent-rate', type=float, default=20.0, help='Urgent messages per second')
+        parser.add_argument('--loads', default='0.5,1,2,4',
+                            help='Routine traffic per step, as multiples of worker capacity')
+        parser.add_argument('--duration', type=float, default=3.0, help='Seconds per load step')
+
+    def handle(self, *args, **options):
+        try:
+            loads = [float(value) for value in options['loads'].split(',')]
+        except ValueError:
+            raise CommandError('--loads must be comma-separated numbers')
+        if options['workers'] < 1 or options['service_ms'] <= 0:
+            raise CommandError('--workers and --service-ms must be positive')
+
+        urgent = MessageProcessor.calculate_response_priority(URGENT_MESSAGE)
+        routine = MessageProcessor.calculate_response_priority(ROUTINE_MESSAGE)
+        capacity = options['workers'] / (options['service_ms'] / 1000)
+        self.stdout.write(
+            f'{options["workers"]} workers x {options["service_ms"]:g} ms = {capacity:.0f} turns/s capacity, '
+            f'urgent (priority {urgent}) at {options["urgent_rate"]:g}/s, routine priority {routine}'
+        )
+
+        for mode, aging in (('fifo', 0.0), ('priority', options['aging'])):
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {mode} (aging {aging:g}s) =='))
+            self.stdout.write(
+                f'{"load":>5} {"urgent p50":>11} {"urgent p99":>11} {"routine p50":>12} {"routine p99":>12} '
+                f'{"routine done":>13} {"rejected":>9}'
+            )
+            for load in loads:
+                result = self._step(options, aging, urgent, routine, load * capacity)
+                self.stdout.write(
+                    f'{load:>4g}x {result[urgent]["p50"]:>9.1f}ms {result[urgent]["p99"]:>9.1f}ms '
+                    f'{result[routine]["p50"]:>10.1f}ms {result[routine]["p99"]:>10.1f}ms '
+                    f'{result[routine]["done"]:>13} {result[routine]["rejected"] + result[urgent]["rejected"]:>9}'
+                )
+
+    def _step(self, options, aging, urgent, routine, routine_rate):
+        scheduler = PriorityScheduler(
+            name='bench-worker', workers=options['workers'],
+            max_queue=options['max_queue'], aging_interval=aging
+        )
+        service = options['service_ms'] / 1000
+        latencies = {urgent: [], routine: []}
+        rejected = {urgent: 0, routine: 0}
+        outstanding = []
+        lock = threading.Lock()
+
+        def record(priority, submitted_at, future):
+            if future.exception() is not None:
+                with lock:
+                    rejected[priority] += 1
+                return
+            with lock:
+                latencies[priority].append(time.perf_counter() - submitted_at)
+
+        def produce(priority, rate):
+            owed = 0.0
+            started = time.perf_counter()
+            deadline = started + options['duration']
+            while time.perf_counter() < deadline:
+                owed += rate * TICK
+                while owed >= 1:
+                    owed -= 1
+                    submitted_at = time.perf_counter()
+                    try:
+                        future = scheduler.submit(priority, time.sleep, service)
+                    except SchedulerBusy:
+                        with lock:
+                            rejected[priority] += 1
+                        continue
+                    future.add_done_callback(lambda f, p=priority, t=submitted_at: record(p, t, f))
+                    outstanding.append(future)
+                time.sleep(TICK)
+
+        producers = [
+            threading.Thread(target=produce, args=(urgent, options['urgent_rate'])),
+            threading.Thread(target=produce, args=(routine, routine_rate)),
+        ]
+        for producer in producers:
+            producer.start()
+        for producer in producers:
+            producer.join()
+        for future in list(outstanding):
+            try:
+                future.result()
+            except SchedulerBusy:
+                pass
+        scheduler.shutdown()
+
+        return {
+            priority: {
+                'p50': percentile(samples, 0.5) * 1000,
+                'p99': percentile(samples, 0.99) * 1000,
+                'done': len(samples),
+                'rejected': rejected[priority],
+            }
+            for priority, samples in latencies.items()
+        }
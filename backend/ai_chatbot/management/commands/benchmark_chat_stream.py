@@ -0,0 +1,112 @@
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from channels.layers import channel_layers
+from channels.testing import HttpCommunicator, WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import AccessToken
+from ai_chatbot.persistence import chat_analytics
+from ai_chatbot.streaming import StubModelGenerator
+from drone_backend.asgi import application
+
+MESSAGES = ['What is the weather forecast?', 'How do I contact the pilot?', 'Hello there']
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    return ordered[len(ordered) // 2] * 1000, ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Time to first chunk vs. time to the full reply for streamed chat replies, over '
+        'WebSocket bot_message_delta frames and server-sent events, with a stub model generator'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=settings.CHAT_SCHEDULER_WORKERS,
+                            help='Concurrent clients per transport; beyond CHAT_SCHEDULER_WORKERS turns queue')
+        parser.add_argument('--first-token', type=float, default=0.3, help='Stub delay before the first chunk')
+        parser.add_argument('--chunk-delay', type=float, default=0.03, help='Stub delay between chunks')
+
+    def handle(self, *args, **options):
+        StubModelGenerator.first_token_delay = options['first_token']
+        StubModelGenerator.chunk_delay = options['chunk_delay']
+        setup_test_environment()
+        if connection.vendor == 'sqlite':
+            # Concurrent writers need a file database, as in benchmark_chat_consumer
+            connection.settings_dict['TEST']['NAME'] = str(Path(tempfile.mkdtemp()) / 'benchmark.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            channel_layers.backends.clear()
+            user = get_user_model().objects.create_user(username='benchmark', password='benchmark')
+            token = str(AccessToken.for_user(user))
+            with override_settings(CHAT_REPLY_GENERATOR='ai_chatbot.streaming.StubModelGenerator'):
+                for label, client in (('WebSocket', self._socket), ('server-sent events', self._events)):
+                    asyncio.run(self._run(label, client, token, options['clients']))
+                    chat_analytics.flush()
+        finally:
+            channel_layers.backends.clear()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    async def _run(self, label, client, token, clients):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {label}: {clients} clients =='))
+        results = await asyncio.gather(*(client(token, MESSAGES[index % len(MESSAGES)]) for index in range(clients)))
+        first = [result[0] for result in results]
+        full = [result[1] for result in results]
+        chunks = sum(result[2] for result in results)
+        self.stdout.write('first chunk ms: p50 %.1f  p99 %.1f' % _percentiles(first))
+        self.stdout.write('full reply ms:  p50 %.1f  p99 %.1f' % _percentiles(full))
+        self.stdout.write(f'{chunks / clients:.1f} chunks per reply')
+
+    async def _socket(self, token, message):
+        communicator = WebsocketCommunicator(application, f'/ws/chat/?token={token}')
+        connected, _ = await communicator.connect(timeout=60)
+        assert connected
+        await communicator.receive_from(timeout=60)  # welcome
+        started = time.perf_counter()
+        await communicator.send_json_to({'type': 'chat_message', 'message': message, 'stream': True})
+        first = None
+        chunks = 0
+        while True:
+            reply = json.loads(await communicator.receive_from(timeout=60))
+            frames = reply['frames'] if reply['type'] == 'batch' else [reply]
+            deltas = sum(frame['type'] == 'bot_message_delta' for frame in frames)
+            if deltas and first is None:
+                first = time.perf_counter() - started
+            chunks += deltas
+            if any(frame['type'] == 'bot_message' for frame in frames):
+                break
+        full = time.perf_counter() - started
+        await communicator.disconnect()
+        return first, full, chunks
+
+    async def _events(self, token, message):
+        body = json.dumps({'message': message}).encode()
+        communicator = HttpCommunicator(application, 'POST', '/api/chatbot/chat/stream/', body=body, headers=[
+            (b'host', b'localhost'),
+            (b'authorization', f'Bearer {token}'.encode()),
+            (b'content-type', b'application/json'),
+            (b'accept', b'text/event-stream'),
+        ])
+        started = time.perf_counter()
+        await communicator.send_input({'type': 'http.request', 'body': body})
+        response = await communicator.receive_output(60)
+        assert response['status'] == 200, response
+        first = None
+        chunks = 0
+        while True:
+            part = await communicator.receive_output(60)
+            if part.get('body', b'').startswith(b'event: delta'):
+                first = first or time.perf_counter() - started
+                chunks += 1
+            if not part.get('more_body'):
+                break
+        return first, time.perf_counter() - started, chunks
@@ -0,0 +1,72 @@
+import json
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from ai_chatbot.intents import intent_matcher, substring_intent
+from ai_chatbot.models import ChatMessage
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[2] / 'data' / 'intent_corpus.jsonl'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput and accuracy of the compiled intent matcher '
+        'against the original substring loop on a labelled message corpus'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', default=str(DEFAULT_CORPUS), help='JSONL file of {"message", "intent"} rows')
+        parser.add_argument('--from-db', action='store_true', help='Also time recorded user messages from ChatMessage')
+        parser.add_argument('--limit', type=int, default=50000, help='Recorded messages to load with --from-db')
+        parser.add_argument('--repeat', type=int, default=200, help='Passes over the corpus per timing')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['corpus']) as corpus:
+                rows = [json.loads(line) for line in corpus if line.strip()]
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read corpus: {e}')
+
+        messages = [row['message'] for row in rows]
+        labels = [row['intent'] for row in rows]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'== Labelled corpus ({len(rows)} messages) =='))
+        baseline = [substring_intent(message) for message in messages]
+        compiled = intent_matcher.classify_many(messages)
+        for name, predicted in (('substring loop', baseline), ('compiled matcher', compiled)):
+            correct = sum(p == label for p, label in zip(predicted, labels))
+            self.stdout.write(f'{name:<18} accuracy {correct}/{len(rows)} ({correct / len(rows) * 100:.1f}%)')
+        self._throughput(messages, options['repeat'])
+
+        fixed = [(m, b, c) for m, b, c, label in zip(messages, baseline, compiled, labels) if b != label and c == label]
+        if fixed:
+            self.stdout.write('\nCorrected by the compiled matcher:')
+            for message, old, new in fixed:
+                self.stdout.write(f'  {message!r}: {old} -> {new}')
+
+        if options['from_db']:
+            recorded = list(
+                ChatMessage.objects.filter(message_type='user')
+                .order_by('-created_at').values_list('content', flat=True)[:options['limit']]
+            )
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n== Recorded messages ({len(recorded)}) =='))
+            if recorded:
+                agree = sum(
+                    substring_intent(message) == intent
+                    for message, intent in zip(recorded, intent_matcher.classify_many(recorded))
+                )
+                self.stdout.write(f'agreement with substring loop: {agree / len(recorded) * 100:.1f}%')
+                self._throughput(recorded, max(1, options['repeat'] * len(rows) // len(recorded)))
+
+    def _throughput(self, messages, repeat):
+        for name, run in (
+            ('substring loop', lambda: [substring_intent(message) for message in messages]),
+            ('compiled matcher', lambda: intent_matcher.classify_many(messages)),
+        ):
+            run()  # warm up
+            start = time.perf_counter()
+            for _ in range(repeat):
+                run()
+            elapsed = time.perf_counter() - start
+            rate = len(messages) * repeat / elapsed if elapsed else float('inf')
+            self.stdout.write(f'{name:<18} {rate:>12,.0f} messages/s')
@@ -0,0 +1,40 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from ai_chatbot.rollups import prune_chat_analytics, rollup_chat_analytics
+
+
+class Command(BaseCommand):
+    help = 'Fold new chat analytics into the hourly/daily rollups and optionally prune old raw rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune', action='store_true', help='Delete raw rows past the retention window')
+        parser.add_argument(
+            '--retention-days', type=int, default=settings.CHAT_ANALYTICS_RETENTION_DAYS,
+            help='Raw rows older than this many days are pruned (default: CHAT_ANALYTICS_RETENTION_DAYS)'
+        )
+        parser.add_argument(
+            '--every', type=int, metavar='SECONDS',
+            help='Keep running, repeating every SECONDS (for a worker process instead of cron)'
+        )
+
+    def handle(self, *args, **options):
+        if options['retention_days'] < 1:
+            raise CommandError('--retention-days must be at least 1')
+        if options['every'] is not None and options['every'] < 1:
+            raise CommandError('--every must be at least 1')
+
+        while True:
+            self._run_once(options)
+            if options['every'] is None:
+                return
+            close_old_connections()
+            time.sleep(options['every'])
+
+    def _run_once(self, options):
+        hourly, daily = rollup_chat_analytics()
+        self.stdout.write(f'Rolled up {len(hourly)} hourly and {len(daily)} daily bucket(s)')
+        if options['prune']:
+            deleted = prune_chat_analytics(options['retention_days'])
+            self.stdout.write(f'Pruned {deleted} raw row(s) older than {options["retention_days"]} days')
@@ -0,0 +1,68 @@
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from drone_app.aggregates import fleet_counts, percentage
+from drone_app.models import Drone
+from drone_app.snapshot import fleet_snapshot
+from drone_app.telemetry import latest_positions
+from fleet_app.counters import current_month
+from fleet_app.models import FleetStatistics
+
+SNAPSHOT_KEY = 'chatbot_metrics'
+STATUS_DRONES = 3
+
+
+def compute_metrics():
+    """Every figure the chatbot handlers quote, read in one go"""
+    counts = fleet_counts()
+    stats = FleetStatistics.objects.filter(month=current_month()).first()
+    successful = stats.number_of_successful_deliveries if stats else 0
+    unsuccessful = stats.number_of_unsuccessful_deliveries if stats else 0
+    drones = list(
+        Drone.objects.values(
+            'id', 'status', 'urgency_level', 'location_latitude', 'location_longitude'
+        )[:STATUS_DRONES]
+    )
+    return {
+        'counts': counts,
+        'month': {
+            'successful_deliveries': successful,
+            'unsuccessful_deliveries': unsuccessful,
+            'success_rate': percentage(successful, successful + unsuccessful),
+            'average_response_time': stats.average_response_time if stats else 0,
+        },
+        'drones': drones,
+        'refreshed_at': timezone.now().isoformat(),
+    }
+
+
+def _with_live_positions(metrics):
+    """Overlay positions reported through telemetry since the snapshot was taken"""
+    drones = []
+    for drone in metrics['drones']:
+        position = latest_positions.get(drone['id'])
+        if position is not None:
+            drone = {
+                **drone,
+                'location_latitude': position['latitude'],
+                'location_longitude': position['longitude'],
+            }
+        drones.append(drone)
+    return {**metrics, 'drones': drones}
+
+
+def live_metrics():
+    """
+    Fleet counts, this month's FleetStatistics and the newest drones, served
+    from the fleet snapshot cache. The snapshot is dropped on every Drone or
+    FleetStatistics write and otherwise refreshed once it is older than
+    FLEET_SNAPSHOT_CACHE_TIMEOUT, so chat replies cost no queries while warm.
+    """
+    return _with_live_positions(fleet_snapshot.get(SNAPSHOT_KEY, compute_metrics))
+
+
+async def alive_metrics():
+    """live_metrics() for the event loop; only a cold snapshot leaves the loop"""
+    metrics = fleet_snapshot.peek(SNAPSHOT_KEY)
+    if metrics is None:
+        return await sync_to_async(live_metrics)()
+    return _with_live_positions(metrics)
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:04
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Substr
+
+
+def backfill_summaries(apps, schema_editor):
+    ChatSession = apps.get_model('ai_chatbot', 'ChatSession')
+    ChatMessage = apps.get_model('ai_chatbot', 'ChatMessage')
+
+    session_messages = ChatMessage.objects.filter(session=OuterRef('pk'))
+    latest = session_messages.order_by('-created_at', '-id')
+    counts = session_messages.order_by().values('session').annotate(count=Count('id')).values('count')
+    # One correlated UPDATE; updated_at is left alone so list order is preserved
+    ChatSession.objects.update(
+        message_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0),
+        last_message_preview=Coalesce(
+            Subquery(latest.annotate(preview=Substr('content', 1, 120)).values('preview')[:1]),
+            models.Value('')
+        ),
+        last_message_at=Subquery(latest.values('created_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_chatbot', '0002_chatmessage_history_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=120),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', '-updated_at', '-id'], name='chatsession_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_chatbot', '0003_chatsession_summaries'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatanalytics',
+            index=models.Index(fields=['user', 'created_at'], name='chatanalytics_user_time_idx'),
+        ),
+    ]
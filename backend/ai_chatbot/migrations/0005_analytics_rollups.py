@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_chatbot', '0004_chatanalytics_user_time_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatAnalyticsDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('query_type', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('response_time_sum', models.FloatField(default=0.0)),
+                ('response_time_min', models.FloatField(default=0.0)),
+                ('response_time_max', models.FloatField(default=0.0)),
+                ('latency_histogram', models.JSONField(default=list)),
+                ('satisfaction_count', models.PositiveIntegerField(default=0)),
+                ('satisfaction_sum', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-bucket_start', 'query_type'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ChatAnalyticsHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('query_type', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('response_time_sum', models.FloatField(default=0.0)),
+                ('response_time_min', models.FloatField(default=0.0)),
+                ('response_time_max', models.FloatField(default=0.0)),
+                ('latency_histogram', models.JSONField(default=list)),
+                ('satisfaction_count', models.PositiveIntegerField(default=0)),
+                ('satisfaction_sum', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-bucket_start', 'query_type'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='chatanalytics',
+            index=models.Index(fields=['created_at'], name='chatanalytics_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='chatanalyticshourly',
+            constraint=models.UniqueConstraint(fields=('bucket_start', 'query_type'), name='chatanalytics_hourly_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='chatanalyticsdaily',
+            constraint=models.UniqueConstraint(fields=('bucket_start', 'query_type'), name='chatanalytics_daily_unique'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:54
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_chatbot', '0005_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chatanalytics',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
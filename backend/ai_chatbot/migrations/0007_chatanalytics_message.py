@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_chatbot', '0006_chatanalytics_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatanalytics',
+            name='message',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='analytics', to='ai_chatbot.chatmessage'),
+        ),
+    ]
@@ -1,9 +1,12 @@
 import uuid
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
+PREVIEW_LENGTH = 120
+
 
 class ChatSession(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -12,9 +15,21 @@ class ChatSession(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Denormalized from ChatMessage, maintained by update_session_summaries()
+    message_count = models.PositiveIntegerField(default=0)
+    last_message_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # A user's session list, most recently active first
+            models.Index(
+                fields=['user', '-updated_at', '-id'],
+                name='chatsession_recent_idx',
+                condition=models.Q(is_active=True)
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title}"
@@ -36,6 +51,10 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Keyset pagination of a session's history on (created_at, id)
+            models.Index(fields=['session', 'created_at', 'id'], name='chatmessage_history_idx'),
+        ]
 
     def __str__(self):
         return f"{self.message_type}: {self.content[:50]}..."
@@ -66,10 +85,57 @@ class QuickAction(models.Model):
 class ChatAnalytics(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # The bot reply of the turn, so feedback on it finds this row
+    message = models.OneToOneField(
+        ChatMessage, null=True, blank=True, on_delete=models.SET_NULL, related_name='analytics'
+    )
     query_type = models.CharField(max_length=100)
     response_time = models.FloatField()  # in seconds
     satisfaction_score = models.IntegerField(null=True, blank=True)  # 1-5 rating
-    created_at = models.DateTimeField(auto_now_add=True)
+    # When the turn happened, not when the write-behind buffer flushed the row
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Per-user usage reports over a time window
+            models.Index(fields=['user', 'created_at'], name='chatanalytics_user_time_idx'),
+            # Rollup scans and retention pruning by time alone
+            models.Index(fields=['created_at'], name='chatanalytics_created_idx'),
+        ]
+
+
+class AnalyticsRollup(models.Model):
+    """ChatAnalytics aggregated per time bucket and query type, filled by rollup_chat_analytics"""
+    bucket_start = models.DateTimeField()
+    query_type = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+    response_time_sum = models.FloatField(default=0.0)
+    response_time_min = models.FloatField(default=0.0)
+    response_time_max = models.FloatField(default=0.0)
+    # Row counts per ai_chatbot.utils.LATENCY_BUCKETS bucket
+    latency_histogram = models.JSONField(default=list)
+    satisfaction_count = models.PositiveIntegerField(default=0)
+    satisfaction_sum = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        abstract = True
+        ordering = ['-bucket_start', 'query_type']
+
+    def __str__(self):
+        return f"{self.query_type} @ {self.bucket_start:%Y-%m-%d %H:%M}: {self.count}"
+
+
+class ChatAnalyticsHourly(AnalyticsRollup):
+    class Meta(AnalyticsRollup.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['bucket_start', 'query_type'], name='chatanalytics_hourly_unique'),
+        ]
+
+
+class ChatAnalyticsDaily(AnalyticsRollup):
+    class Meta(AnalyticsRollup.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['bucket_start', 'query_type'], name='chatanalytics_daily_unique'),
+        ]
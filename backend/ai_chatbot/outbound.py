@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from collections import Counter, deque
+import orjson
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Frames that only reflect transient state; shed first when a socket falls behind
+DROPPABLE_FRAMES = frozenset({'bot_typing', 'user_typing'})
+CLOSE_TRY_AGAIN_LATER = 1013
+
+# Counters of every closed pipeline in this process
+outbound_totals = Counter()
+
+
+def encode_frame(frame):
+    return orjson.dumps(frame, option=orjson.OPT_NON_STR_KEYS)
+
+
+class OutboundPipeline:
+    """
+    Send queue of one WebSocket. push() only queues a frame; a writer task
+    sends everything queued once the producer yields to the event loop, so
+    frames produced in the same tick leave as one WebSocket message, as is
+    or wrapped in a {"type": "batch", "frames": [...]} envelope. A
+    bot_typing off that finds its bot_typing on still queued cancels both.
+
+    At most `limit` frames wait. When the queue is full, typing frames are
+    shed first; after that the "drop" policy discards the oldest frame and
+    the "close" policy closes the socket with 1013 so the client reconnects
+    and reloads history.
+    """
+
+    def __init__(self, send, close, limit=None, policy=None):
+        self._send = send
+        self._close = close
+        self.limit = limit or settings.CHAT_SOCKET_SEND_QUEUE
+        self.policy = policy or settings.CHAT_SOCKET_OVERFLOW
+        self._frames = deque()
+        self._ready = asyncio.Event()
+        self._closing = False
+        self._task = None
+        self.stats = Counter()
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Cancel the writer; frames still queued are discarded"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self.stats['discarded'] += len(self._frames)
+            self._frames.clear()
+            high_water = self.stats.pop('high_water', 0)
+            outbound_totals.update(self.stats)
+            outbound_totals['connections'] += 1
+            outbound_totals['high_water'] = max(outbound_totals['high_water'], high_water)
+            self.stats['high_water'] = high_water
+            logger.debug('Outbound pipeline closed: %s', dict(self.stats))
+
+    def push(self, frame):
+        if self._closing:
+            return
+        self.stats['frames'] += 1
+        if frame['type'] == 'bot_typing' and not frame['is_typing'] and self._cancel_typing():
+            self.stats['elided'] += 2
+            return
+        if len(self._frames) >= self.limit and not self._make_room(frame):
+            return
+        self._frames.append(frame)
+        if len(self._frames) > self.stats['high_water']:
+            self.stats['high_water'] = len(self._frames)
+        self._ready.set()
+
+    def _cancel_typing(self):
+        for index in range(len(self._frames) - 1, -1, -1):
+            queued = self._frames[index]
+            if queued['type'] == 'bot_typing':
+                if queued['is_typing']:
+                    del self._frames[index]
+                    return True
+                return False
+        return False
+
+    def _make_room(self, frame):
+        """Apply the overflow policy; False when the new frame is not queued"""
+        self.stats['dropped'] += 1
+        if frame['type'] in DROPPABLE_FRAMES:
+            return False
+        for index, queued in enumerate(self._frames):
+            if queued['type'] in DROPPABLE_FRAMES:
+                del self._frames[index]
+                return True
+        if self.policy == 'drop':
+            self._frames.popleft()
+            return True
+        self.stats['overflow_closes'] += 1
+        self._closing = True
+        self._frames.clear()
+        self._ready.set()
+        return False
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self._closing:
+                await self._close(code=CLOSE_TRY_AGAIN_LATER)
+                return
+            if not self._frames:
+                continue
+            if len(self._frames) == 1:
+                payload = encode_frame(self._frames.popleft())
+            else:
+                frames = list(self._frames)
+                self._frames.clear()
+                self.stats['batches'] += 1
+                payload = encode_frame({'type': 'batch', 'frames': frames})
+            self.stats['messages'] += 1
+            self.stats['bytes'] += len(payload)
+            await self._send(text_data=payload.decode())
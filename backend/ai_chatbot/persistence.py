@@ -0,0 +1,152 @@
+import atexit
+import logging
+import threading
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from .models import PREVIEW_LENGTH, ChatAnalytics, ChatMessage, ChatSession, QuickAction
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Collects model rows off the request path and writes them from a
+    background thread, once flush_size items are pending or flush_interval
+    seconds have passed, whichever comes first.
+
+    The buffer is bounded: once max_pending items are waiting (for example
+    while the database is locked), add() flushes on the caller's thread, so
+    producers slow down instead of growing memory without limit. A batch
+    whose write fails goes back to the front of the queue and is retried
+    after flush_interval, up to max_attempts times. Pending items are
+    flushed at interpreter exit.
+    """
+
+    def __init__(self, write, name, flush_size=100, flush_interval=1.0, max_pending=1000, max_attempts=3):
+        self.write = write
+        self.name = name
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._failed_attempts = 0
+        self._pending = []
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def add(self, items):
+        if self._append(items):
+            self.flush()
+
+    async def aadd(self, items):
+        """add() for async callers; only a backpressure flush leaves the event loop"""
+        if self._append(items):
+            await sync_to_async(self.flush)()
+
+    def _append(self, items):
+        """Queue items and wake the writer; True when the caller must flush"""
+        with self._condition:
+            self._pending.extend(items)
+            size = len(self._pending)
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            if size >= self.flush_size:
+                self._condition.notify()
+        return size >= self.max_pending or self._closed
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def flush(self):
+        """Write everything pending; returns the number of items written"""
+        with self._flush_lock:
+            with self._condition:
+                items, self._pending = self._pending, []
+            if not items:
+                return 0
+            try:
+                self.write(items)
+            except Exception:
+                self._failed_attempts += 1
+                if self._failed_attempts < self.max_attempts:
+                    logger.warning('%s flush failed, %d items requeued', self.name, len(items), exc_info=True)
+                    with self._condition:
+                        self._pending[:0] = items
+                    return 0
+                logger.exception(
+                    '%s flush failed %d times, %d items dropped', self.name, self._failed_attempts, len(items)
+                )
+                self._failed_attempts = 0
+                return 0
+            self._failed_attempts = 0
+            return len(items)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                # After a failed flush wait out the interval before retrying
+                if (len(self._pending) < self.flush_size or self._failed_attempts) and not self._closed:
+                    self._condition.wait(self.flush_interval)
+                if self._closed:
+                    return
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+def update_session_summaries(messages):
+    """
+    Fold newly inserted messages into their sessions' message_count and
+    last-message fields with one UPDATE per session. Call it inside the
+    transaction that wrote the messages so the summary never drifts.
+    """
+    summaries = {}
+    for message in messages:
+        count, _ = summaries.get(message.session_id, (0, None))
+        summaries[message.session_id] = (count + 1, message)
+
+    for session_id, (count, last) in summaries.items():
+        ChatSession.objects.filter(id=session_id).update(
+            message_count=F('message_count') + count,
+            last_message_preview=last.content[:PREVIEW_LENGTH],
+            last_message_at=last.created_at,
+            updated_at=last.created_at
+        )
+
+
+def write_turn(messages, quick_actions):
+    """Persist one chat turn before its reply goes out: messages, their quick actions, session summary"""
+    with transaction.atomic():
+        ChatMessage.objects.bulk_create(messages)
+        QuickAction.objects.bulk_create(quick_actions)
+        update_session_summaries(messages)
+
+
+awrite_turn = sync_to_async(write_turn)
+
+
+def write_analytics(rows):
+    # A session deleted since its turn took the linked messages with it
+    linked = {row.message_id for row in rows if row.message_id}
+    if linked:
+        existing = set(ChatMessage.objects.filter(id__in=linked).values_list('id', flat=True))
+        for row in rows:
+            if row.message_id not in existing:
+                row.message = None
+    ChatAnalytics.objects.bulk_create(rows)
+
+
+chat_analytics = WriteBehindBuffer(write_analytics, 'chat-analytics-writer', flush_size=200, flush_interval=2.0, max_pending=2000)
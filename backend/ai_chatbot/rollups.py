@@ -0,0 +1,228 @@
+from datetime import timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+from .models import ChatAnalytics, ChatAnalyticsDaily, ChatAnalyticsHourly
+from .utils import LATENCY_BUCKETS, AnalyticsHelper
+
+ROLLUP_FIELDS = [
+    'count',
+    'response_time_sum',
+    'response_time_min',
+    'response_time_max',
+    'latency_histogram',
+    'satisfaction_count',
+    'satisfaction_sum',
+]
+# Rows are written behind the request path, so an hour stays open this long after it ends
+ROLLUP_SETTLE = timedelta(minutes=5)
+PRUNE_BATCH_SIZE = 1000
+
+
+def hour_start(moment):
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(moment):
+    return hour_start(moment).replace(hour=0)
+
+
+def rolled_through():
+    """
+    Start of the newest hourly bucket. Every hour before it is final; the
+    newest bucket itself is recomputed by the next run. None before the
+    first run.
+    """
+    return ChatAnalyticsHourly.objects.aggregate(latest=Max('bucket_start'))['latest']
+
+
+def rollup_chat_analytics(now=None):
+    """
+    Fold new ChatAnalytics rows into the hourly and daily rollups.
+
+    Only hours from the newest stored bucket onward are read: they come from
+    one GROUP BY TruncHour(created_at), query_type query and are written with
+    one bulk upsert, so a run costs the same however old the deployment is.
+    Daily rows for the touched days are then re-summed from their hourly
+    rows. Buckets are UTC. Returns (hourly rows, daily rows) written.
+    """
+    now = now or timezone.now()
+    latest = rolled_through()
+    start = hour_start(now - ROLLUP_SETTLE)
+    if latest is not None:
+        start = min(start, latest)
+    elif ChatAnalytics.objects.exists():
+        start = hour_start(ChatAnalytics.objects.order_by('created_at').values_list('created_at', flat=True).first())
+
+    rows = (
+        ChatAnalytics.objects.filter(created_at__gte=start, created_at__lte=now)
+        .annotate(hour=TruncHour('created_at', tzinfo=dt_timezone.utc))
+        .values('hour', 'query_type')
+        .annotate(
+            total=Count('id'),
+            response_time_sum=Sum('response_time'),
+            response_time_min=Min('response_time'),
+            response_time_max=Max('response_time'),
+            satisfaction_count=Count('satisfaction_score'),
+            satisfaction_sum=Sum('satisfaction_score'),
+            **AnalyticsHelper.histogram_aggregates()
+        )
+        .order_by()
+    )
+    hourly = [
+        ChatAnalyticsHourly(
+            bucket_start=row['hour'],
+            query_type=row['query_type'],
+            count=row['total'],
+            response_time_sum=row['response_time_sum'],
+            response_time_min=row['response_time_min'],
+            response_time_max=row['response_time_max'],
+            latency_histogram=[row[f'bucket_{index}'] for index in range(len(LATENCY_BUCKETS))],
+            satisfaction_count=row['satisfaction_count'],
+            satisfaction_sum=row['satisfaction_sum'] or 0,
+        )
+        for row in rows
+    ]
+
+    with transaction.atomic():
+        ChatAnalyticsHourly.objects.bulk_create(
+            hourly,
+            update_conflicts=True,
+            unique_fields=['bucket_start', 'query_type'],
+            update_fields=ROLLUP_FIELDS + ['updated_at'],
+        )
+        daily = _rollup_days(day_start(start))
+    return hourly, daily
+
+
+def merge_rollups(rows):
+    """Combine rollup rows of one query type into a single set of totals"""
+    totals = {
+        'count': 0,
+        'response_time_sum': 0.0,
+        'response_time_min': None,
+        'response_time_max': None,
+        'latency_histogram': [0] * len(LATENCY_BUCKETS),
+        'satisfaction_count': 0,
+        'satisfaction_sum': 0,
+    }
+    for row in rows:
+        totals['count'] += row.count
+        totals['response_time_sum'] += row.response_time_sum
+        totals['satisfaction_count'] += row.satisfaction_count
+        totals['satisfaction_sum'] += row.satisfaction_sum
+        if totals['response_time_min'] is None or row.response_time_min < totals['response_time_min']:
+            totals['response_time_min'] = row.response_time_min
+        if totals['response_time_max'] is None or row.response_time_max > totals['response_time_max']:
+            totals['response_time_max'] = row.response_time_max
+        for index, count in enumerate(row.latency_histogram):
+            totals['latency_histogram'][index] += count
+    return totals
+
+
+def _rollup_days(first_day):
+    days = {}
+    for row in ChatAnalyticsHourly.objects.filter(bucket_start__gte=first_day):
+        days.setdefault((day_start(row.bucket_start), row.query_type), []).append(row)
+    daily = [
+        ChatAnalyticsDaily(bucket_start=bucket_start, query_type=query_type, **merge_rollups(rows))
+        for (bucket_start, query_type), rows in days.items()
+    ]
+    ChatAnalyticsDaily.objects.bulk_create(
+        daily,
+        update_conflicts=True,
+        unique_fields=['bucket_start', 'query_type'],
+        update_fields=ROLLUP_FIELDS + ['updated_at'],
+    )
+    return daily
+
+
+def apply_feedback(analytics, previous_score):
+    """
+    Carry a satisfaction score set after its hour was rolled up into the
+    stored rollups. Hours that are still open pick it up on the next run.
+    """
+    latest = rolled_through()
+    if latest is None or analytics.created_at >= latest:
+        return
+    changes = {'satisfaction_sum': F('satisfaction_sum') + analytics.satisfaction_score - (previous_score or 0)}
+    if previous_score is None:
+        changes['satisfaction_count'] = F('satisfaction_count') + 1
+    ChatAnalyticsHourly.objects.filter(
+        bucket_start=hour_start(analytics.created_at), query_type=analytics.query_type
+    ).update(**changes)
+    ChatAnalyticsDaily.objects.filter(
+        bucket_start=day_start(analytics.created_at), query_type=analytics.query_type
+    ).update(**changes)
+
+
+def prune_chat_analytics(retention_days=None, batch_size=PRUNE_BATCH_SIZE):
+    """
+    Delete raw ChatAnalytics rows older than retention_days, in batches of
+    batch_size so no single statement holds locks for long. Rows that have
+    not been rolled up yet are never deleted. Returns the number removed.
+    """
+    if retention_days is None:
+        retention_days = settings.CHAT_ANALYTICS_RETENTION_DAYS
+    latest = rolled_through()
+    if latest is None:
+        return 0
+    cutoff = min(timezone.now() - timedelta(days=retention_days), latest)
+
+    deleted = 0
+    while True:
+        ids = list(
+            ChatAnalytics.objects.filter(created_at__lt=cutoff)
+            .order_by('created_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += ChatAnalytics.objects.filter(id__in=ids).delete()[0]
+
+
+def rollup_summary(granularity='daily', days=30):
+    """
+    Dashboard series read from the rollup tables only: per bucket, the totals
+    and latency percentiles for each query type.
+    """
+    model = ChatAnalyticsHourly if granularity == 'hourly' else ChatAnalyticsDaily
+    since = day_start(timezone.now()) - timedelta(days=days - 1)
+
+    buckets = {}
+    totals = {}
+    for row in model.objects.filter(bucket_start__gte=since).order_by('bucket_start', 'query_type'):
+        buckets.setdefault(row.bucket_start, []).append(_describe(row.query_type, merge_rollups([row])))
+        totals.setdefault(row.query_type, []).append(row)
+
+    return {
+        'granularity': granularity,
+        'period': f'{days} days',
+        'since': since.isoformat(),
+        'rolled_through': (rolled_through() or since).isoformat(),
+        'query_types': [
+            _describe(query_type, merge_rollups(rows)) for query_type, rows in totals.items()
+        ],
+        'buckets': [
+            {'bucket_start': bucket_start.isoformat(), 'query_types': query_types}
+            for bucket_start, query_types in buckets.items()
+        ],
+    }
+
+
+def _describe(query_type, totals):
+    percentile = AnalyticsHelper.approximate_percentile
+    histogram = totals['latency_histogram']
+    low, high = totals['response_time_min'], totals['response_time_max']
+    return {
+        'query_type': query_type,
+        'count': totals['count'],
+        'avg_response_time': totals['response_time_sum'] / totals['count'] if totals['count'] else 0,
+        'median_response_time': percentile(histogram, 0.5, low, high),
+        'p95_response_time': percentile(histogram, 0.95, low, high),
+        'avg_satisfaction': (
+            totals['satisfaction_sum'] / totals['satisfaction_count'] if totals['satisfaction_count'] else 0
+        ),
+    }
@@ -0,0 +1,290 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from django.conf import settings
+from django.db import close_old_connections
+
+PRIORITY_LEVELS = (1, 2, 3, 4, 5)
+WAIT_SAMPLES = 1000  # recent wait times kept per level for percentiles
+
+
+class SchedulerBusy(Exception):
+    """The queue is full, or the job was evicted for a higher priority one"""
+
+
+class _Job:
+    __slots__ = ('priority', 'enqueued_at', 'start', 'fail', 'cancelled')
+
+    def __init__(self, priority, start, fail):
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.start = start
+        self.fail = fail
+        self.cancelled = False
+
+
+class _LevelStats:
+    __slots__ = ('queued', 'running', 'submitted', 'started', 'completed', 'rejected', 'wait_total', 'waits')
+
+    def __init__(self):
+        self.queued = 0
+        self.running = 0
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.waits = deque(maxlen=WAIT_SAMPLES)
+
+
+def _fail(future, error):
+    if not future.done():
+        try:
+            future.set_exception(error)
+        except InvalidStateError:
+            pass  # cancelled meanwhile
+
+
+def percentile(samples, quantile):
+    """The quantile (0-1) of samples by nearest rank, 0 when there are none"""
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+
+class PriorityScheduler:
+    """
+    Runs at most `workers` jobs at once and queues the rest by priority
+    (1-5, 5 most urgent).
+
+    Queue order is arrival time minus priority * aging_interval, so a job
+    counts as having arrived aging_interval seconds earlier per level. An
+    urgent job overtakes lower levels, but a level-1 job that has waited
+    4 * aging_interval is served ahead of fresh level-5 work: nothing
+    starves, and a fresh level-5 job never waits behind more than that much
+    older backlog. aging_interval=0 is plain FIFO.
+
+    The queue holds at most max_queue jobs. When it is full, a new job evicts
+    the lower-priority job that would be served last, or is rejected with
+    SchedulerBusy if nothing ranks lower.
+
+    Sync callables run on the scheduler's worker threads (submit/run). Async
+    callers only wait for a slot and then run on their own event loop (arun,
+    or aslot to hold the slot across a stream).
+    """
+
+    def __init__(self, name='scheduler', workers=8, max_queue=500, aging_interval=1.0):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.aging_interval = aging_interval
+        self._lock = threading.Lock()
+        self._heap = []
+        self._sequence = itertools.count()
+        self._running = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._stats = {level: _LevelStats() for level in PRIORITY_LEVELS}
+
+    @staticmethod
+    def clamp(priority):
+        return min(max(int(priority), PRIORITY_LEVELS[0]), PRIORITY_LEVELS[-1])
+
+    def submit(self, priority, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) for a worker thread; returns a concurrent Future"""
+        future = Future()
+        job = _Job(self.clamp(priority), None, lambda error: _fail(future, error))
+        job.start = lambda: self._executor.submit(self._run_sync, job, future, fn, args, kwargs)
+        self._enqueue(job)
+        # A future cancelled while queued (run() timing out) gives up its place
+        future.add_done_callback(lambda done: done.cancelled() and self._discard(job))
+        return future
+
+    def run(self, priority, fn, *args, timeout=None, **kwargs):
+        """
+        submit() and wait for the result. A job still queued at timeout is
+        dropped and FutureTimeout raised; one that has already started is
+        waited for, so a caller told to retry never runs it twice.
+        """
+        future = self.submit(priority, fn, *args, **kwargs)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise
+            return future.result()
+
+    async def arun(self, priority, fn, *args, **kwargs):
+        """Wait for a slot, then await fn(*args, **kwargs) on the caller's event loop"""
+        async with self.aslot(priority):
+            return await fn(*args, **kwargs)
+
+    @asynccontextmanager
+    async def aslot(self, priority):
+        """Wait for a slot and hold it for the body of an async with block"""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def grant():
+            if not granted.done():
+                granted.set_result(None)
+            else:
+                self._release(job)  # the waiter was cancelled meanwhile
+
+        def refuse(error):
+            if not granted.done():
+                granted.set_exception(error)
+
+        def fail(error):
+            loop.call_soon_threadsafe(refuse, error)
+
+        job = _Job(self.clamp(priority), lambda: loop.call_soon_threadsafe(grant), fail)
+        self._enqueue(job)
+        try:
+            await granted
+        except asyncio.CancelledError:
+            if granted.done() and not granted.cancelled():
+                self._release(job)  # cancelled after the slot was granted
+            else:
+                self._discard(job)
+            raise
+        try:
+            yield
+        finally:
+            self._release(job)
+
+    def _run_sync(self, job, future, fn, args, kwargs):
+        try:
+            if not future.set_running_or_notify_cancel():
+                return
+            close_old_connections()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                close_old_connections()
+        finally:
+            self._release(job)
+
+    def _enqueue(self, job):
+        evicted = None
+        with self._lock:
+            stats = self._stats[job.priority]
+            stats.submitted += 1
+            if len(self._heap) >= self.max_queue:
+                evicted = self._evict_below(job.priority)
+                if evicted is None:
+                    stats.rejected += 1
+                    raise SchedulerBusy(f'{self.name} queue is full')
+            key = job.enqueued_at - job.priority * self.aging_interval
+            heapq.heappush(self._heap, (key, next(self._sequence), job))
+            stats.queued += 1
+            ready = self._dispatch()
+        if evicted is not None:
+            evicted.fail(SchedulerBusy(f'{self.name} queue is full'))
+        for ready_job in ready:
+            ready_job.start()
+
+    def _evict_below(self, priority):
+        """Drop the lower-priority job that would be served last; caller holds the lock"""
+        victim = None
+        for index, entry in enumerate(self._heap):
+            if entry[2].cancelled:
+                continue
+            if entry[2].priority < priority and (victim is None or entry[:2] > self._heap[victim][:2]):
+                victim = index
+        if victim is None:
+            return None
+        job = self._heap[victim][2]
+        index = victim
+        self._heap[index] = self._heap[-1]
+        self._heap.pop()
+        heapq.heapify(self._heap)
+        stats = self._stats[job.priority]
+        stats.queued -= 1
+        stats.rejected += 1
+        return job
+
+    def _discard(self, job):
+        """Drop a job whose caller stopped waiting; one already dispatched is left to finish"""
+        with self._lock:
+            job.cancelled = True
+            for index, entry in enumerate(self._heap):
+                if entry[2] is job:
+                    self._heap[index] = self._heap[-1]
+                    self._heap.pop()
+                    heapq.heapify(self._heap)
+                    self._stats[job.priority].queued -= 1
+                    break
+
+    def _dispatch(self):
+        """Pop jobs into free slots; caller holds the lock and starts them after releasing it"""
+        ready = []
+        now = time.monotonic()
+        while self._running < self.workers and self._heap:
+            _, _, job = heapq.heappop(self._heap)
+            stats = self._stats[job.priority]
+            stats.queued -= 1
+            if job.cancelled:
+                continue
+            wait = now - job.enqueued_at
+            stats.started += 1
+            stats.wait_total += wait
+            stats.waits.append(wait)
+            stats.running += 1
+            self._running += 1
+            ready.append(job)
+        return ready
+
+    def _release(self, job):
+        with self._lock:
+            stats = self._stats[job.priority]
+            stats.running -= 1
+            stats.completed += 1
+            self._running -= 1
+            ready = self._dispatch()
+        for ready_job in ready:
+            ready_job.start()
+
+    def metrics(self):
+        """Queue depth, throughput counters and wait times per priority level, for this process"""
+        with self._lock:
+            levels = {
+                level: {
+                    'queued': stats.queued,
+                    'running': stats.running,
+                    'submitted': stats.submitted,
+                    'completed': stats.completed,
+                    'rejected': stats.rejected,
+                    'avg_wait': stats.wait_total / stats.started if stats.started else 0,
+                    'p50_wait': percentile(stats.waits, 0.5),
+                    'p99_wait': percentile(stats.waits, 0.99),
+                }
+                for level, stats in self._stats.items()
+            }
+            running = self._running
+        return {
+            'workers': self.workers,
+            'running': running,
+            'queued': sum(level['queued'] for level in levels.values()),
+            'max_queue': self.max_queue,
+            'aging_interval': self.aging_interval,
+            'levels': levels,
+        }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+chat_scheduler = PriorityScheduler(
+    name='chat-worker',
+    workers=settings.CHAT_SCHEDULER_WORKERS,
+    max_queue=settings.CHAT_SCHEDULER_MAX_QUEUE,
+    aging_interval=settings.CHAT_SCHEDULER_AGING_INTERVAL,
+)
@@ -2,26 +2,37 @@ import json
 import time
 from typing import Dict, List, Any
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from drone_app.geo import anearest_drones, nearest_drones
+from drone_app.lookup import amatch_prefix, match_prefix
 from drone_app.models import Drone
+from drone_backend.pagination import paginate_keyset
+from .intents import INTENT_PATTERNS, intent_matcher
+from .metrics import alive_metrics, live_metrics
 from .models import ChatSession, ChatMessage, QuickAction, ChatAnalytics
+from .persistence import awrite_turn, chat_analytics, write_turn
+from .streaming import reply_generator
+from .utils import MessageProcessor
 
 User = get_user_model()
 
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 200
+SESSIONS_PAGE_SIZE = 50
+MAX_SESSIONS_PAGE_SIZE = 200
+
+# Intents whose replies quote live fleet figures from the metrics snapshot
+METRIC_INTENTS = {'drone_status', 'delivery_management', 'fleet_coordination', 'disaster_priority', 'analytics'}
+# Candidates listed when a drone id prefix in a chat message is ambiguous
+LOOKUP_REPLY_MATCHES = 5
+
 
 class ChatbotService:
     """Core AI Chatbot service for drone disaster management"""
     
     def __init__(self):
-        self.intent_patterns = {
-            'drone_status': ['drone', 'status', 'where', 'location', 'track'],
-            'delivery_management': ['delivery', 'order', 'package', 'eta', 'reschedule'],
-            'inventory': ['inventory', 'stock', 'supplies', 'low stock', 'supplier'],
-            'fleet_coordination': ['fleet', 'assign', 'nearest', 'reroute', 'coordinate'],
-            'disaster_priority': ['priority', 'critical', 'emergency', 'urgent', 'disaster'],
-            'analytics': ['report', 'analytics', 'stats', 'performance', 'data'],
-            'weather': ['weather', 'conditions', 'forecast', 'wind', 'rain'],
-            'communication': ['alert', 'notification', 'message', 'contact', 'support']
-        }
+        self.intent_patterns = INTENT_PATTERNS
 
     def process_message(self, user: User, message: str, session_id: str = None) -> Dict[str, Any]:
         """Process user message and generate AI response"""
@@ -30,43 +41,107 @@ class ChatbotService:
         # Get or create session
         session = self._get_or_create_session(user, session_id)
         
-        # Save user message
-        user_msg = ChatMessage.objects.create(
-            session=session,
-            message_type='user',
-            content=message
-        )
-        
         # Detect intent and generate response
         intent = self._detect_intent(message)
         response_data = self._generate_response(intent, message, user)
         
-        # Save bot response
-        bot_msg = ChatMessage.objects.create(
+        # The turn is stored before the reply refers to it; analytics are written behind
+        messages, quick_actions = self._build_turn(session, message, response_data)
+        write_turn(messages, quick_actions)
+        response_time = time.time() - start_time
+        chat_analytics.add([self._analytics(user, intent, response_time, messages[-1])])
+        
+        return self._reply(session, messages[-1], response_data)
+
+    async def aprocess_message(self, user: User, message: str, session_id: str = None,
+                               session: ChatSession = None) -> Dict[str, Any]:
+        """
+        Async process_message() for consumers running on the event loop. Pass
+        the session already held by the caller to skip the lookup; the reply
+        carries the session object under 'session' for the caller to keep.
+        """
+        start_time = time.time()
+        
+        if session is None or str(session.id) != str(session_id):
+            session = await self._aget_or_create_session(user, session_id)
+        
+        intent = self._detect_intent(message)
+        response_data = await self._agenerate_response(intent, message, user)
+        
+        messages, quick_actions = self._build_turn(session, message, response_data)
+        await awrite_turn(messages, quick_actions)
+        response_time = time.time() - start_time
+        await chat_analytics.aadd([self._analytics(user, intent, response_time, messages[-1])])
+        
+        reply = self._reply(session, messages[-1], response_data)
+        reply['session'] = session
+        return reply
+
+    async def astream_message(self, user: User, message: str, session_id: str = None,
+                              session: ChatSession = None):
+        """
+        Streaming aprocess_message(): yields ('delta', chunk) for each chunk of
+        the configured reply generator, then ('message', reply) with the full
+        reply and its session. The turn is written once, after the last chunk;
+        a stream closed early writes nothing.
+        """
+        start_time = time.time()
+        
+        if session is None or str(session.id) != str(session_id):
+            session = await self._aget_or_create_session(user, session_id)
+        
+        intent = self._detect_intent(message)
+        response_data = await self._agenerate_response(intent, message, user)
+        messages, quick_actions = self._build_turn(session, message, response_data)
+        bot_msg = messages[-1]
+        
+        chunks = []
+        async for text in reply_generator().stream(intent, message, user, response_data):
+            yield 'delta', {
+                'session_id': str(session.id),
+                'message_id': str(bot_msg.id),
+                'index': len(chunks),
+                'delta': text
+            }
+            chunks.append(text)
+        bot_msg.content = response_data['content'] = ''.join(chunks)
+        
+        await awrite_turn(messages, quick_actions)
+        response_time = time.time() - start_time
+        await chat_analytics.aadd([self._analytics(user, intent, response_time, bot_msg)])
+        
+        reply = self._reply(session, bot_msg, response_data)
+        reply['session'] = session
+        yield 'message', reply
+
+    def _analytics(self, user: User, intent: str, response_time: float, bot_msg: ChatMessage) -> ChatAnalytics:
+        """The turn's analytics row, stamped now rather than when the write-behind buffer flushes it"""
+        return ChatAnalytics(
+            user=user, message=bot_msg, query_type=intent, response_time=response_time, created_at=timezone.now()
+        )
+
+    def _build_turn(self, session: ChatSession, message: str, response_data: Dict[str, Any]):
+        """Unsaved rows for one turn; UUIDs are assigned up front so the reply can reference them"""
+        user_msg = ChatMessage(session=session, message_type='user', content=message)
+        bot_msg = ChatMessage(
             session=session,
             message_type='bot',
             content=response_data['content'],
             metadata=response_data.get('metadata', {})
         )
-        
-        # Add quick actions
-        for action in response_data.get('quick_actions', []):
-            QuickAction.objects.create(
+        quick_actions = [
+            QuickAction(
                 message=bot_msg,
                 action_type=action['type'],
                 label=action['label'],
                 icon=action['icon'],
                 data=action.get('data', {})
             )
-        
-        # Log analytics
-        response_time = time.time() - start_time
-        ChatAnalytics.objects.create(
-            user=user,
-            query_type=intent,
-            response_time=response_time
-        )
-        
+            for action in response_data.get('quick_actions', [])
+        ]
+        return [user_msg, bot_msg], quick_actions
+
+    def _reply(self, session: ChatSession, bot_msg: ChatMessage, response_data: Dict[str, Any]) -> Dict[str, Any]:
         return {
             'session_id': str(session.id),
             'message_id': str(bot_msg.id),
@@ -80,36 +155,46 @@ class ChatbotService:
         if session_id:
             try:
                 return ChatSession.objects.get(id=session_id, user=user, is_active=True)
-            except ChatSession.DoesNotExist:
+            except (ChatSession.DoesNotExist, ValidationError):
                 pass
         
         return ChatSession.objects.create(user=user)
 
+    async def _aget_or_create_session(self, user: User, session_id: str = None) -> ChatSession:
+        if session_id:
+            try:
+                return await ChatSession.objects.aget(id=session_id, user=user, is_active=True)
+            except (ChatSession.DoesNotExist, ValidationError):
+                pass
+        
+        return await ChatSession.objects.acreate(user=user)
+
     def _detect_intent(self, message: str) -> str:
         """Detect user intent from message"""
-        message_lower = message.lower()
-        
-        for intent, keywords in self.intent_patterns.items():
-            if any(keyword in message_lower for keyword in keywords):
-                return intent
-        
-        return 'general'
+        return intent_matcher.classify(message)
+
+    def detect_intents(self, messages: List[str]) -> List[str]:
+        """Detect intents for a batch of messages"""
+        return intent_matcher.classify_many(messages)
 
-    def _generate_response(self, intent: str, message: str, user: User) -> Dict[str, Any]:
+    def _generate_response(self, intent: str, message: str, user: User,
+                           metrics: Dict[str, Any] = None) -> Dict[str, Any]:
         """Generate AI response based on intent"""
+        if metrics is None and intent in METRIC_INTENTS:
+            metrics = live_metrics()
         
         if intent == 'drone_status':
-            return self._handle_drone_status(message, user)
+            return self._handle_drone_status(message, user, metrics)
         elif intent == 'delivery_management':
-            return self._handle_delivery_management(message, user)
+            return self._handle_delivery_management(message, user, metrics)
         elif intent == 'inventory':
             return self._handle_inventory(message, user)
         elif intent == 'fleet_coordination':
-            return self._handle_fleet_coordination(message, user)
+            return self._handle_fleet_coordination(message, user, metrics)
         elif intent == 'disaster_priority':
-            return self._handle_disaster_priority(message, user)
+            return self._handle_disaster_priority(message, user, metrics)
         elif intent == 'analytics':
-            return self._handle_analytics(message, user)
+            return self._handle_analytics(message, user, metrics)
         elif intent == 'weather':
             return self._handle_weather(message, user)
         elif intent == 'communication':
@@ -117,10 +202,32 @@ class ChatbotService:
         else:
             return self._handle_general(message, user)
 
-    def _handle_drone_status(self, message: str, user: User) -> Dict[str, Any]:
+    async def _agenerate_response(self, intent: str, message: str, user: User) -> Dict[str, Any]:
+        """_generate_response() with the metrics snapshot and nearest-drone search awaited"""
+        if intent == 'drone_status':
+            prefixes = MessageProcessor.extract_entities(message)['drone_prefixes']
+            if prefixes:
+                matches = await amatch_prefix(Drone.objects.all(), prefixes[0], limit=LOOKUP_REPLY_MATCHES)
+                return self._drone_lookup_response(prefixes[0], matches)
+        metrics = await alive_metrics() if intent in METRIC_INTENTS else None
+        if intent == 'fleet_coordination':
+            coordinates = MessageProcessor.extract_entities(message)['coordinates']
+            nearest = None
+            if coordinates:
+                latitude, longitude = coordinates[0]
+                active_drones = Drone.objects.filter(is_deleted=False, status='Active')
+                nearest = await anearest_drones(active_drones, latitude, longitude, k=1)
+            return self._fleet_coordination_response(metrics, nearest)
+        return self._generate_response(intent, message, user, metrics)
+
+    def _handle_drone_status(self, message: str, user: User, metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Handle drone status queries"""
-        drones = Drone.objects.filter(is_deleted=False)[:3]
+        prefixes = MessageProcessor.extract_entities(message)['drone_prefixes']
+        if prefixes:
+            matches = match_prefix(Drone.objects.all(), prefixes[0], limit=LOOKUP_REPLY_MATCHES)
+            return self._drone_lookup_response(prefixes[0], matches)
         
+        drones = metrics['drones']
         if not drones:
             return {
                 'content': "No active drones found in the system. Would you like me to help you add a new drone?",
@@ -132,8 +239,8 @@ class ChatbotService:
         
         status_text = "Current drone status:\n\n"
         for drone in drones:
-            status_text += f"🚁 {str(drone.id)[:8]}: {drone.status} - {drone.urgency_level} priority\n"
-            status_text += f"   Location: {drone.location_latitude}, {drone.location_longitude}\n\n"
+            status_text += f"🚁 {str(drone['id'])[:8]}: {drone['status']} - {drone['urgency_level']} priority\n"
+            status_text += f"   Location: {drone['location_latitude']}, {drone['location_longitude']}\n\n"
         
         return {
             'content': status_text,
@@ -142,13 +249,59 @@ class ChatbotService:
                 {'type': 'fleet_status', 'label': 'Fleet Details', 'icon': 'flight'},
                 {'type': 'emergency_alert', 'label': 'Emergency Return', 'icon': 'warning'}
             ],
-            'metadata': {'drone_count': len(drones)}
+            'metadata': {'drone_count': len(drones), 'metrics_refreshed_at': metrics['refreshed_at']}
         }
 
-    def _handle_delivery_management(self, message: str, user: User) -> Dict[str, Any]:
+    def _drone_lookup_response(self, prefix: str, matches) -> Dict[str, Any]:
+        """Reply to "where is drone 3fa2b1c4": matches are rows from match_prefix()"""
+        if not matches:
+            return {
+                'content': f"No drone id starts with {prefix}. Check the id in the fleet list and try again.",
+                'quick_actions': [
+                    {'type': 'view_reports', 'label': 'View Fleet', 'icon': 'flight'}
+                ],
+                'metadata': {'prefix': prefix, 'drone_count': 0}
+            }
+        
+        if len(matches) > 1:
+            listed = "\n".join(
+                f"🚁 {str(row['id'])[:13]}: {row['status']} - {row['urgency_level']} priority" for row in matches
+            )
+            return {
+                'content': f"Several drones start with {prefix}:\n\n{listed}\n\nWhich one do you mean? Give a few more characters of its id.",
+                'quick_actions': [
+                    {'type': 'view_reports', 'label': 'View Fleet', 'icon': 'flight'}
+                ],
+                'metadata': {'prefix': prefix, 'drone_count': len(matches)}
+            }
+        
+        drone = matches[0]
+        pilot = drone['assigned_pilot__username'] or 'unassigned'
+        return {
+            'content': (
+                f"🚁 {str(drone['id'])[:8]}: {drone['status']} - {drone['urgency_level']} priority\n"
+                f"   Location: {drone['location_latitude']}, {drone['location_longitude']}\n"
+                f"   Pilot: {pilot}"
+            ),
+            'quick_actions': [
+                {'type': 'track_drone', 'label': 'Live Tracking', 'icon': 'location_on', 'data': {'drone_id': str(drone['id'])}},
+                {'type': 'emergency_alert', 'label': 'Emergency Return', 'icon': 'warning', 'data': {'drone_id': str(drone['id'])}}
+            ],
+            'metadata': {'prefix': prefix, 'drone_count': 1, 'drone_id': str(drone['id'])}
+        }
+
+    def _handle_delivery_management(self, message: str, user: User, metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Handle delivery and order management"""
+        month = metrics['month']
         return {
-            'content': "I can help you manage deliveries and orders. Current active deliveries: 12 in progress, 3 pending assignment. Average ETA: 18 minutes. Would you like to create a new order or check existing deliveries?",
+            'content': (
+                f"I can help you manage deliveries and orders. This month: "
+                f"{month['successful_deliveries']} deliveries completed, "
+                f"{month['unsuccessful_deliveries']} unsuccessful. "
+                f"{metrics['counts']['active']} drones available for new orders. "
+                f"Average response time: {month['average_response_time']:g} minutes. "
+                f"Would you like to create a new order or check existing deliveries?"
+            ),
             'quick_actions': [
                 {'type': 'create_order', 'label': 'New Order', 'icon': 'add'},
                 {'type': 'track_drone', 'label': 'Track Deliveries', 'icon': 'local_shipping'},
@@ -167,10 +320,32 @@ class ChatbotService:
             ]
         }
 
-    def _handle_fleet_coordination(self, message: str, user: User) -> Dict[str, Any]:
+    def _handle_fleet_coordination(self, message: str, user: User, metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Handle fleet coordination"""
+        coordinates = MessageProcessor.extract_entities(message)['coordinates']
+        nearest = None
+        if coordinates:
+            latitude, longitude = coordinates[0]
+            active_drones = Drone.objects.filter(is_deleted=False, status='Active')
+            nearest = nearest_drones(active_drones, latitude, longitude, k=1)
+        return self._fleet_coordination_response(metrics, nearest)
+
+    def _fleet_coordination_response(self, metrics: Dict[str, Any], nearest) -> Dict[str, Any]:
+        """nearest is None when the message carried no coordinates"""
+        nearest_text = "Share coordinates (e.g. 28.6139, 77.2090) and I'll find the nearest available drone."
+        if nearest:
+            distance, row = nearest[0]
+            nearest_text = f"Nearest available drone is {str(row['id'])[:8]}, {distance:.1f}km from that location."
+        elif nearest is not None:
+            nearest_text = "No active drones are available near that location."
+        counts = metrics['counts']
+        
         return {
-            'content': "Fleet Coordination: 8 drones active, 2 in maintenance, 1 on standby. Nearest available drone is 2.3km from your location. I can assign drones based on proximity and urgency. What's your coordination need?",
+            'content': (
+                f"Fleet Coordination: {counts['active']} drones active, {counts['maintenance']} in maintenance, "
+                f"{counts['inactive']} inactive. {nearest_text} I can assign drones based on proximity and urgency. "
+                f"What's your coordination need?"
+            ),
             'quick_actions': [
                 {'type': 'fleet_status', 'label': 'Fleet Overview', 'icon': 'flight'},
                 {'type': 'track_drone', 'label': 'Assign Nearest', 'icon': 'near_me'},
@@ -178,10 +353,16 @@ class ChatbotService:
             ]
         }
 
-    def _handle_disaster_priority(self, message: str, user: User) -> Dict[str, Any]:
+    def _handle_disaster_priority(self, message: str, user: User, metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Handle disaster zone prioritization"""
+        urgency = metrics['counts']['urgency_distribution']
         return {
-            'content': "Disaster Zone Priority System Active: 3 critical zones identified, 5 high-priority areas monitored. Current response time: 12 minutes average. Emergency protocols are ready for deployment. How can I assist with prioritization?",
+            'content': (
+                f"Disaster Zone Priority System Active: {urgency.get('Critical', 0)} critical and "
+                f"{urgency.get('High', 0)} high-priority requests open. Current response time: "
+                f"{metrics['month']['average_response_time']:g} minutes average. Emergency protocols are ready "
+                f"for deployment. How can I assist with prioritization?"
+            ),
             'quick_actions': [
                 {'type': 'emergency_alert', 'label': 'Priority Zones', 'icon': 'priority_high'},
                 {'type': 'track_drone', 'label': 'Optimal Routes', 'icon': 'route'},
@@ -189,10 +370,17 @@ class ChatbotService:
             ]
         }
 
-    def _handle_analytics(self, message: str, user: User) -> Dict[str, Any]:
+    def _handle_analytics(self, message: str, user: User, metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Handle analytics and reporting"""
+        month = metrics['month']
+        counts = metrics['counts']
         return {
-            'content': "Analytics Summary: This week - 156 successful deliveries (94% success rate), 23% improvement in response time, 12 drones deployed. Cost efficiency up 18%. Would you like detailed reports or specific metrics?",
+            'content': (
+                f"Analytics Summary: This month - {month['successful_deliveries']} successful deliveries "
+                f"({month['success_rate']:g}% success rate), average response time "
+                f"{month['average_response_time']:g} minutes, {counts['active']} of {counts['total']} drones "
+                f"deployed. Would you like detailed reports or specific metrics?"
+            ),
             'quick_actions': [
                 {'type': 'view_reports', 'label': 'Detailed Reports', 'icon': 'assessment'},
                 {'type': 'view_reports', 'label': 'Export Data', 'icon': 'download'},
@@ -234,42 +422,56 @@ class ChatbotService:
             ]
         }
 
-    def get_chat_history(self, user: User, session_id: str) -> List[Dict[str, Any]]:
-        """Get chat history for a session"""
-        try:
-            session = ChatSession.objects.get(id=session_id, user=user)
-            messages = session.messages.all()
+    def get_chat_history(self, user: User, session_id: str, cursor: str = None,
+                         limit: int = HISTORY_PAGE_SIZE):
+        """
+        One page of a session's history as (messages, next_cursor).
+
+        Pages walk backwards from the newest message on (created_at, id);
+        messages within a page are returned oldest first for display, and
+        next_cursor loads the page of older messages. Quick actions are
+        prefetched, so every page costs the same three queries however long
+        the session is. Raises InvalidCursor for a malformed cursor.
+        """
+        if not ChatSession.objects.filter(id=session_id, user=user).exists():
+            return [], None
+        
+        messages = ChatMessage.objects.filter(session_id=session_id).prefetch_related('quick_actions')
+        page, next_cursor = paginate_keyset(messages, cursor, limit)
+        
+        history = []
+        for msg in reversed(page):
+            message_data = {
+                'id': str(msg.id),
+                'type': msg.message_type,
+                'content': msg.content,
+                'timestamp': msg.created_at.isoformat(),
+                'metadata': msg.metadata
+            }
             
-            history = []
-            for msg in messages:
-                message_data = {
-                    'id': str(msg.id),
-                    'type': msg.message_type,
-                    'content': msg.content,
-                    'timestamp': msg.created_at.isoformat(),
-                    'metadata': msg.metadata
-                }
-                
-                if msg.message_type == 'bot':
-                    message_data['quick_actions'] = [
-                        {
-                            'type': qa.action_type,
-                            'label': qa.label,
-                            'icon': qa.icon,
-                            'data': qa.data
-                        }
-                        for qa in msg.quick_actions.all()
-                    ]
-                
-                history.append(message_data)
+            if msg.message_type == 'bot':
+                message_data['quick_actions'] = [
+                    {
+                        'type': qa.action_type,
+                        'label': qa.label,
+                        'icon': qa.icon,
+                        'data': qa.data
+                    }
+                    for qa in msg.quick_actions.all()
+                ]
             
-            return history
-        except ChatSession.DoesNotExist:
-            return []
+            history.append(message_data)
+        
+        return history, next_cursor
 
-    def get_user_sessions(self, user: User) -> List[Dict[str, Any]]:
-        """Get all chat sessions for a user"""
+    def get_user_sessions(self, user: User, cursor: str = None, limit: int = SESSIONS_PAGE_SIZE):
+        """
+        One page of the user's active sessions as (sessions, next_cursor),
+        most recently active first. Counts and previews come from the
+        denormalized summary fields, so a page is a single indexed query.
+        """
         sessions = ChatSession.objects.filter(user=user, is_active=True)
+        page, next_cursor = paginate_keyset(sessions, cursor, limit, field='updated_at')
         
         return [
             {
@@ -277,7 +479,13 @@ class ChatbotService:
                 'title': session.title,
                 'created_at': session.created_at.isoformat(),
                 'updated_at': session.updated_at.isoformat(),
-                'message_count': session.messages.count()
+                'message_count': session.message_count,
+                'last_message_preview': session.last_message_preview,
+                'last_message_at': session.last_message_at.isoformat() if session.last_message_at else None
             }
-            for session in sessions
-        ]
\ No newline at end of file
+            for session in page
+        ], next_cursor
+
+
+# The service holds no per-request state, so one instance is shared by views and consumers
+chatbot_service = ChatbotService()
@@ -0,0 +1,81 @@
+import asyncio
+import re
+from functools import lru_cache
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.renderers import BaseRenderer
+from .outbound import encode_frame
+
+# Boundaries between a whitespace run and the next word, so chunks join back exactly
+WORD_BOUNDARY = re.compile(r'(?<=\s)(?=\S)')
+
+
+def split_chunks(content, words):
+    """Split content into chunks of `words` words, trailing whitespace included"""
+    tokens = WORD_BOUNDARY.split(content)
+    return [''.join(tokens[index:index + words]) for index in range(0, len(tokens), words)]
+
+
+class ReplyGenerator:
+    """
+    Produces the text of a streamed bot reply. stream() gets the detected
+    intent, the user's message and the templated reply built by the
+    ChatbotService handlers (content, quick_actions, metadata) and yields
+    text chunks; their concatenation is the stored message. A model-backed
+    generator can use the templated reply as grounding and yield tokens.
+    The base class yields the templated reply in one chunk.
+    """
+
+    async def stream(self, intent, message, user, reply):
+        yield reply['content']
+
+
+class TemplateReplyGenerator(ReplyGenerator):
+    """Streams the templated reply as is, a few words per chunk"""
+    chunk_words = 4
+
+    async def stream(self, intent, message, user, reply):
+        for chunk in split_chunks(reply['content'], self.chunk_words):
+            yield chunk
+
+
+class StubModelGenerator(TemplateReplyGenerator):
+    """
+    Local stand-in for a model-backed generator: the templated reply, after
+    first_token_delay seconds and then chunk_delay seconds per chunk.
+    """
+    first_token_delay = 0.3
+    chunk_delay = 0.03
+
+    async def stream(self, intent, message, user, reply):
+        await asyncio.sleep(self.first_token_delay)
+        first = True
+        async for chunk in super().stream(intent, message, user, reply):
+            if not first:
+                await asyncio.sleep(self.chunk_delay)
+            first = False
+            yield chunk
+
+
+@lru_cache(maxsize=None)
+def _load(path):
+    return import_string(path)()
+
+
+def reply_generator():
+    """The generator named by CHAT_REPLY_GENERATOR, one instance per process"""
+    return _load(settings.CHAT_REPLY_GENERATOR)
+
+
+def sse_event(event, data):
+    """One server-sent event with a JSON payload"""
+    return b'event: %s\ndata: %s\n\n' % (event.encode(), encode_frame(data))
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Accepts clients that ask for text/event-stream; error responses become one error event"""
+    media_type = 'text/event-stream'
+    format = 'sse'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event('error', data)
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .intents import IntentMatcher, intent_matcher, surface_forms
+from .models import ChatAnalytics, ChatAnalyticsDaily, ChatAnalyticsHourly, ChatMessage, ChatSession
+from .outbound import CLOSE_TRY_AGAIN_LATER, OutboundPipeline
+from .rollups import hour_start, rollup_chat_analytics
+from .scheduler import PriorityScheduler, SchedulerBusy
+
+
+class IntentMatcherTests(SimpleTestCase):
+    def test_surface_forms(self):
+        self.assertLessEqual(
+            {'coordinates', 'coordinating', 'coordinated', 'coordination'}, set(surface_forms('coordinate'))
+        )
+        self.assertIn('deliveries', surface_forms('delivery'))
+        self.assertIn('tracking', surface_forms('track'))
+
+    def test_inflected_keywords_match(self):
+        for message, intent in (
+            ('Open tracking view', 'drone_status'),
+            ('Is it raining?', 'weather'),
+            ('Need better coordination between the two teams', 'fleet_coordination'),
+            ('Give me an update on the deliveries', 'delivery_management'),
+        ):
+            with self.subTest(message=message):
+                self.assertEqual(intent_matcher.classify(message), intent)
+
+    def test_whole_words_only(self):
+        self.assertEqual(intent_matcher.classify('metadata for the last sync'), 'general')
+        self.assertEqual(intent_matcher.classify('beta testers feedback'), 'general')
+
+    def test_phrases_win_over_their_words_and_ties_go_to_the_first_intent(self):
+        matcher = IntentMatcher({'first': ['low'], 'second': ['low stock'], 'third': ['stock']})
+        self.assertEqual(matcher.scores('low stock please'), {'second': 1})
+        self.assertEqual(matcher.classify('low and stock'), 'first')
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='analyst', email='analyst@example.com', password='pw')
+        self.session = ChatSession.objects.create(user=self.user)
+        self.now = timezone.now()
+
+    def turn(self, hours_ago, query_type='weather', response_time=0.2):
+        message = ChatMessage.objects.create(session=self.session, message_type='bot', content='reply')
+        ChatAnalytics.objects.create(
+            user=self.user, message=message, query_type=query_type, response_time=response_time,
+            created_at=self.now - timedelta(hours=hours_ago)
+        )
+        return message
+
+    def hourly(self, hours_ago, query_type='weather'):
+        return ChatAnalyticsHourly.objects.get(
+            bucket_start=hour_start(self.now - timedelta(hours=hours_ago)), query_type=query_type
+        )
+
+    def test_rows_fold_into_hourly_and_daily_buckets(self):
+        self.turn(3, response_time=0.1)
+        self.turn(3, response_time=0.3)
+        self.turn(2, query_type='inventory')
+        rollup_chat_analytics(self.now)
+        self.assertEqual(self.hourly(3).count, 2)
+        self.assertAlmostEqual(self.hourly(3).response_time_sum, 0.4)
+        self.assertEqual(self.hourly(2, 'inventory').count, 1)
+        self.assertEqual(
+            sum(ChatAnalyticsDaily.objects.values_list('count', flat=True)),
+            ChatAnalytics.objects.count()
+        )
+        # A second run over the same hours rewrites instead of adding up
+        rollup_chat_analytics(self.now)
+        self.assertEqual(self.hourly(3).count, 2)
+
+    def test_feedback_lands_in_the_rated_turns_bucket(self):
+        rated = self.turn(3)
+        self.turn(2)
+        rollup_chat_analytics(self.now)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for rating in (4, 2):
+            response = client.post(
+                '/api/chatbot/feedback/', {'message_id': str(rated.id), 'rating': rating}, format='json'
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(ChatAnalytics.objects.get(message=rated).satisfaction_score, 2)
+        self.assertEqual((self.hourly(3).satisfaction_count, self.hourly(3).satisfaction_sum), (1, 2))
+        self.assertEqual((self.hourly(2).satisfaction_count, self.hourly(2).satisfaction_sum), (0, 0))
+
+    def test_feedback_on_another_users_message_is_404(self):
+        rated = self.turn(1)
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username='other', email='other@example.com', password='pw'))
+        response = client.post('/api/chatbot/feedback/', {'message_id': str(rated.id), 'rating': 5}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+class PrioritySchedulerTests(SimpleTestCase):
+    def setUp(self):
+        self.scheduler = PriorityScheduler(name='test-worker', workers=1, max_queue=2, aging_interval=0.05)
+        self.gate = threading.Event()
+        self.order = []
+        # Occupy the only worker so later jobs queue up
+        self.blocker = self.scheduler.submit(3, self.gate.wait, 5)
+
+    def tearDown(self):
+        self.gate.set()
+        self.scheduler.shutdown()
+
+    def job(self, name):
+        return lambda: self.order.append(name)
+
+    def test_urgent_jobs_overtake_fresh_routine_ones(self):
+        routine = self.scheduler.submit(1, self.job('routine'))
+        urgent = self.scheduler.submit(5, self.job('urgent'))
+        self.gate.set()
+        routine.result(5)
+        urgent.result(5)
+        self.assertEqual(self.order, ['urgent', 'routine'])
+
+    def test_waiting_jobs_age_ahead_of_new_urgent_ones(self):
+        routine = self.scheduler.submit(1, self.job('routine'))
+        time.sleep(0.25)  # longer than 4 levels of aging_interval
+        urgent = self.scheduler.submit(5, self.job('urgent'))
+        self.gate.set()
+        routine.result(5)
+        urgent.result(5)
+        self.assertEqual(self.order, ['routine', 'urgent'])
+
+    def test_full_queue_evicts_lower_priority_work(self):
+        low = self.scheduler.submit(1, self.job('low'))
+        self.scheduler.submit(3, self.job('normal'))
+        self.scheduler.submit(5, self.job('urgent'))
+        with self.assertRaises(SchedulerBusy):
+            low.result(5)
+        with self.assertRaises(SchedulerBusy):
+            self.scheduler.submit(1, self.job('late'))
+
+    def test_run_drops_jobs_that_never_started(self):
+        with self.assertRaises(FutureTimeout):
+            self.scheduler.run(5, self.job('timed out'), timeout=0.05)
+        self.assertEqual(self.scheduler.metrics()['queued'], 0)
+        self.gate.set()
+        self.blocker.result(5)
+        self.assertEqual(self.scheduler.run(5, lambda: 'next', timeout=5), 'next')
+        self.assertEqual(self.order, [])
+
+    def test_run_waits_for_jobs_that_already_started(self):
+        self.gate.set()
+        self.blocker.result(5)
+        self.assertEqual(self.scheduler.run(3, lambda: time.sleep(0.2) or 'done', timeout=0.05), 'done')
+
+
+class OutboundPipelineTests(SimpleTestCase):
+    def pipeline(self, limit=10, policy='drop'):
+        self.sent = []
+        self.closed = []
+
+        async def send(text_data):
+            self.sent.append(json.loads(text_data))
+
+        async def close(code):
+            self.closed.append(code)
+
+        pipeline = OutboundPipeline(send, close, limit=limit, policy=policy)
+        pipeline.start()
+        return pipeline
+
+    async def test_frames_of_one_tick_leave_as_one_batch(self):
+        pipeline = self.pipeline()
+        pipeline.push({'type': 'system_message', 'message': 'a'})
+        await asyncio.sleep(0)
+        pipeline.push({'type': 'bot_message', 'content': 'b'})
+        pipeline.push({'type': 'bot_message', 'content': 'c'})
+        await asyncio.sleep(0.01)
+        await pipeline.stop()
+        self.assertEqual(self.sent[0], {'type': 'system_message', 'message': 'a'})
+        self.assertEqual([frame['content'] for frame in self.sent[1]['frames']], ['b', 'c'])
+        self.assertEqual(len(self.sent), 2)
+
+    async def test_typing_off_cancels_a_queued_typing_on(self):
+        pipeline = self.pipeline()
+        pipeline.push({'type': 'bot_typing', 'is_typing': True})
+        pipeline.push({'type': 'bot_message', 'content': 'hi'})
+        pipeline.push({'type': 'bot_typing', 'is_typing': False})
+        await asyncio.sleep(0.01)
+        await pipeline.stop()
+        self.assertEqual(self.sent, [{'type': 'bot_message', 'content': 'hi'}])
+
+    async def test_overflow_sheds_typing_then_applies_the_policy(self):
+        pipeline = self.pipeline(limit=2, policy='drop')
+        pipeline.push({'type': 'user_typing', 'is_typing': True})
+        pipeline.push({'type': 'bot_message', 'content': '1'})
+        pipeline.push({'type': 'bot_message', 'content': '2'})
+        pipeline.push({'type': 'bot_message', 'content': '3'})
+        await asyncio.sleep(0.01)
+        await pipeline.stop()
+        self.assertEqual([frame['content'] for frame in self.sent[0]['frames']], ['2', '3'])
+
+    async def test_close_policy_closes_with_try_again_later(self):
+        pipeline = self.pipeline(limit=1, policy='close')
+        pipeline.push({'type': 'bot_message', 'content': '1'})
+        pipeline.push({'type': 'bot_message', 'content': '2'})
+        await asyncio.sleep(0.01)
+        await pipeline.stop()
+        self.assertEqual(self.sent, [])
+        self.assertEqual(self.closed, [CLOSE_TRY_AGAIN_LATER])
@@ -5,9 +5,15 @@ app_name = 'ai_chatbot'
 
 urlpatterns = [
     path('chat/', views.chat_message, name='chat_message'),
+    path('chat/stream/', views.chat_stream, name='chat_stream'),
+    path('classify/', views.classify_messages, name='classify_messages'),
     path('history/<uuid:session_id>/', views.chat_history, name='chat_history'),
     path('sessions/', views.user_sessions, name='user_sessions'),
     path('quick-action/', views.quick_action, name='quick_action'),
     path('voice-to-text/', views.voice_to_text, name='voice_to_text'),
     path('feedback/', views.feedback, name='feedback'),
+    path('analytics/usage/', views.usage_report, name='usage_report'),
+    path('analytics/usage/org/', views.org_usage_report, name='org_usage_report'),
+    path('analytics/rollups/', views.analytics_rollups, name='analytics_rollups'),
+    path('scheduler/', views.scheduler_metrics, name='scheduler_metrics'),
 ]
\ No newline at end of file
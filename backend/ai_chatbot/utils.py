@@ -2,8 +2,12 @@ import re
 import json
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
+from django.db.models import Avg, Count, Max, Min, Q
 from django.utils import timezone
 
+# Upper bounds (seconds) of the chatbot response-time histogram buckets
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf')]
+
 
 class MessageProcessor:
     """Utility class for processing and analyzing messages"""
@@ -13,15 +17,25 @@ class MessageProcessor:
         """Extract entities like drone IDs, locations, etc. from message"""
         entities = {
             'drone_ids': [],
+            'drone_prefixes': [],
             'locations': [],
             'urgency_levels': [],
-            'numbers': []
+            'numbers': [],
+            'coordinates': []
         }
         
         # Extract drone IDs (pattern: DRONE-XXX or similar)
         drone_pattern = r'\b(?:drone|DRONE)[-_]?([A-Z0-9]+)\b'
         entities['drone_ids'] = re.findall(drone_pattern, message, re.IGNORECASE)
         
+        # Extract drone id prefixes as shown in replies (3fa2b1c4), up to a full UUID;
+        # a hex run counts if it mixes digits and letters or is the 8-digit display form
+        prefix_pattern = r'\b[0-9a-f]{4,32}(?:-[0-9a-f]{1,12}){0,4}\b'
+        entities['drone_prefixes'] = [
+            token.lower().replace('-', '') for token in re.findall(prefix_pattern, message, re.IGNORECASE)
+            if len(token) == 8 or (re.search(r'\d', token) and re.search(r'[a-f]', token, re.IGNORECASE))
+        ]
+        
         # Extract urgency levels
         urgency_pattern = r'\b(critical|high|medium|low|urgent|emergency)\b'
         entities['urgency_levels'] = re.findall(urgency_pattern, message, re.IGNORECASE)
@@ -30,6 +44,13 @@ class MessageProcessor:
         number_pattern = r'\b\d+(?:\.\d+)?\b'
         entities['numbers'] = re.findall(number_pattern, message)
         
+        # Extract coordinate pairs (pattern: 28.6139, 77.2090)
+        coordinate_pattern = r'(-?\d{1,2}\.\d+)\s*,\s*(-?\d{1,3}\.\d+)'
+        entities['coordinates'] = [
+            (float(lat), float(lng)) for lat, lng in re.findall(coordinate_pattern, message)
+            if -90 <= float(lat) <= 90 and -180 <= float(lng) <= 180
+        ]
+        
         # Extract location-like terms
         location_pattern = r'\b(?:zone|area|sector|region|camp|station)\s+([A-Z0-9]+)\b'
         entities['locations'] = re.findall(location_pattern, message, re.IGNORECASE)
@@ -128,36 +149,136 @@ class AnalyticsHelper:
                      (sorted_times[n // 2 - 1] + sorted_times[n // 2]) / 2
         }
 
+    @staticmethod
+    def histogram_aggregates(field: str = 'response_time') -> Dict[str, Any]:
+        """Conditional counts of rows per latency bucket, for use in aggregate()/annotate()"""
+        aggregates = {}
+        lower = None
+        for index, upper in enumerate(LATENCY_BUCKETS):
+            bucket = Q(**{f'{field}__lt': upper}) if upper != float('inf') else Q()
+            if lower is not None:
+                bucket &= Q(**{f'{field}__gte': lower})
+            aggregates[f'bucket_{index}'] = Count('id', filter=bucket)
+            lower = upper
+        return aggregates
+
+    @staticmethod
+    def approximate_percentile(buckets: List[int], quantile: float, low: float, high: float) -> float:
+        """
+        Estimate a percentile from latency bucket counts by interpolating
+        linearly inside the bucket that holds it, clamped to the observed
+        min and max.
+        """
+        total = sum(buckets)
+        if not total:
+            return 0
+        rank = quantile * total
+        seen = 0
+        lower = 0.0
+        for count, upper in zip(buckets, LATENCY_BUCKETS):
+            if count and seen + count >= rank:
+                lower, upper = max(lower, low), min(upper, high)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return high
+
+    @staticmethod
+    def _response_metrics(row: Dict[str, Any]) -> Dict[str, float]:
+        buckets = [row[f'bucket_{index}'] for index in range(len(LATENCY_BUCKETS))]
+        if not row['total']:
+            return {'avg': 0, 'min': 0, 'max': 0, 'median': 0, 'p95': 0}
+        percentile = AnalyticsHelper.approximate_percentile
+        return {
+            'avg': row['avg'],
+            'min': row['min'],
+            'max': row['max'],
+            'median': percentile(buckets, 0.5, row['min'], row['max']),
+            'p95': percentile(buckets, 0.95, row['min'], row['max']),
+        }
+
+    @staticmethod
+    def _usage_aggregates() -> Dict[str, Any]:
+        return {
+            'total': Count('id'),
+            'avg': Avg('response_time'),
+            'min': Min('response_time'),
+            'max': Max('response_time'),
+            'avg_satisfaction': Avg('satisfaction_score'),
+            **AnalyticsHelper.histogram_aggregates(),
+        }
+
     @staticmethod
     def generate_usage_report(user_id: int, days: int = 7) -> Dict[str, Any]:
-        """Generate usage report for a user"""
+        """
+        Generate usage report for a user. Response-time stats are aggregated
+        in the database; median and p95 are approximated from a latency
+        histogram computed in the same query.
+        """
         from .models import ChatAnalytics, ChatSession
         
         end_date = timezone.now()
         start_date = end_date - timedelta(days=days)
         
-        # Get analytics data
         analytics = ChatAnalytics.objects.filter(
             user_id=user_id,
             created_at__range=[start_date, end_date]
         )
+        row = analytics.aggregate(**AnalyticsHelper._usage_aggregates())
         
-        # Get session data
-        sessions = ChatSession.objects.filter(
+        total_sessions = ChatSession.objects.filter(
             user_id=user_id,
             created_at__range=[start_date, end_date]
+        ).count()
+        
+        return {
+            'period': f'{days} days',
+            'total_queries': row['total'],
+            'total_sessions': total_sessions,
+            'avg_satisfaction': row['avg_satisfaction'] or 0,
+            'response_metrics': AnalyticsHelper._response_metrics(row),
+            'most_common_queries': AnalyticsHelper.most_common_queries(analytics)
+        }
+
+    @staticmethod
+    def most_common_queries(analytics, limit: int = 5) -> List[Dict[str, Any]]:
+        return list(
+            analytics.values('query_type')
+            .annotate(count=Count('id'))
+            .order_by('-count', 'query_type')[:limit]
         )
+
+    @staticmethod
+    def generate_org_usage_report(days: int = 7) -> Dict[str, Any]:
+        """Usage report for every user at once: one GROUP BY user query plus the query-type ranking"""
+        from .models import ChatAnalytics
+        
+        end_date = timezone.now()
+        start_date = end_date - timedelta(days=days)
+        analytics = ChatAnalytics.objects.filter(created_at__range=[start_date, end_date])
         
-        response_times = [a.response_time for a in analytics]
-        satisfaction_scores = [a.satisfaction_score for a in analytics if a.satisfaction_score]
+        rows = (
+            analytics.values('user_id', 'user__username')
+            .annotate(**AnalyticsHelper._usage_aggregates())
+            .order_by('-total')
+        )
+        users = [
+            {
+                'user_id': row['user_id'],
+                'username': row['user__username'],
+                'total_queries': row['total'],
+                'avg_satisfaction': row['avg_satisfaction'] or 0,
+                'response_metrics': AnalyticsHelper._response_metrics(row),
+            }
+            for row in rows
+        ]
         
         return {
             'period': f'{days} days',
-            'total_queries': analytics.count(),
-            'total_sessions': sessions.count(),
-            'avg_satisfaction': sum(satisfaction_scores) / len(satisfaction_scores) if satisfaction_scores else 0,
-            'response_metrics': AnalyticsHelper.calculate_response_metrics(response_times),
-            'most_common_queries': list(analytics.values_list('query_type', flat=True)[:5])
+            'total_queries': sum(user['total_queries'] for user in users),
+            'active_users': len(users),
+            'users': users,
+            'most_common_queries': AnalyticsHelper.most_common_queries(analytics)
         }
 
 
@@ -1,14 +1,27 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from concurrent.futures import TimeoutError as FutureTimeout
 import json
 
-from .services import ChatbotService
+from drone_backend.pagination import parse_page_size
+from .services import (
+    HISTORY_PAGE_SIZE, MAX_HISTORY_PAGE_SIZE, MAX_SESSIONS_PAGE_SIZE, SESSIONS_PAGE_SIZE, chatbot_service
+)
 from .models import ChatSession, ChatMessage
+from .persistence import chat_analytics, update_session_summaries
+from .rollups import apply_feedback, rollup_summary
+from .scheduler import SchedulerBusy, chat_scheduler
+from .streaming import EventStreamRenderer, sse_event
+from .utils import AnalyticsHelper, MessageProcessor
 
 
 @api_view(['POST'])
@@ -26,15 +39,25 @@ def chat_message(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        chatbot_service = ChatbotService()
-        response_data = chatbot_service.process_message(
+        # Urgent messages are served first while the chat workers are saturated
+        response_data = chat_scheduler.run(
+            MessageProcessor.calculate_response_priority(message),
+            chatbot_service.process_message,
             user=request.user,
             message=message,
-            session_id=session_id
+            session_id=session_id,
+            timeout=settings.CHAT_SCHEDULER_TIMEOUT
         )
         
         return Response(response_data, status=status.HTTP_200_OK)
         
+    except (SchedulerBusy, FutureTimeout):
+        # Only raised for turns that never started, so a retry cannot duplicate one
+        return Response(
+            {'error': 'Chatbot is busy, please retry shortly'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': '5'}
+        )
     except json.JSONDecodeError:
         return Response(
             {'error': 'Invalid JSON format'}, 
@@ -47,19 +70,99 @@ def chat_message(request):
         )
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def chat_stream(request):
+    """Chat message answered as server-sent events: delta events, then the full message"""
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return Response(
+            {'error': 'Invalid JSON format'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    message = data.get('message', '').strip()
+    if not message:
+        return Response(
+            {'error': 'Message cannot be empty'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    response = StreamingHttpResponse(
+        _reply_events(request.user, message, data.get('session_id')),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # keep proxies from buffering the stream
+    return response
+
+
+async def _reply_events(user, message, session_id):
+    """The reply stream of one chat turn, holding a scheduler slot while it runs"""
+    try:
+        async with chat_scheduler.aslot(MessageProcessor.calculate_response_priority(message)):
+            async for event, payload in chatbot_service.astream_message(user, message, session_id):
+                payload.pop('session', None)
+                yield sse_event(event, payload)
+    except SchedulerBusy:
+        yield sse_event('error', {'error': 'Chatbot is busy, please retry shortly'})
+    except Exception as e:
+        yield sse_event('error', {'error': str(e)})
+
+
+MAX_CLASSIFY_MESSAGES = 1000
+MAX_REPORT_DAYS = 366
+MAX_HOURLY_REPORT_DAYS = 31
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def classify_messages(request):
+    """Detect intents for a batch of messages without creating chat history"""
+    messages = request.data.get('messages')
+    if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+        return Response(
+            {'error': 'messages must be a list of strings'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(messages) > MAX_CLASSIFY_MESSAGES:
+        return Response(
+            {'error': f'At most {MAX_CLASSIFY_MESSAGES} messages per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    intents = chatbot_service.detect_intents(messages)
+    return Response({
+        'count': len(intents),
+        'intents': intents
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def chat_history(request, session_id):
-    """Get chat history for a session"""
+    """Get chat history for a session, newest page first; pass next_cursor as cursor to load older messages"""
     try:
-        chatbot_service = ChatbotService()
-        history = chatbot_service.get_chat_history(request.user, session_id)
+        limit = parse_page_size(
+            request.GET.get('limit'), default=HISTORY_PAGE_SIZE, maximum=MAX_HISTORY_PAGE_SIZE
+        )
+        history, next_cursor = chatbot_service.get_chat_history(
+            request.user, session_id, cursor=request.GET.get('cursor'), limit=limit
+        )
         
         return Response({
             'session_id': session_id,
-            'messages': history
+            'messages': history,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         }, status=status.HTTP_200_OK)
         
+    except ValueError:
+        return Response(
+            {'error': 'Invalid cursor or limit'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     except Exception as e:
         return Response(
             {'error': str(e)}, 
@@ -70,15 +173,26 @@ def chat_history(request, session_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_sessions(request):
-    """Get all chat sessions for the user"""
+    """Get the user's chat sessions, most recently active first, a page at a time"""
     try:
-        chatbot_service = ChatbotService()
-        sessions = chatbot_service.get_user_sessions(request.user)
+        limit = parse_page_size(
+            request.GET.get('limit'), default=SESSIONS_PAGE_SIZE, maximum=MAX_SESSIONS_PAGE_SIZE
+        )
+        sessions, next_cursor = chatbot_service.get_user_sessions(
+            request.user, cursor=request.GET.get('cursor'), limit=limit
+        )
         
         return Response({
-            'sessions': sessions
+            'sessions': sessions,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         }, status=status.HTTP_200_OK)
         
+    except ValueError:
+        return Response(
+            {'error': 'Invalid cursor or limit'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     except Exception as e:
         return Response(
             {'error': str(e)}, 
@@ -86,6 +200,76 @@ def user_sessions(request):
         )
 
 
+def _report_days(request):
+    days = int(request.GET.get('days', 7))
+    if not 1 <= days <= MAX_REPORT_DAYS:
+        raise ValueError
+    return days
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def usage_report(request):
+    """Chatbot usage report for the current user over the last `days` days"""
+    try:
+        days = _report_days(request)
+    except ValueError:
+        return Response(
+            {'error': f'days must be between 1 and {MAX_REPORT_DAYS}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    chat_analytics.flush()
+    return Response(AnalyticsHelper.generate_usage_report(request.user.id, days), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def org_usage_report(request):
+    """Chatbot usage report for every user, for staff"""
+    try:
+        days = _report_days(request)
+    except ValueError:
+        return Response(
+            {'error': f'days must be between 1 and {MAX_REPORT_DAYS}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    chat_analytics.flush()
+    return Response(AnalyticsHelper.generate_org_usage_report(days), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def analytics_rollups(request):
+    """Dashboard series from the hourly/daily rollup tables, for staff"""
+    granularity = request.GET.get('granularity', 'daily')
+    if granularity not in ('hourly', 'daily'):
+        return Response(
+            {'error': 'granularity must be hourly or daily'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    maximum = MAX_HOURLY_REPORT_DAYS if granularity == 'hourly' else MAX_REPORT_DAYS
+    try:
+        days = int(request.GET.get('days', 7))
+    except ValueError:
+        days = 0
+    if not 1 <= days <= maximum:
+        return Response(
+            {'error': f'days must be between 1 and {maximum}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return Response(rollup_summary(granularity, days), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def scheduler_metrics(request):
+    """Chat scheduler queue depth and wait times per priority level, for this worker process"""
+    return Response(chat_scheduler.metrics(), status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def quick_action(request):
@@ -156,18 +340,28 @@ def feedback(request):
         
         # Update analytics with feedback
         from .models import ChatAnalytics
+        chat_analytics.flush()
         try:
-            message = ChatMessage.objects.get(id=message_id)
+            message = ChatMessage.objects.get(id=message_id, session__user=request.user)
+        except (ChatMessage.DoesNotExist, ValidationError):
+            return Response(
+                {'error': 'Message not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        analytics = ChatAnalytics.objects.filter(message=message).first()
+        if analytics is None:
+            # Rows written before turns were linked: the first one at or after the message
             analytics = ChatAnalytics.objects.filter(
                 user=request.user,
+                message__isnull=True,
                 created_at__gte=message.created_at
-            ).first()
-            
-            if analytics:
-                analytics.satisfaction_score = rating
-                analytics.save()
-        except ChatMessage.DoesNotExist:
-            pass
+            ).order_by('created_at').first()
+        
+        if analytics:
+            previous_score = analytics.satisfaction_score
+            analytics.satisfaction_score = rating
+            analytics.save()
+            apply_feedback(analytics, previous_score)
         
         return Response({
             'message': 'Feedback recorded successfully'
@@ -240,12 +434,14 @@ def _process_quick_action(action_type: str, action_data: dict, user, session_id:
     if session_id:
         try:
             session = ChatSession.objects.get(id=session_id, user=user)
-            ChatMessage.objects.create(
-                session=session,
-                message_type='system',
-                content=f"Quick action: {action_type}",
-                metadata={'action_data': action_data}
-            )
+            with transaction.atomic():
+                system_msg = ChatMessage.objects.create(
+                    session=session,
+                    message_type='system',
+                    content=f"Quick action: {action_type}",
+                    metadata={'action_data': action_data}
+                )
+                update_session_summaries([system_msg])
         except ChatSession.DoesNotExist:
             pass
     
@@ -23,4 +23,5 @@ urlpatterns = [
     
     # Dashboard endpoint (combines all stats)
     path('dashboard/', views.dashboard_summary, name='dashboard_summary'),
+    path('dashboard/cache-stats/', views.cache_stats, name='dashboard_cache_stats'),
 ]
\ No newline at end of file
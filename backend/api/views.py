@@ -2,9 +2,9 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Count
-from drone_app.models import Drone
+from drone_app.aggregates import cached_fleet_counts, percentage, recent_drones
 from drone_app.serializers import DroneSerializer
+from drone_app.snapshot import fleet_snapshot
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -14,21 +14,19 @@ def dashboard_summary(request):
     for Flutter app main screen
     """
     
-    # Get drone statistics
-    total_drones = Drone.objects.filter(is_deleted=False).count()
-    active_drones = Drone.objects.filter(status='Active', is_deleted=False).count()
-    maintenance_drones = Drone.objects.filter(status='In Maintenance', is_deleted=False).count()
-    inactive_drones = Drone.objects.filter(status='Inactive', is_deleted=False).count()
-    
-    # Get urgency level distribution
-    urgency_stats = Drone.objects.filter(is_deleted=False).values('urgency_level').annotate(count=Count('urgency_level'))
-    urgency_distribution = {item['urgency_level']: item['count'] for item in urgency_stats}
+    # All counters in one query, recent drones (with pilots) in a second
+    counts = cached_fleet_counts()
+    total_drones = counts['total']
+    active_drones = counts['active']
+    maintenance_drones = counts['maintenance']
+    inactive_drones = counts['inactive']
+    urgency_distribution = counts['urgency_distribution']
     
     # Get recent drones (last 5 updated)
-    recent_drones = Drone.objects.filter(is_deleted=False).order_by('-updated_at')[:5]
+    recent = recent_drones(5)
     
     # Calculate fleet health percentage
-    fleet_health = round((active_drones / total_drones * 100) if total_drones > 0 else 0, 1)
+    fleet_health = percentage(active_drones, total_drones)
     
     dashboard_data = {
         'user': {
@@ -44,15 +42,21 @@ def dashboard_summary(request):
             'fleet_health_percentage': fleet_health
         },
         'urgency_distribution': urgency_distribution,
-        'recent_activity': DroneSerializer(recent_drones, many=True).data,
+        'recent_activity': DroneSerializer(recent, many=True).data,
         'quick_stats': {
             'missions_completed': total_drones,  # Placeholder - can be enhanced
             'active_missions': active_drones,
             'maintenance_required': maintenance_drones,
-            'critical_alerts': Drone.objects.filter(urgency_level='Critical', is_deleted=False).count()
+            'critical_alerts': counts['critical']
         },
         'status': 'success',
         'message': 'Dashboard data loaded successfully'
     }
     
-    return Response(dashboard_data, status=status.HTTP_200_OK)
\ No newline at end of file
+    return Response(dashboard_data, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def cache_stats(request):
+    """Hit/miss counters of the fleet snapshot cache"""
+    return Response(fleet_snapshot.get_stats(), status=status.HTTP_200_OK)
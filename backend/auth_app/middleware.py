@@ -0,0 +1,44 @@
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+
+def socket_token(scope):
+    """
+    The raw access token of a WebSocket handshake: `?token=` in the query
+    string (browsers cannot set headers on a WebSocket) or an
+    `Authorization: Bearer <token>` header.
+    """
+    token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+    if token:
+        return token[0]
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0].lower() == 'bearer':
+                return parts[1]
+    return None
+
+
+@database_sync_to_async
+def get_token_user(raw_token):
+    """Validate an access token with the REST API's simplejwt settings"""
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Populate scope['user'] from a simplejwt access token; AnonymousUser when absent or invalid"""
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        token = socket_token(scope)
+        scope['user'] = await get_token_user(token) if token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
@@ -1,9 +1,20 @@
 from django.contrib import admin
-from .models import Drone
+from .models import Drone, DroneTelemetry
 
 @admin.register(Drone)
 class DroneAdmin(admin.ModelAdmin):
     list_display = ['id', 'status', 'urgency_level', 'assigned_pilot', 'created_at']
-    list_filter = ['status', 'urgency_level', 'created_at']
+    list_filter = ['status', 'urgency_level', 'is_deleted', 'created_at']
     search_fields = ['id', 'assigned_pilot__username']
-    readonly_fields = ['id', 'created_at', 'updated_at']
\ No newline at end of file
+    readonly_fields = ['id', 'created_at', 'updated_at']
+    
+    def get_queryset(self, request):
+        # The default manager hides soft-deleted drones; admins still see them
+        return Drone.all_objects.select_related('assigned_pilot')
+
+@admin.register(DroneTelemetry)
+class DroneTelemetryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'drone', 'latitude', 'longitude', 'battery_level', 'recorded_at']
+    list_filter = ['recorded_at']
+    search_fields = ['drone__id']
+    readonly_fields = ['received_at']
\ No newline at end of file
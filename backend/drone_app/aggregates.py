@@ -0,0 +1,56 @@
+from django.db.models import Count, Q
+from .models import Drone
+from .snapshot import fleet_snapshot
+
+STATUS_KEYS = {
+    'Active': 'active',
+    'In Maintenance': 'maintenance',
+    'Inactive': 'inactive',
+}
+
+
+def fleet_counts():
+    """
+    Every fleet counter used by the dashboard, fleet and report endpoints,
+    computed in a single pass over live drones with conditional aggregation.
+    """
+    aggregates = {'total': Count('id')}
+    for status_value, key in STATUS_KEYS.items():
+        aggregates[key] = Count('id', filter=Q(status=status_value))
+    for level, _ in Drone.URGENCY_CHOICES:
+        aggregates[f'urgency_{level}'] = Count('id', filter=Q(urgency_level=level))
+
+    row = Drone.objects.aggregate(**aggregates)
+
+    # Only levels/statuses that occur, matching the old GROUP BY output
+    urgency_distribution = {
+        level: row[f'urgency_{level}']
+        for level, _ in Drone.URGENCY_CHOICES if row[f'urgency_{level}']
+    }
+    status_distribution = {
+        status_value: row[key]
+        for status_value, key in STATUS_KEYS.items() if row[key]
+    }
+    return {
+        'total': row['total'],
+        'active': row['active'],
+        'maintenance': row['maintenance'],
+        'inactive': row['inactive'],
+        'critical': row['urgency_Critical'],
+        'urgency_distribution': urgency_distribution,
+        'status_distribution': status_distribution,
+    }
+
+
+def cached_fleet_counts():
+    """fleet_counts() served from the fleet snapshot cache"""
+    return fleet_snapshot.get('fleet_counts', fleet_counts)
+
+
+def percentage(part, total, digits=1):
+    return round((part / total * 100) if total > 0 else 0, digits)
+
+
+def recent_drones(limit=5):
+    """Most recently updated live drones, with pilots joined for serialization"""
+    return Drone.objects.select_related('assigned_pilot').order_by('-updated_at')[:limit]
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class DroneAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'drone_app'
\ No newline at end of file
+    name = 'drone_app'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
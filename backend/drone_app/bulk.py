@@ -0,0 +1,103 @@
+import json
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework import serializers
+from .geo import encode_geohash
+from .lookup import short_id
+from .models import Drone
+from .serializers import DroneBulkSerializer
+from .signals import drones_bulk_created
+
+User = get_user_model()
+
+BULK_BATCH_SIZE = 1000
+MAX_BULK_ROWS = 50000
+
+
+class BulkLimitExceeded(ValueError):
+    pass
+
+
+def iter_ndjson(stream):
+    """Yield (row, error) pairs from a newline-delimited JSON byte stream"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError:
+            yield None, {'non_field_errors': ['Invalid JSON line']}
+
+
+def ingest_drones(rows, batch_size=BULK_BATCH_SIZE):
+    """
+    Validate and insert drones from an iterable of (row, parse_error) pairs.
+
+    Rows are handled in batches: pilot IDs of a batch are checked with one
+    query, valid rows are written with a single bulk_create, and everything
+    runs in one transaction. Invalid rows are skipped and reported by index.
+    """
+    created_ids = []
+    errors = []
+    batch = []
+
+    with transaction.atomic():
+        for index, (row, parse_error) in enumerate(rows):
+            if index >= MAX_BULK_ROWS:
+                raise BulkLimitExceeded(f'At most {MAX_BULK_ROWS} drones per request')
+            if parse_error:
+                errors.append({'index': index, 'errors': parse_error})
+                continue
+            batch.append((index, row))
+            if len(batch) >= batch_size:
+                created_ids += _ingest_batch(batch, errors)
+                batch = []
+        if batch:
+            created_ids += _ingest_batch(batch, errors)
+
+    return {
+        'created': len(created_ids),
+        'failed': len(errors),
+        'ids': created_ids,
+        'errors': errors
+    }
+
+
+def _ingest_batch(batch, errors):
+    pilot_ids = set()
+    for _, row in batch:
+        if isinstance(row, dict) and row.get('assigned_pilot') is not None:
+            try:
+                pilot_ids.add(int(row['assigned_pilot']))
+            except (TypeError, ValueError):
+                pass
+    existing_pilots = set(
+        User.objects.filter(id__in=pilot_ids).values_list('id', flat=True)
+    ) if pilot_ids else set()
+
+    # One serializer per batch: field construction is the expensive part of DRF validation
+    validator = DroneBulkSerializer(context={'pilot_ids': existing_pilots})
+    drones = []
+    for index, row in batch:
+        if not isinstance(row, dict):
+            errors.append({'index': index, 'errors': {'non_field_errors': ['Expected a JSON object']}})
+            continue
+        try:
+            data = validator.run_validation(row)
+        except serializers.ValidationError as e:
+            errors.append({'index': index, 'errors': e.detail})
+            continue
+        # bulk_create bypasses Drone.save(), so derive the geohash and short id here
+        drone = Drone(
+            assigned_pilot_id=data.pop('assigned_pilot', None),
+            geohash=encode_geohash(data['location_latitude'], data['location_longitude']),
+            **data
+        )
+        drone.short_id = short_id(drone.id)
+        drones.append(drone)
+
+    Drone.objects.bulk_create(drones, batch_size=BULK_BATCH_SIZE)
+    if drones:
+        drones_bulk_created.send(sender=Drone, drones=drones)
+    return [str(drone.id) for drone in drones]
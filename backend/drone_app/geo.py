@@ -0,0 +1,170 @@
+import math
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Search starts at ~1.2km cells and widens until the k-th hit is provably nearest
+DEFAULT_SEARCH_PRECISION = 6
+# Dispatch range cap: wider radii start the search at cells that cover most of a continent
+MAX_RADIUS_KM = 500.0
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate pair as a geohash string"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    latitude = float(latitude)
+    longitude = float(longitude)
+
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def cell_size_degrees(precision):
+    """Return (lat_degrees, lng_degrees) covered by one geohash cell"""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def cell_block(latitude, longitude, precision):
+    """Geohash of the cell containing the point plus its eight neighbours"""
+    lat_step, lng_step = cell_size_degrees(precision)
+    cells = set()
+    for dlat in (-lat_step, 0, lat_step):
+        lat = min(max(float(latitude) + dlat, -90.0), 90.0)
+        for dlng in (-lng_step, 0, lng_step):
+            lng = (float(longitude) + dlng + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(lat, lng, precision))
+    return sorted(cells)
+
+
+def covered_radius_km(latitude, precision):
+    """
+    Distance from the query point that a 3x3 cell block is guaranteed to
+    cover: every point closer than this lies inside the block.
+    """
+    lat_step, lng_step = cell_size_degrees(precision)
+    km_per_degree = math.pi * EARTH_RADIUS_KM / 180.0
+    lng_km = lng_step * km_per_degree * math.cos(math.radians(float(latitude)))
+    return min(lat_step * km_per_degree, lng_km)
+
+
+def parse_radius_km(value):
+    """A search radius in (0, MAX_RADIUS_KM] km, or None when not given; ValueError otherwise"""
+    if value in (None, ''):
+        return None
+    try:
+        radius_km = float(value)
+    except (TypeError, ValueError):
+        raise ValueError('radius_km must be numeric')
+    # NaN and infinity would widen the search to a full scan
+    if not math.isfinite(radius_km) or not 0 < radius_km <= MAX_RADIUS_KM:
+        raise ValueError(f'radius_km must be greater than 0 and at most {MAX_RADIUS_KM:g}')
+    return radius_km
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+NEAREST_FIELDS = (
+    'id', 'location_latitude', 'location_longitude', 'status',
+    'urgency_level', 'assigned_pilot', 'assigned_pilot__username', 'geohash'
+)
+
+
+def _start_precision(latitude, radius_km):
+    precision = DEFAULT_SEARCH_PRECISION
+    if radius_km is not None:
+        # Start at the finest level whose block already covers the radius
+        while precision > 1 and covered_radius_km(latitude, precision) < radius_km:
+            precision -= 1
+    return precision
+
+
+def _search_step(queryset, latitude, longitude, precision):
+    """Candidate rows for one precision level and the radius they cover"""
+    if precision < 1:
+        return queryset.values(*NEAREST_FIELDS), math.inf
+    prefix_filter = Q()
+    for cell in cell_block(latitude, longitude, precision):
+        # Range form of a prefix match so every backend can use the index
+        prefix_filter |= Q(geohash__gte=cell, geohash__lt=cell + '{')
+    return queryset.filter(prefix_filter).values(*NEAREST_FIELDS), covered_radius_km(latitude, precision)
+
+
+def _rank(rows, latitude, longitude, k, radius_km, covered, precision):
+    """The k nearest rows if this step settles the search, otherwise None"""
+    results = []
+    for row in rows:
+        distance = haversine_km(
+            latitude, longitude, row['location_latitude'], row['location_longitude']
+        )
+        if radius_km is None or distance <= radius_km:
+            results.append((distance, row))
+    results.sort(key=lambda item: item[0])
+
+    if radius_km is not None and radius_km <= covered:
+        return results[:k]
+    if len(results) >= k and results[k - 1][0] <= covered:
+        return results[:k]
+    if precision < 1:
+        return results[:k]
+    return None
+
+
+def nearest_drones(queryset, latitude, longitude, k=5, radius_km=None):
+    """
+    Return up to k (distance_km, row) pairs from queryset ordered by distance.
+
+    Candidates are pulled from the 3x3 geohash block around the point with
+    range scans on the indexed geohash column, starting small and widening
+    one precision level at a time until the k-th result is within the
+    guaranteed coverage of the block. Only the last resort is a full scan.
+    """
+    queryset = queryset.order_by()
+    precision = _start_precision(latitude, radius_km)
+    while True:
+        candidates, covered = _search_step(queryset, latitude, longitude, precision)
+        results = _rank(candidates, latitude, longitude, k, radius_km, covered, precision)
+        if results is not None:
+            return results
+        precision -= 1
+
+
+async def anearest_drones(queryset, latitude, longitude, k=5, radius_km=None):
+    """Async counterpart of nearest_drones() using async queryset iteration"""
+    queryset = queryset.order_by()
+    precision = _start_precision(latitude, radius_km)
+    while True:
+        candidates, covered = _search_step(queryset, latitude, longitude, precision)
+        rows = [row async for row in candidates]
+        results = _rank(rows, latitude, longitude, k, radius_km, covered, precision)
+        if results is not None:
+            return results
+        precision -= 1
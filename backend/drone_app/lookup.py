@@ -0,0 +1,64 @@
+import re
+import uuid
+
+# Drones are shown by the first 8 hex digits of their id (Drone.__str__, chatbot replies)
+SHORT_ID_LENGTH = 8
+MIN_PREFIX_LENGTH = 4
+HEX_RE = re.compile(r'[0-9a-f]+')
+
+LOOKUP_FIELDS = (
+    'id', 'location_latitude', 'location_longitude', 'status',
+    'urgency_level', 'assigned_pilot', 'assigned_pilot__username', 'updated_at'
+)
+
+
+def short_id(drone_id):
+    """The indexed short id of a drone: the first 8 hex digits of its UUID"""
+    return uuid.UUID(str(drone_id)).hex[:SHORT_ID_LENGTH]
+
+
+def parse_prefix(value):
+    """Lower-case hex digits of a typed id prefix, dashes dropped; ValueError if not one"""
+    prefix = (value or '').strip().lower().replace('-', '')
+    if not MIN_PREFIX_LENGTH <= len(prefix) <= 32 or not HEX_RE.fullmatch(prefix):
+        raise ValueError(f'prefix must be {MIN_PREFIX_LENGTH} to 32 hex digits')
+    return prefix
+
+
+def _prefix_query(queryset, prefix):
+    """Rows whose short id starts with the prefix, in index order"""
+    if len(prefix) == 32:
+        queryset = queryset.filter(pk=uuid.UUID(prefix))
+    elif len(prefix) >= SHORT_ID_LENGTH:
+        queryset = queryset.filter(short_id=prefix[:SHORT_ID_LENGTH])
+    else:
+        # Range form of a prefix match so every backend can use the index;
+        # 'g' sorts after every hex digit
+        queryset = queryset.filter(short_id__gte=prefix, short_id__lt=prefix + 'g')
+    return queryset.order_by('short_id', 'id').values(*LOOKUP_FIELDS)
+
+
+def _matching(rows, prefix, limit):
+    # Ids sharing the first 8 digits are told apart on the full id
+    if len(prefix) > SHORT_ID_LENGTH:
+        rows = [row for row in rows if row['id'].hex.startswith(prefix)]
+    return rows[:limit]
+
+
+def match_prefix(queryset, prefix, limit=10):
+    """
+    Up to `limit` rows of drones whose id starts with `prefix` (see
+    parse_prefix), from one probe of the indexed short_id column.
+    """
+    query = _prefix_query(queryset, prefix)
+    if len(prefix) <= SHORT_ID_LENGTH:
+        query = query[:limit]
+    return _matching(list(query), prefix, limit)
+
+
+async def amatch_prefix(queryset, prefix, limit=10):
+    """Async counterpart of match_prefix() using async queryset iteration"""
+    query = _prefix_query(queryset, prefix)
+    if len(prefix) <= SHORT_ID_LENGTH:
+        query = query[:limit]
+    return _matching([row async for row in query], prefix, limit)
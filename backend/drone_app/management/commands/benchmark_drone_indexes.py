@@ -0,0 +1,131 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from drone_app.lookup import _prefix_query, match_prefix, short_id
+from drone_app.models import Drone
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the soft-delete access patterns against a throwaway test '
+        'database, with and without the partial drone indexes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Drones to generate')
+        parser.add_argument('--deleted-ratio', type=float, default=0.2, help='Share of soft-deleted rows')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query')
+        parser.add_argument('--no-plans', action='store_true', help='Skip EXPLAIN output')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self._populate(options['rows'], options['deleted_ratio'])
+            indexes = Drone._meta.indexes
+
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(Drone, index)
+            self._analyze()
+            before = self._run('without indexes', options)
+
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.add_index(Drone, index)
+            self._analyze()
+            after = self._run('with indexes', options)
+
+            self.stdout.write('\nSummary (median ms)')
+            for name in before:
+                speedup = before[name] / after[name] if after[name] else float('inf')
+                self.stdout.write(f'  {name:<28} {before[name]:>10.2f} -> {after[name]:>8.2f}  ({speedup:.1f}x)')
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _populate(self, rows, deleted_ratio):
+        self.stdout.write(f'Generating {rows} drones...')
+        rng = random.Random(42)
+        statuses = ['Active', 'Active', 'Active', 'In Maintenance', 'Inactive']
+        urgencies = ['Low', 'Medium', 'High', 'Critical']
+        batch = []
+        for _ in range(rows):
+            drone = Drone(
+                location_latitude=round(rng.uniform(8, 35), 6),
+                location_longitude=round(rng.uniform(68, 97), 6),
+                urgency_level=rng.choice(urgencies),
+                status=rng.choice(statuses),
+                is_deleted=rng.random() < deleted_ratio,
+            )
+            drone.short_id = short_id(drone.id)
+            batch.append(drone)
+            if len(batch) >= 10000:
+                Drone.all_objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Drone.all_objects.bulk_create(batch)
+
+        # auto_now/auto_now_add stamp every row with the same instant on insert;
+        # spread them over five years (updated within the last 30 days) in SQL
+        table = Drone._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f"UPDATE {table} SET created_at = now() - random() * interval '1825 days', "
+                    f"updated_at = now() - random() * interval '30 days'"
+                )
+            else:
+                cursor.execute(
+                    f"UPDATE {table} SET "
+                    f"created_at = datetime('now', '-' || (abs(random()) % 157680000) || ' seconds'), "
+                    f"updated_at = datetime('now', '-' || (abs(random()) % 2592000) || ' seconds')"
+                )
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Drone._meta.db_table}')
+
+    def _queries(self):
+        """name -> (queryset to EXPLAIN, callable that evaluates it like the views do)"""
+        live = Drone.objects.all()
+        month_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        page = live.order_by('-created_at', '-id')
+        by_status = live.filter(status='In Maintenance').order_by('-created_at', '-id')
+        by_urgency = live.filter(urgency_level='Critical').order_by('-created_at', '-id')
+        status_counts = live.values('status').annotate(count=Count('id')).order_by()
+        critical = live.filter(urgency_level='Critical')
+        recent = live.order_by('-updated_at')
+        this_month = live.filter(created_at__gte=month_start)
+        prefix = live.order_by().values_list('short_id', flat=True).first()[:6]
+        return {
+            'list first page': (page[:100], lambda: list(page[:100])),
+            'list by status': (by_status[:100], lambda: list(by_status[:100])),
+            'list by urgency': (by_urgency[:100], lambda: list(by_urgency[:100])),
+            'status counts': (status_counts, lambda: list(status_counts.all())),
+            'critical count': (critical.values('id').order_by(), critical.count),
+            'recent activity': (recent[:5], lambda: list(recent[:5])),
+            'month created range': (this_month.values('id').order_by(), this_month.count),
+            'short id prefix': (_prefix_query(live, prefix), lambda: match_prefix(live, prefix)),
+        }
+
+    def _run(self, label, options):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {label} =='))
+        results = {}
+        for name, (queryset, evaluate) in self._queries().items():
+            evaluate()  # warm up
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                evaluate()
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            results[name] = timings[len(timings) // 2]
+            self.stdout.write(f'{name}: {results[name]:.2f} ms')
+            if not options['no_plans']:
+                self.stdout.write('  ' + queryset.explain().replace('\n', '\n  '))
+        return results
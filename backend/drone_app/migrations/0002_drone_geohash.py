@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:44
+
+from django.db import migrations, models
+
+
+def backfill_geohash(apps, schema_editor):
+    from drone_app.geo import encode_geohash
+
+    Drone = apps.get_model('drone_app', 'Drone')
+    batch = []
+    for drone in Drone.objects.only('id', 'location_latitude', 'location_longitude').iterator(chunk_size=2000):
+        drone.geohash = encode_geohash(drone.location_latitude, drone.location_longitude)
+        batch.append(drone)
+        if len(batch) >= 2000:
+            Drone.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        Drone.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drone_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='drone',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drone_app', '0002_drone_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DroneTelemetry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('longitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('altitude', models.FloatField(blank=True, help_text='Altitude in metres', null=True)),
+                ('speed', models.FloatField(blank=True, help_text='Ground speed in m/s', null=True)),
+                ('battery_level', models.FloatField(blank=True, help_text='Battery percentage', null=True)),
+                ('recorded_at', models.DateTimeField(help_text='Timestamp reported by the drone')),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('drone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='telemetry', to='drone_app.drone')),
+            ],
+            options={
+                'ordering': ['-recorded_at'],
+                'indexes': [models.Index(fields=['drone', '-recorded_at'], name='telemetry_drone_recorded_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drone_app', '0003_drone_telemetry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-created_at', '-id'], name='drone_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['status', '-created_at', '-id'], name='drone_live_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['urgency_level', '-created_at', '-id'], name='drone_live_urgency_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-updated_at'], name='drone_live_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:29
+
+from django.db import migrations, models
+
+
+def backfill_short_id(apps, schema_editor):
+    Drone = apps.get_model('drone_app', 'Drone')
+    batch = []
+    for drone in Drone.objects.only('id').iterator(chunk_size=2000):
+        drone.short_id = drone.id.hex[:8]
+        batch.append(drone)
+        if len(batch) >= 2000:
+            Drone.objects.bulk_update(batch, ['short_id'])
+            batch = []
+    if batch:
+        Drone.objects.bulk_update(batch, ['short_id'])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drone_app', '0004_drone_live_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='drone',
+            name='short_id',
+            field=models.CharField(blank=True, editable=False, max_length=8),
+        ),
+        migrations.RunPython(backfill_short_id, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['short_id'], name='drone_live_short_id_idx'),
+        ),
+    ]
@@ -1,9 +1,21 @@
 import uuid
 from django.db import models
 from django.contrib.auth import get_user_model
+from .geo import encode_geohash
+from .lookup import short_id
 
 User = get_user_model()
 
+ACTIVE_DRONES = models.Q(is_deleted=False)
+
+
+class ActiveDroneManager(models.Manager):
+    """Default manager: hides soft-deleted drones"""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class Drone(models.Model):
     URGENCY_CHOICES = [
         ('Low', 'Low'),
@@ -29,9 +41,71 @@ class Drone(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_deleted = models.BooleanField(default=False)
+    # Derived from the coordinates on save; prefix lookups power nearest-drone queries
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
+    # First 8 hex digits of the id, as drones are shown; indexed for prefix lookups
+    short_id = models.CharField(max_length=8, blank=True, editable=False)
+    
+    objects = ActiveDroneManager()
+    all_objects = models.Manager()
     
     class Meta:
         ordering = ['-created_at']
+        # Partial indexes over non-deleted rows, one per access pattern:
+        # list/keyset pages, status and urgency filters/counts, recent activity,
+        # short-id prefix lookups
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=ACTIVE_DRONES, name='drone_live_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], condition=ACTIVE_DRONES, name='drone_live_status_idx'),
+            models.Index(fields=['urgency_level', '-created_at', '-id'], condition=ACTIVE_DRONES, name='drone_live_urgency_idx'),
+            models.Index(fields=['-updated_at'], condition=ACTIVE_DRONES, name='drone_live_updated_idx'),
+            models.Index(fields=['short_id'], condition=ACTIVE_DRONES, name='drone_live_short_id_idx'),
+        ]
+    
+    # Fields whose previous values post_save receivers can read from saved_state
+    TRACKED_FIELDS = ('status', 'urgency_level', 'is_deleted', 'created_at')
+    
+    def __str__(self):
+        return f"Drone {str(self.id)[:8]} - {self.status}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.saved_state = instance.tracked_state()
+        return instance
+    
+    def tracked_state(self):
+        """Current values of TRACKED_FIELDS, or None if any of them is deferred"""
+        if any(field not in self.__dict__ for field in self.TRACKED_FIELDS):
+            return None
+        return {field: self.__dict__[field] for field in self.TRACKED_FIELDS}
+    
+    def save(self, *args, **kwargs):
+        self.geohash = encode_geohash(self.location_latitude, self.location_longitude)
+        self.short_id = short_id(self.id)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'geohash' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['geohash']
+        super().save(*args, **kwargs)
+        self.saved_state = self.tracked_state()
+
+
+class DroneTelemetry(models.Model):
+    """Append-only position samples reported by drones in flight"""
+    drone = models.ForeignKey(Drone, on_delete=models.CASCADE, related_name='telemetry')
+    latitude = models.DecimalField(max_digits=9, decimal_places=6)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    altitude = models.FloatField(null=True, blank=True, help_text="Altitude in metres")
+    speed = models.FloatField(null=True, blank=True, help_text="Ground speed in m/s")
+    battery_level = models.FloatField(null=True, blank=True, help_text="Battery percentage")
+    recorded_at = models.DateTimeField(help_text="Timestamp reported by the drone")
+    received_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-recorded_at']
+        indexes = [
+            models.Index(fields=['drone', '-recorded_at'], name='telemetry_drone_recorded_idx'),
+        ]
     
     def __str__(self):
-        return f"Drone {str(self.id)[:8]} - {self.status}"
\ No newline at end of file
+        return f"Telemetry {str(self.drone_id)[:8]} @ {self.recorded_at}"
@@ -0,0 +1,48 @@
+import json
+from django.db import connection
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_CHUNK_SIZE = 2000
+
+
+def estimate_count(queryset):
+    """
+    Cheap row-count estimate. PostgreSQL reads the planner estimate from
+    EXPLAIN instead of scanning; other backends fall back to an exact COUNT.
+    """
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    return queryset.count()
+
+
+def stream_drones_json(queryset, serializer_class, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield a JSON document {"drones": [...], "count": N} chunk by chunk.
+    The count is accumulated while streaming, so no second COUNT query runs.
+    """
+    encoder = JSONEncoder()
+    yield '{"drones": ['
+    count = 0
+    batch = []
+    for drone in queryset.iterator(chunk_size=chunk_size):
+        batch.append(drone)
+        if len(batch) >= chunk_size:
+            yield _encode_batch(encoder, serializer_class, batch, count)
+            count += len(batch)
+            batch = []
+    if batch:
+        yield _encode_batch(encoder, serializer_class, batch, count)
+        count += len(batch)
+    yield f'], "count": {count}}}'
+
+
+def _encode_batch(encoder, serializer_class, batch, offset):
+    data = serializer_class(batch, many=True).data
+    body = ', '.join(encoder.encode(item) for item in data)
+    return body if offset == 0 else ', ' + body
@@ -1,8 +1,5 @@
 from rest_framework import serializers
 from .models import Drone
-from django.contrib.auth import get_user_model
-
-User = get_user_model()
 
 class DroneSerializer(serializers.ModelSerializer):
     assigned_pilot_name = serializers.CharField(source='assigned_pilot.username', read_only=True)
@@ -24,7 +21,22 @@ class DroneSerializer(serializers.ModelSerializer):
             'longitude': float(obj.location_longitude)
         }
     
+    # assigned_pilot is a PrimaryKeyRelatedField, so an unknown pilot is
+    # already rejected while resolving the ID; no extra lookup is needed
+
+
+class DroneBulkSerializer(serializers.ModelSerializer):
+    """Row validator for bulk ingest; pilot IDs are checked against a prefetched set"""
+    assigned_pilot = serializers.IntegerField(required=False, allow_null=True)
+    
+    class Meta:
+        model = Drone
+        fields = [
+            'location_latitude', 'location_longitude', 'package_details',
+            'urgency_level', 'assigned_pilot', 'additional_note', 'status'
+        ]
+    
     def validate_assigned_pilot(self, value):
-        if value and not User.objects.filter(id=value.id).exists():
+        if value is not None and value not in self.context.get('pilot_ids', set()):
             raise serializers.ValidationError("Assigned pilot does not exist")
         return value
\ No newline at end of file
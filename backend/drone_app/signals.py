@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from .models import Drone
+from .snapshot import fleet_snapshot
+
+# Sent after Drone.objects.bulk_create in bulk ingest, which bypasses post_save.
+# Receivers get drones=[Drone, ...] and run inside the ingest transaction.
+drones_bulk_created = Signal()
+
+# Sent after a telemetry flush moved drones with bulk_update (no post_save).
+# Receivers get drone_ids=[...] of the drones whose position changed and run
+# inside the flush transaction; flushes that moved nothing send nothing.
+telemetry_flushed = Signal()
+
+# Saves that only move a drone do not change any fleet counter
+LOCATION_FIELDS = {'location_latitude', 'location_longitude', 'geohash'}
+
+
+@receiver(post_save, sender=Drone)
+def invalidate_on_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= LOCATION_FIELDS:
+        return
+    # Soft deletes in delete_drone are saves too, so they land here
+    transaction.on_commit(fleet_snapshot.invalidate)
+
+
+@receiver(post_delete, sender=Drone)
+def invalidate_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(fleet_snapshot.invalidate)
+
+
+@receiver(drones_bulk_created, sender=Drone)
+def invalidate_on_bulk_create(sender, drones, **kwargs):
+    transaction.on_commit(fleet_snapshot.invalidate)
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = 'fleet_snapshot:version'
+
+
+class FleetSnapshotCache:
+    """
+    Versioned cache for fleet-wide snapshots (counts and similar overview
+    data) that only change when a Drone is written.
+
+    Entries live in an in-process LRU. When a shared cache alias is configured,
+    the current version and the values are also kept there, so every worker
+    sees an invalidation issued by any other worker. Writers call invalidate(),
+    which bumps the version; readers capture the version before computing, so
+    a value computed from pre-write data can never be served after the bump.
+    """
+
+    def __init__(self, max_entries=128, timeout=60, alias=None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.alias = alias
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._local_version = 0
+        self.reset_stats()
+
+    @property
+    def shared(self):
+        return caches[self.alias] if self.alias else None
+
+    def reset_stats(self):
+        self.stats = {'hits': 0, 'shared_hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def version(self):
+        if self.shared is None:
+            return self._local_version
+        version = self.shared.get(VERSION_KEY)
+        if version is None:
+            self.shared.add(VERSION_KEY, 1, timeout=None)
+            version = self.shared.get(VERSION_KEY, 1)
+        return version
+
+    def get(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss"""
+        version = self.version()
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[2]
+
+        value = None
+        if self.shared is not None:
+            value = self.shared.get(f'fleet_snapshot:{version}:{key}')
+        with self._lock:
+            self.stats['shared_hits' if value is not None else 'misses'] += 1
+        if value is None:
+            value = compute()
+            if self.shared is not None:
+                self.shared.set(f'fleet_snapshot:{version}:{key}', value, timeout=self.timeout)
+
+        with self._lock:
+            self._entries[key] = (version, now + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def peek(self, key):
+        """The in-process value for key if it is current, without computing it"""
+        version = self.version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[2]
+        return None
+
+    def invalidate(self):
+        with self._lock:
+            self._local_version += 1
+            self._entries.clear()
+            self.stats['invalidations'] += 1
+        if self.shared is not None:
+            try:
+                self.shared.incr(VERSION_KEY)
+            except ValueError:
+                self.shared.set(VERSION_KEY, 1, timeout=None)
+
+    def get_stats(self):
+        requests = self.stats['hits'] + self.stats['shared_hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'hit_rate': round((requests - self.stats['misses']) / requests * 100, 2) if requests else 0,
+            'backend': self.alias or 'local',
+        }
+
+
+fleet_snapshot = FleetSnapshotCache(
+    max_entries=getattr(settings, 'FLEET_SNAPSHOT_CACHE_MAX_ENTRIES', 128),
+    timeout=getattr(settings, 'FLEET_SNAPSHOT_CACHE_TIMEOUT', 60),
+    alias=getattr(settings, 'FLEET_SNAPSHOT_CACHE_ALIAS', None) or None,
+)
@@ -0,0 +1,308 @@
+import atexit
+import logging
+import math
+import threading
+import uuid
+from datetime import timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+from django.db import IntegrityError, OperationalError, close_old_connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .geo import encode_geohash
+from .models import Drone, DroneTelemetry
+from .signals import telemetry_flushed
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SIZE = 500
+FLUSH_INTERVAL = 1.0  # seconds
+MAX_FLUSH_ATTEMPTS = 3  # per batch, before a failing batch is dropped
+
+
+class LatestPositionTable:
+    """
+    In-memory table of the most recent sample per drone, so map views can
+    read live positions without a database query. Each worker process keeps
+    its own table, populated by the samples it ingests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._positions = {}
+
+    def update(self, sample):
+        key = str(sample['drone_id'])
+        with self._lock:
+            current = self._positions.get(key)
+            if current is None or current['recorded_at'] <= sample['recorded_at']:
+                self._positions[key] = sample
+
+    def get(self, drone_id):
+        return self._positions.get(str(drone_id))
+
+    def snapshot(self, since=None):
+        with self._lock:
+            positions = list(self._positions.values())
+        if since is not None:
+            positions = [p for p in positions if p['recorded_at'] >= since]
+        return positions
+
+    def discard(self, drone_id):
+        with self._lock:
+            self._positions.pop(str(drone_id), None)
+
+    def __contains__(self, drone_id):
+        return str(drone_id) in self._positions
+
+    def clear(self):
+        with self._lock:
+            self._positions.clear()
+
+
+class TelemetryBuffer:
+    """
+    Buffers telemetry samples and writes them with bulk_create once the buffer
+    reaches flush_size or every flush_interval seconds, whichever comes first.
+    Each flush also moves the Drone rows to their latest reported position
+    with one bulk_update, leaving updated_at untouched.
+
+    A batch that fails on a database error (a locked SQLite file, a drone
+    deleted mid-flush) is kept as its own retry group and written again,
+    apart from newer samples, on the next flushes, until it has failed
+    MAX_FLUSH_ATTEMPTS times.
+    """
+
+    def __init__(self, flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self._retries = []  # [failed attempts, samples] per batch that failed to write
+        self._timer = None
+
+    def add(self, samples):
+        with self._lock:
+            self._pending.extend(samples)
+            should_flush = len(self._pending) >= self.flush_size
+            if not should_flush:
+                self._schedule()
+        if should_flush:
+            self.flush()
+
+    def _schedule(self):
+        """Start the flush timer if none is pending; caller holds the lock"""
+        if self._timer is None and self.flush_interval:
+            self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending) + sum(len(samples) for _, samples in self._retries)
+
+    def flush(self):
+        """Write all pending samples, retry groups first; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                groups = self._retries
+                if self._pending:
+                    groups.append([0, self._pending])
+                self._pending, self._retries = [], []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            written = 0
+            retries = []
+            for group in groups:
+                attempts, samples = group
+                try:
+                    written += self._write(samples)
+                except (OperationalError, IntegrityError):
+                    group[0] = attempts + 1
+                    if group[0] < MAX_FLUSH_ATTEMPTS:
+                        logger.warning('Telemetry flush failed, %d samples requeued', len(samples), exc_info=True)
+                        retries.append(group)
+                    else:
+                        logger.exception(
+                            'Telemetry flush failed %d times, %d samples dropped', group[0], len(samples)
+                        )
+                except Exception:
+                    logger.exception('Telemetry flush failed, %d samples dropped', len(samples))
+            if retries:
+                with self._lock:
+                    self._retries[:0] = retries
+                    self._schedule()
+            return written
+
+    def _flush_from_timer(self):
+        close_old_connections()
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+    def _write(self, samples):
+        # Drones deleted since their samples were accepted would fail the foreign key
+        ids = {sample['drone_id'] for sample in samples}
+        known = {
+            str(drone_id): (latitude, longitude)
+            for drone_id, latitude, longitude in Drone.objects.filter(id__in=ids).values_list(
+                'id', 'location_latitude', 'location_longitude'
+            )
+        }
+        for drone_id in ids - known.keys():
+            latest_positions.discard(drone_id)
+        samples = [sample for sample in samples if sample['drone_id'] in known]
+        if not samples:
+            return 0
+
+        # A retried batch can be older than samples already written: those
+        # still go into the history but must not move the drone back
+        stored = dict(
+            DroneTelemetry.objects.filter(drone_id__in=known.keys())
+            .order_by().values('drone_id').annotate(latest=Max('recorded_at')).values_list('drone_id', 'latest')
+        )
+        latest = {}
+        for sample in samples:
+            current = latest.get(sample['drone_id'])
+            if current is None or current['recorded_at'] <= sample['recorded_at']:
+                latest[sample['drone_id']] = sample
+        for drone_id, recorded_at in stored.items():
+            if str(drone_id) in latest and latest[str(drone_id)]['recorded_at'] < recorded_at:
+                del latest[str(drone_id)]
+
+        drones = [
+            Drone(
+                id=sample['drone_id'],
+                location_latitude=sample['latitude'],
+                location_longitude=sample['longitude'],
+                geohash=encode_geohash(sample['latitude'], sample['longitude'])
+            )
+            for sample in latest.values()
+            # Hovering drones report the stored position again; leave those rows alone
+            if (sample['latitude'], sample['longitude']) != known[sample['drone_id']]
+        ]
+        with transaction.atomic():
+            DroneTelemetry.objects.bulk_create([
+                DroneTelemetry(
+                    drone_id=sample['drone_id'],
+                    latitude=sample['latitude'],
+                    longitude=sample['longitude'],
+                    altitude=sample['altitude'],
+                    speed=sample['speed'],
+                    battery_level=sample['battery_level'],
+                    recorded_at=sample['recorded_at']
+                )
+                for sample in samples
+            ], batch_size=FLUSH_SIZE)
+            if drones:
+                Drone.objects.bulk_update(
+                    drones, ['location_latitude', 'location_longitude', 'geohash'], batch_size=FLUSH_SIZE
+                )
+                telemetry_flushed.send(sender=Drone, drone_ids=[drone.id for drone in drones])
+        return len(samples)
+
+
+def parse_sample(raw):
+    """
+    Validate one raw telemetry record. Returns (sample, error) where exactly
+    one of the two is None. Kept free of DRF serializers on purpose: this
+    runs for every sample at 1 Hz per drone.
+    """
+    if not isinstance(raw, dict):
+        return None, 'Expected a JSON object'
+    try:
+        drone_id = uuid.UUID(str(raw['drone_id']))
+        latitude = Decimal(str(raw['lat'])).quantize(Decimal('0.000001'))
+        longitude = Decimal(str(raw['lng'])).quantize(Decimal('0.000001'))
+        # NaN survives quantize() but cannot be compared with the range below
+        if not (latitude.is_finite() and longitude.is_finite()):
+            raise ValueError('non-finite coordinate')
+    except KeyError as e:
+        return None, f'Missing field {e.args[0]}'
+    except (ValueError, InvalidOperation):
+        return None, 'Invalid drone_id or coordinates'
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None, 'Coordinates out of range'
+
+    recorded_at = timezone.now()
+    if raw.get('timestamp'):
+        recorded_at = parse_datetime(str(raw['timestamp']))
+        if recorded_at is None:
+            return None, 'Invalid timestamp'
+        if timezone.is_naive(recorded_at):
+            recorded_at = timezone.make_aware(recorded_at, dt_timezone.utc)
+
+    optional = {}
+    for field, key in (('altitude', 'altitude'), ('speed', 'speed'), ('battery_level', 'battery')):
+        value = raw.get(key)
+        try:
+            optional[field] = float(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None, f'Invalid {key}'
+        if optional[field] is not None and not math.isfinite(optional[field]):
+            return None, f'Invalid {key}'
+
+    return {
+        'drone_id': str(drone_id),
+        'latitude': latitude,
+        'longitude': longitude,
+        'recorded_at': recorded_at,
+        **optional
+    }, None
+
+
+def ingest(records):
+    """
+    Validate a batch of raw records, publish them to the latest-position
+    table and queue them for the next flush. Unknown drones are resolved with
+    a single query per call for IDs not already seen by this process.
+    """
+    accepted = []
+    rejected = []
+    for index, raw in enumerate(records):
+        sample, error = parse_sample(raw)
+        if error:
+            rejected.append({'index': index, 'error': error})
+        else:
+            accepted.append((index, sample))
+
+    unseen = {sample['drone_id'] for _, sample in accepted if sample['drone_id'] not in latest_positions}
+    if unseen:
+        known = {
+            str(drone_id) for drone_id in
+            Drone.objects.filter(id__in=unseen, is_deleted=False).values_list('id', flat=True)
+        }
+        for index, sample in accepted:
+            if sample['drone_id'] in unseen and sample['drone_id'] not in known:
+                rejected.append({'index': index, 'error': 'Unknown drone'})
+        accepted = [(index, sample) for index, sample in accepted if sample['drone_id'] not in unseen - known]
+
+    samples = [sample for _, sample in accepted]
+    for sample in samples:
+        latest_positions.update(sample)
+    telemetry_buffer.add(samples)
+
+    rejected.sort(key=lambda item: item['index'])
+    return len(samples), rejected
+
+
+def serialize_position(sample):
+    return {
+        'drone_id': sample['drone_id'],
+        'location': {
+            'latitude': float(sample['latitude']),
+            'longitude': float(sample['longitude'])
+        },
+        'altitude': sample['altitude'],
+        'speed': sample['speed'],
+        'battery_level': sample['battery_level'],
+        'recorded_at': sample['recorded_at'].isoformat()
+    }
+
+
+latest_positions = LatestPositionTable()
+telemetry_buffer = TelemetryBuffer()
+atexit.register(telemetry_buffer.flush)
@@ -0,0 +1,162 @@
+import base64
+import json
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from drone_backend.pagination import InvalidCursor, decode_cursor, encode_cursor, paginate_keyset
+from .geo import cell_block, encode_geohash, haversine_km, nearest_drones, parse_radius_km
+from .models import Drone, DroneTelemetry
+from .telemetry import MAX_FLUSH_ATTEMPTS, TelemetryBuffer, parse_sample
+
+
+def make_drone(**fields):
+    fields.setdefault('location_latitude', 1)
+    fields.setdefault('location_longitude', 1)
+    return Drone.objects.create(**fields)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.drones = [make_drone() for _ in range(7)]
+        # Shared timestamps make the id the tie-breaker
+        now = timezone.now()
+        Drone.objects.filter(id__in=[drone.id for drone in self.drones[:4]]).update(created_at=now)
+
+    def test_pages_cover_every_row_once_newest_first(self):
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = paginate_keyset(Drone.objects.all(), cursor, page_size=3)
+            seen.extend(drone.id for drone in page)
+            if cursor is None:
+                break
+        expected = list(Drone.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_cursor_round_trip(self):
+        drone = self.drones[0]
+        self.assertEqual(decode_cursor(encode_cursor(drone)), (drone.created_at, drone.id))
+
+    def test_malformed_cursors_are_rejected(self):
+        crafted = base64.urlsafe_b64encode(json.dumps(['2026-01-01T00:00:00+00:00', '1 OR 1=1']).encode()).decode()
+        for cursor in ('not-a-cursor', crafted, base64.urlsafe_b64encode(b'[1]').decode()):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+    def test_list_answers_400_for_a_bad_cursor(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username='pilot', password='pw'))
+        response = client.get('/api/drones/', {'cursor': 'not-a-cursor', 'limit': 2})
+        self.assertEqual(response.status_code, 400)
+        response = client.get('/api/drones/', {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['drones']), 2)
+        self.assertIsNotNone(response.data['next_cursor'])
+
+
+class GeohashTests(TestCase):
+    def test_known_geohash(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+    def test_cell_block_holds_the_cell_and_its_neighbours(self):
+        block = cell_block(57.64911, 10.40744, 5)
+        self.assertEqual(len(block), 9)
+        self.assertIn('u4pru', block)
+        # A point most of a cell away to the north is still inside the block
+        self.assertIn(encode_geohash(57.64911 + 0.03, 10.40744, 5), block)
+
+    def test_cell_block_wraps_the_antimeridian(self):
+        block = cell_block(0.0, 179.99, 4)
+        self.assertIn(encode_geohash(0.0, -179.99, 4), block)
+
+    def test_nearest_matches_a_full_scan(self):
+        points = [(52.52 + i * 0.013, 13.40 + (i % 5) * 0.021) for i in range(30)]
+        for latitude, longitude in points:
+            make_drone(location_latitude=round(latitude, 6), location_longitude=round(longitude, 6))
+        queryset = Drone.objects.filter(status='Active')
+        results = nearest_drones(queryset, 52.6, 13.45, k=5)
+        expected = sorted(
+            haversine_km(52.6, 13.45, drone.location_latitude, drone.location_longitude)
+            for drone in queryset
+        )[:5]
+        self.assertEqual([round(distance, 6) for distance, _ in results], [round(d, 6) for d in expected])
+
+    def test_radius_must_be_finite_and_bounded(self):
+        self.assertIsNone(parse_radius_km(''))
+        self.assertEqual(parse_radius_km('2.5'), 2.5)
+        for value in ('nan', 'inf', '-1', '0', '100000', 'abc'):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_radius_km(value)
+
+
+class TelemetryTests(TestCase):
+    def setUp(self):
+        self.drone = make_drone()
+        self.buffer = TelemetryBuffer(flush_size=1000, flush_interval=0)
+
+    def sample(self, latitude, seconds_ago=0):
+        sample, error = parse_sample({
+            'drone_id': str(self.drone.id),
+            'lat': latitude,
+            'lng': 1,
+            'timestamp': (timezone.now() - timedelta(seconds=seconds_ago)).isoformat(),
+        })
+        self.assertIsNone(error)
+        return sample
+
+    def test_non_finite_values_are_rejected(self):
+        for raw in (
+            {'lat': 'NaN', 'lng': 1},
+            {'lat': 1, 'lng': 'Infinity'},
+            {'lat': 1, 'lng': 1, 'speed': 'nan'},
+            {'lat': 1, 'lng': 1, 'battery': float('inf')},
+        ):
+            with self.subTest(raw=raw):
+                sample, error = parse_sample({'drone_id': str(self.drone.id), **raw})
+                self.assertIsNone(sample)
+                self.assertIsNotNone(error)
+
+    def test_flush_moves_the_drone_and_keeps_history(self):
+        self.buffer.add([self.sample(2, seconds_ago=5), self.sample(3)])
+        self.assertEqual(self.buffer.flush(), 2)
+        self.drone.refresh_from_db()
+        self.assertEqual(float(self.drone.location_latitude), 3.0)
+        self.assertEqual(DroneTelemetry.objects.filter(drone=self.drone).count(), 2)
+
+    def test_older_samples_never_move_the_drone_back(self):
+        self.buffer.add([self.sample(3)])
+        self.buffer.flush()
+        self.buffer.add([self.sample(2, seconds_ago=60)])
+        self.assertEqual(self.buffer.flush(), 1)
+        self.drone.refresh_from_db()
+        self.assertEqual(float(self.drone.location_latitude), 3.0)
+
+    def test_samples_of_deleted_drones_are_dropped(self):
+        gone = make_drone()
+        sample, _ = parse_sample({'drone_id': str(gone.id), 'lat': 1, 'lng': 1})
+        Drone.all_objects.filter(id=gone.id).delete()
+        self.buffer.add([sample, self.sample(2)])
+        self.assertEqual(self.buffer.flush(), 1)
+
+    def test_failed_batches_retry_on_their_own_count(self):
+        write = TelemetryBuffer._write
+
+        def locked_for_poison(buffer, samples):
+            if any(sample['latitude'] == 9 for sample in samples):
+                raise OperationalError('database is locked')
+            return write(buffer, samples)
+
+        with mock.patch.object(TelemetryBuffer, '_write', locked_for_poison), self.assertLogs('drone_app.telemetry'):
+            self.buffer.add([self.sample(9, seconds_ago=60)])
+            self.assertEqual(self.buffer.flush(), 0)
+            # Newer samples are written around the failing batch and do not reset its count
+            for attempt in range(2, MAX_FLUSH_ATTEMPTS + 1):
+                self.assertEqual(self.buffer.pending_count(), 1)
+                self.buffer.add([self.sample(attempt)])
+                self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.buffer.pending_count(), 0)
+        self.assertFalse(DroneTelemetry.objects.filter(latitude=9).exists())
@@ -5,6 +5,11 @@ from . import views
 urlpatterns = [
     path('', views.list_drones, name='drone_list'),
     path('add/', views.add_drone, name='drone_add'),
+    path('bulk/', views.bulk_add_drones, name='drone_bulk_add'),
+    path('nearest/', views.nearest, name='drone_nearest'),
+    path('lookup/', views.lookup, name='drone_lookup'),
+    path('telemetry/', views.ingest_telemetry, name='drone_telemetry_ingest'),
+    path('telemetry/latest/', views.latest_positions, name='drone_telemetry_latest'),
     path('<uuid:drone_id>/', views.update_drone, name='drone_update'),
     path('<uuid:drone_id>/delete/', views.delete_drone, name='drone_delete'),
 ]
\ No newline at end of file
@@ -2,9 +2,17 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
+from .bulk import BulkLimitExceeded, ingest_drones, iter_ndjson
+from .geo import nearest_drones, parse_radius_km
+from .lookup import match_prefix, parse_prefix
 from .models import Drone
+from drone_backend.pagination import paginate_keyset, parse_page_size
+from .pagination import estimate_count, stream_drones_json
 from .serializers import DroneSerializer
+from . import telemetry
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -18,23 +26,168 @@ def add_drone(request):
         }, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_add_drones(request):
+    """Register many drones at once from a JSON array or an NDJSON stream"""
+    if request.content_type.startswith(('application/x-ndjson', 'application/jsonl')):
+        rows = iter_ndjson(request.stream or [])
+    else:
+        if not isinstance(request.data, list):
+            return Response({'error': 'Expected a JSON array of drones'}, status=status.HTTP_400_BAD_REQUEST)
+        rows = ((row, None) for row in request.data)
+    
+    try:
+        result = ingest_drones(rows)
+    except BulkLimitExceeded as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'message': f"{result['created']} drones added successfully",
+        **result
+    }, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_drones(request):
     urgency = request.GET.get('urgency')
     drone_status = request.GET.get('status')
+    cursor = request.GET.get('cursor')
+    limit = request.GET.get('limit')
+    count_mode = request.GET.get('count', '').lower()  # exact | estimate
     
-    drones = Drone.objects.filter(is_deleted=False)
+    drones = Drone.objects.filter(is_deleted=False).select_related('assigned_pilot')
     
     if urgency:
         drones = drones.filter(urgency_level=urgency)
     if drone_status:
         drones = drones.filter(status=drone_status)
     
-    serializer = DroneSerializer(drones, many=True)
+    # Unpaginated pulls are streamed so the full list is never held in memory
+    if cursor is None and limit is None:
+        return StreamingHttpResponse(
+            stream_drones_json(drones, DroneSerializer),
+            content_type='application/json'
+        )
+    
+    try:
+        page_size = parse_page_size(limit)
+        page, next_cursor = paginate_keyset(drones, cursor, page_size)
+    except ValueError:
+        return Response({'error': 'Invalid cursor or limit'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    total = None
+    if count_mode == 'exact':
+        total = drones.count()
+    elif count_mode == 'estimate':
+        total = estimate_count(drones)
+    
+    return Response({
+        'count': total,
+        'drones': DroneSerializer(page, many=True).data,
+        'next_cursor': next_cursor
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def nearest(request):
+    """Nearest drones to a point, for dispatching on emergency requests"""
+    try:
+        latitude = float(request.GET['lat'])
+        longitude = float(request.GET['lng'])
+        k = max(1, min(int(request.GET.get('k', 5)), 100))
+    except (KeyError, ValueError):
+        return Response(
+            {'error': 'lat and lng are required; k must be numeric'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        radius_km = parse_radius_km(request.GET.get('radius_km'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return Response({'error': 'Coordinates out of range'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    drones = Drone.objects.filter(is_deleted=False, status=request.GET.get('status', 'Active'))
+    results = nearest_drones(drones, latitude, longitude, k=k, radius_km=radius_km)
+    
+    return Response({
+        'count': len(results),
+        'drones': [
+            {
+                'id': str(row['id']),
+                'location': {
+                    'latitude': float(row['location_latitude']),
+                    'longitude': float(row['location_longitude'])
+                },
+                'status': row['status'],
+                'urgency_level': row['urgency_level'],
+                'assigned_pilot': row['assigned_pilot'],
+                'assigned_pilot_name': row['assigned_pilot__username'],
+                'distance_km': round(distance, 3)
+            } for distance, row in results
+        ]
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def lookup(request):
+    """Resolve a short id prefix (as shown in the app and chat) to drones"""
+    try:
+        prefix = parse_prefix(request.GET.get('prefix'))
+        limit = max(1, min(int(request.GET.get('limit', 10)), 50))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    rows = match_prefix(Drone.objects.all(), prefix, limit=limit)
+    
+    return Response({
+        'prefix': prefix,
+        'count': len(rows),
+        'drones': [
+            {
+                'id': str(row['id']),
+                'location': {
+                    'latitude': float(row['location_latitude']),
+                    'longitude': float(row['location_longitude'])
+                },
+                'status': row['status'],
+                'urgency_level': row['urgency_level'],
+                'assigned_pilot': row['assigned_pilot'],
+                'assigned_pilot_name': row['assigned_pilot__username'],
+                'updated_at': row['updated_at']
+            } for row in rows
+        ]
+    }, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def ingest_telemetry(request):
+    """Accept a batch of position samples; writes are buffered and flushed in bulk"""
+    records = request.data.get('records') if isinstance(request.data, dict) else request.data
+    if not isinstance(records, list):
+        return Response({'error': 'Expected a list of telemetry records'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    accepted, rejected = telemetry.ingest(records)
+    return Response({
+        'accepted': accepted,
+        'rejected': rejected
+    }, status=status.HTTP_202_ACCEPTED if accepted else status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def latest_positions(request):
+    """Latest known position of each drone, served from memory"""
+    since = request.GET.get('since')
+    if since:
+        since = parse_datetime(since)
+        if since is None:
+            return Response({'error': 'Invalid since timestamp'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    positions = telemetry.latest_positions.snapshot(since=since or None)
     return Response({
-        'count': drones.count(),
-        'drones': serializer.data
+        'count': len(positions),
+        'positions': [telemetry.serialize_position(sample) for sample in positions]
     }, status=status.HTTP_200_OK)
 
 @api_view(['PUT'])
@@ -57,6 +210,7 @@ def delete_drone(request, drone_id):
     drone = get_object_or_404(Drone, id=drone_id, is_deleted=False)
     drone.is_deleted = True
     drone.save()
+    telemetry.latest_positions.discard(drone.id)
     
     return Response({
         'message': 'Drone deleted successfully'
@@ -0,0 +1,242 @@
+import asyncio
+import random
+import string
+import threading
+import time
+import zlib
+from collections import deque
+from copy import deepcopy
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+
+class _Channel:
+    __slots__ = ('messages', 'waiters', 'capacity')
+
+    def __init__(self, capacity):
+        self.messages = deque()  # (expires_at, message)
+        self.waiters = deque()  # futures of receive() calls parked on this channel
+        self.capacity = capacity
+
+
+class _Shard:
+    __slots__ = ('lock', 'channels', 'groups', 'memberships')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channels = {}  # channel name -> _Channel
+        self.groups = {}  # group name -> {channel name: joined_at}
+        self.memberships = {}  # channel name -> group names, for leaving every group at once
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class ShardedInMemoryChannelLayer(BaseChannelLayer):
+    """
+    In-process channel layer built for broadcasting to many sockets.
+
+    Groups and channels live in `shards` partitions chosen by a hash of their
+    name, each with its own lock, so senders on other threads (async_to_sync
+    from views) only contend with work on the same shard. Every channel has a
+    bounded queue (`capacity`, `channel_capacity`); a full channel raises
+    ChannelFull on send() and misses that message on group_send(), as with
+    channels' InMemoryChannelLayer.
+
+    group_send() copies the message once and hands it straight to each
+    member's queue, waking a parked receive() directly instead of spawning a
+    task per member. Expired messages and group memberships are swept one
+    shard at a time, at most every `sweep_interval` seconds, rather than
+    scanning the whole layer on every receive(). A channel whose message
+    expired unread is dropped from all of its groups.
+
+    Like every in-memory layer it only reaches consumers of the same process.
+    """
+
+    extensions = ['groups', 'flush']
+
+    def __init__(self, expiry=60, group_expiry=86400, capacity=100, channel_capacity=None,
+                 shards=16, sweep_interval=1.0, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.group_expiry = group_expiry
+        self.sweep_interval = sweep_interval
+        self._shards = [_Shard() for _ in range(shards)]
+        self._next_sweep = 0.0
+        self._sweep_index = 0
+
+    def _shard(self, name):
+        return self._shards[zlib.crc32(name.encode()) % len(self._shards)]
+
+    # Channel layer API
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), 'message is not a dict'
+        self.require_valid_channel_name(channel)
+        assert '__asgi_channel__' not in message
+        self._maybe_sweep()
+        if not self._deliver(channel, deepcopy(message), time.time() + self.expiry, _running_loop()):
+            raise ChannelFull(channel)
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        shard = self._shard(channel)
+        loop = asyncio.get_running_loop()
+        while True:
+            with shard.lock:
+                state = shard.channels.get(channel)
+                if state is None:
+                    state = shard.channels[channel] = _Channel(self.get_capacity(channel))
+                now = time.time()
+                while state.messages and state.messages[0][0] < now:
+                    state.messages.popleft()
+                if state.messages:
+                    # The queue stays while its consumer keeps receiving; a
+                    # cancelled receive() or the sweep removes it
+                    return state.messages.popleft()[1]
+                waiter = loop.create_future()
+                state.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with shard.lock:
+                    if waiter in state.waiters:
+                        state.waiters.remove(waiter)
+                    if not state.messages and not state.waiters and shard.channels.get(channel) is state:
+                        del shard.channels[channel]
+                raise
+
+    async def new_channel(self, prefix='specific.'):
+        return '%s.sharded!%s' % (prefix, ''.join(random.choice(string.ascii_letters) for _ in range(12)))
+
+    def _deliver(self, channel, message, expires_at, loop):
+        """Queue one message and wake a parked receiver; False when the channel is full"""
+        shard = self._shard(channel)
+        waiter = None
+        with shard.lock:
+            state = shard.channels.get(channel)
+            if state is None:
+                state = shard.channels[channel] = _Channel(self.get_capacity(channel))
+            if len(state.messages) >= state.capacity:
+                return False
+            state.messages.append((expires_at, message))
+            while state.waiters:
+                candidate = state.waiters.popleft()
+                if not candidate.done():
+                    waiter = candidate
+                    break
+        if waiter is not None:
+            waiter_loop = waiter.get_loop()
+            if waiter_loop is loop:
+                _wake(waiter)
+            else:
+                waiter_loop.call_soon_threadsafe(_wake, waiter)
+        return True
+
+    # Expiry
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        shard = self._shards[self._sweep_index]
+        self._sweep_index = (self._sweep_index + 1) % len(self._shards)
+        self._sweep(shard, now)
+
+    def _sweep(self, shard, now):
+        """Drop expired messages and memberships from one shard"""
+        expired_channels = []
+        expired_memberships = []
+        joined_before = now - self.group_expiry
+        with shard.lock:
+            for name, state in list(shard.channels.items()):
+                if state.messages and state.messages[0][0] < now:
+                    while state.messages and state.messages[0][0] < now:
+                        state.messages.popleft()
+                    expired_channels.append(name)
+                if not state.messages and not state.waiters:
+                    del shard.channels[name]
+            for group, members in shard.groups.items():
+                expired_memberships.extend(
+                    (group, name) for name, joined_at in members.items() if joined_at < joined_before
+                )
+        for name in expired_channels:
+            self._leave_all(name)
+        for group, name in expired_memberships:
+            self._discard(group, name)
+
+    def _leave_all(self, channel):
+        shard = self._shard(channel)
+        with shard.lock:
+            groups = shard.memberships.pop(channel, ())
+        for group in groups:
+            self._remove_member(group, channel)
+
+    def _remove_member(self, group, channel):
+        shard = self._shard(group)
+        with shard.lock:
+            members = shard.groups.get(group)
+            if members is not None:
+                members.pop(channel, None)
+                if not members:
+                    del shard.groups[group]
+
+    def _discard(self, group, channel):
+        self._remove_member(group, channel)
+        shard = self._shard(channel)
+        with shard.lock:
+            groups = shard.memberships.get(channel)
+            if groups is not None:
+                groups.discard(group)
+                if not groups:
+                    del shard.memberships[channel]
+
+    # Flush extension
+
+    async def flush(self):
+        self._shards = [_Shard() for _ in self._shards]
+
+    async def close(self):
+        pass
+
+    # Groups extension
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        shard = self._shard(group)
+        with shard.lock:
+            shard.groups.setdefault(group, {})[channel] = time.time()
+        shard = self._shard(channel)
+        with shard.lock:
+            shard.memberships.setdefault(channel, set()).add(group)
+
+    async def group_discard(self, group, channel):
+        self.require_valid_channel_name(channel)
+        self.require_valid_group_name(group)
+        self._discard(group, channel)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), 'Message is not a dict'
+        self.require_valid_group_name(group)
+        self._maybe_sweep()
+        shard = self._shard(group)
+        with shard.lock:
+            members = list(shard.groups.get(group, ()))
+        if not members:
+            return
+        message = deepcopy(message)
+        expires_at = time.time() + self.expiry
+        loop = _running_loop()
+        for channel in members:
+            # A shallow copy per member keeps one consumer's edits from leaking to the rest
+            self._deliver(channel, dict(message), expires_at, loop)
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
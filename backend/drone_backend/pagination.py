@@ -0,0 +1,62 @@
+import base64
+import json
+import uuid
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+# Keyset pagination shared by the drone list and the chatbot's history and session lists
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(obj, field='created_at'):
+    """Encode the (timestamp, id) position of a row as an opaque cursor"""
+    raw = json.dumps([getattr(obj, field).isoformat(), str(obj.id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor into (created_at, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, obj_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = parse_datetime(created_at)
+        # Validated here so a crafted id never reaches the id__lt filter
+        obj_id = uuid.UUID(obj_id)
+    except (ValueError, TypeError, AttributeError):
+        raise InvalidCursor('Invalid cursor')
+    if created_at is None:
+        raise InvalidCursor('Invalid cursor')
+    return created_at, obj_id
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp the requested page size to [1, maximum]"""
+    if value in (None, ''):
+        return default
+    return max(1, min(int(value), maximum))
+
+
+def paginate_keyset(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, field='created_at'):
+    """
+    Return (page, next_cursor) for a queryset using keyset pagination on
+    (field, id), newest first. Each page is a single indexed range query, so
+    the cost does not grow with the page number like OFFSET does. Works for
+    any model with an id and a timestamp column, created_at by default.
+    """
+    queryset = queryset.order_by(f'-{field}', '-id')
+    if cursor:
+        timestamp, obj_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': obj_id})
+        )
+
+    # Fetch one extra row to know whether another page exists
+    rows = list(queryset[:page_size + 1])
+    page = rows[:page_size]
+    next_cursor = encode_cursor(page[-1], field) if len(rows) > page_size else None
+    return page, next_cursor
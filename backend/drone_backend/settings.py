@@ -11,6 +11,7 @@ DEBUG = config('DEBUG', default=True, cast=bool)
 
 ALLOWED_HOSTS = ['*',"sih-drone-app-2-109e.onrender.com"] 
 INSTALLED_APPS = [
+    'daphne',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -59,6 +60,20 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'drone_backend.wsgi.application'
+ASGI_APPLICATION = 'drone_backend.asgi.application'
+
+# WebSocket chat runs in-process: group fan-out is sharded by group name and
+# every channel queue holds at most `capacity` messages
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'drone_backend.layers.ShardedInMemoryChannelLayer',
+        'CONFIG': {
+            'capacity': 100,
+            'expiry': 60,
+            'shards': 16,
+        },
+    },
+}
 
 
 DATABASES = {
@@ -101,6 +116,8 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
     ],
+    # ?format= selects the export file type in report_app, not a DRF renderer
+    'URL_FORMAT_OVERRIDE': None,
 }
 
 SIMPLE_JWT = {
@@ -119,6 +136,40 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOW_ALL_ORIGINS = True
 
 AUTH_USER_MODEL = 'auth_app.User'
+
+# Fleet snapshot cache: name a CACHES alias (e.g. a shared Redis cache) to share
+# snapshots and invalidations between workers; empty keeps a per-process LRU
+FLEET_SNAPSHOT_CACHE_ALIAS = config('FLEET_SNAPSHOT_CACHE_ALIAS', default='')
+FLEET_SNAPSHOT_CACHE_TIMEOUT = 60
+FLEET_SNAPSHOT_CACHE_MAX_ENTRIES = 128
+
+# Background report exports: worker threads per process, artifact directory,
+# how long an unchanged artifact is reused, when finished jobs are purged and
+# how long a queued/running job may go without a heartbeat from its process before it is failed
+EXPORT_WORKERS = config('EXPORT_WORKERS', default=2, cast=int)
+EXPORT_ROOT = BASE_DIR / 'exports'
+EXPORT_ARTIFACT_TTL = 3600
+EXPORT_JOB_RETENTION = 24 * 3600
+EXPORT_JOB_HEARTBEAT = 300
+
+# Raw ChatAnalytics rows older than this are pruned by rollup_chat_analytics --prune
+# once folded into the hourly/daily rollups
+CHAT_ANALYTICS_RETENTION_DAYS = config('CHAT_ANALYTICS_RETENTION_DAYS', default=90, cast=int)
+
+# Chat turns in flight per process, queued turns beyond that, and the seconds of
+# waiting that count as one priority level (see ai_chatbot.scheduler)
+CHAT_SCHEDULER_WORKERS = config('CHAT_SCHEDULER_WORKERS', default=8, cast=int)
+CHAT_SCHEDULER_MAX_QUEUE = config('CHAT_SCHEDULER_MAX_QUEUE', default=500, cast=int)
+CHAT_SCHEDULER_AGING_INTERVAL = config('CHAT_SCHEDULER_AGING_INTERVAL', default=0.5, cast=float)
+CHAT_SCHEDULER_TIMEOUT = 30
+
+# Frames queued per chat socket before the overflow policy applies: 'close'
+# (reconnect with code 1013) or 'drop' (discard the oldest frame)
+CHAT_SOCKET_SEND_QUEUE = 256
+CHAT_SOCKET_OVERFLOW = config('CHAT_SOCKET_OVERFLOW', default='close')
+
+# Produces the text of streamed bot replies (see ai_chatbot.streaming)
+CHAT_REPLY_GENERATOR = config('CHAT_REPLY_GENERATOR', default='ai_chatbot.streaming.TemplateReplyGenerator')
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class FleetAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'fleet_app'
\ No newline at end of file
+    name = 'fleet_app'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
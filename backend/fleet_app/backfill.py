@@ -0,0 +1,89 @@
+from datetime import datetime, time
+from django.db import transaction
+from django.db.models import Count, DateField, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from drone_app.snapshot import fleet_snapshot
+from .models import (
+    DEFAULT_RESPONSE_TIME, FleetStatistics, SUCCESSFUL_URGENCIES, UNSUCCESSFUL_URGENCIES
+)
+
+COUNTER_FIELDS = [
+    'number_of_active_drones',
+    'number_of_successful_deliveries',
+    'number_of_unsuccessful_deliveries',
+    'average_response_time',
+]
+
+
+def add_months(month_date, months):
+    """Shift a first-of-month date by a number of calendar months"""
+    index = month_date.year * 12 + month_date.month - 1 + months
+    return month_date.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def iter_months(start_month, end_month):
+    """Yield the first day of every month from start_month to end_month inclusive"""
+    month = start_month.replace(day=1)
+    while month <= end_month:
+        yield month
+        month = add_months(month, 1)
+
+
+def backfill_fleet_statistics(start_month, end_month):
+    """
+    Recompute FleetStatistics for every month in [start_month, end_month].
+
+    Delivery counters for the whole range come from one GROUP BY
+    TruncMonth(created_at) query and are written with one bulk upsert.
+    The active-drone count is a point-in-time snapshot, so stored values are
+    kept for past months; the current month (and months without a row) take
+    the live count. Months without drones are written as zeros.
+    """
+    from drone_app.models import Drone
+
+    start_month = start_month.replace(day=1)
+    end_month = end_month.replace(day=1)
+    tz = timezone.get_current_timezone()
+    range_start = timezone.make_aware(datetime.combine(start_month, time.min), tz)
+    range_end = timezone.make_aware(datetime.combine(add_months(end_month, 1), time.min), tz)
+
+    monthly = {
+        row['month']: row for row in
+        Drone.objects.filter(created_at__gte=range_start, created_at__lt=range_end)
+        .annotate(month=TruncMonth('created_at', output_field=DateField()))
+        .values('month')
+        .annotate(
+            successful=Count('id', filter=Q(urgency_level__in=SUCCESSFUL_URGENCIES)),
+            unsuccessful=Count('id', filter=Q(urgency_level__in=UNSUCCESSFUL_URGENCIES)),
+        )
+        .order_by()
+    }
+    stored_active = dict(
+        FleetStatistics.objects.filter(month__gte=start_month, month__lte=end_month)
+        .values_list('month', 'number_of_active_drones')
+    )
+    active_now = Drone.objects.filter(status='Active').count()
+    this_month = timezone.now().replace(day=1).date()
+
+    rows = []
+    for month in iter_months(start_month, end_month):
+        counts = monthly.get(month, {})
+        active = stored_active.get(month, active_now) if month != this_month else active_now
+        rows.append(FleetStatistics(
+            month=month,
+            number_of_active_drones=active,
+            number_of_successful_deliveries=counts.get('successful', 0),
+            number_of_unsuccessful_deliveries=counts.get('unsuccessful', 0),
+            average_response_time=DEFAULT_RESPONSE_TIME,
+        ))
+
+    FleetStatistics.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['month'],
+        update_fields=COUNTER_FIELDS + ['updated_at'],
+    )
+    # bulk_create sends no post_save, so drop cached snapshots here
+    transaction.on_commit(fleet_snapshot.invalidate)
+    return rows
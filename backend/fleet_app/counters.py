@@ -0,0 +1,70 @@
+from collections import Counter, defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import FleetStatistics, SUCCESSFUL_URGENCIES, UNSUCCESSFUL_URGENCIES
+
+
+def current_month():
+    return timezone.now().replace(day=1).date()
+
+
+def contributions(state):
+    """
+    The FleetStatistics counters a drone in the given state feeds, as a
+    Counter of (month, field) -> 1. Deleted or missing drones feed nothing.
+    """
+    counts = Counter()
+    if not state or state['is_deleted']:
+        return counts
+    if state['status'] == 'Active':
+        counts[(current_month(), 'number_of_active_drones')] += 1
+    if state['created_at'] is not None:
+        created_month = timezone.localdate(state['created_at']).replace(day=1)
+        if state['urgency_level'] in SUCCESSFUL_URGENCIES:
+            counts[(created_month, 'number_of_successful_deliveries')] += 1
+        elif state['urgency_level'] in UNSUCCESSFUL_URGENCIES:
+            counts[(created_month, 'number_of_unsuccessful_deliveries')] += 1
+    return counts
+
+
+def state_delta(old_state, new_state):
+    """Counter deltas for a drone moving from old_state to new_state"""
+    delta = contributions(new_state)
+    delta.subtract(contributions(old_state))
+    return delta
+
+
+def seed_month(month):
+    """
+    Create the month row from raw data unless it exists. Returns False when
+    the row was already there, including when another writer just made it.
+    """
+    if FleetStatistics.objects.filter(month=month).exists():
+        return False
+    try:
+        with transaction.atomic():
+            FleetStatistics.objects.create(month=month, **FleetStatistics.compute_month(month))
+    except IntegrityError:
+        return False
+    return True
+
+
+def apply_deltas(deltas):
+    """
+    Apply counter deltas with one atomic F() UPDATE per month row. A missing
+    month row is created seeded from raw data, which already reflects the
+    write being applied, so its deltas are not added on top.
+    """
+    by_month = defaultdict(dict)
+    for (month, field), delta in deltas.items():
+        if delta:
+            by_month[month][field] = delta
+
+    for month, fields in by_month.items():
+        updates = {field: F(field) + delta for field, delta in fields.items()}
+        if FleetStatistics.objects.filter(month=month).update(**updates):
+            continue
+        if not seed_month(month):
+            # Another writer created the row first, from data without this change
+            FleetStatistics.objects.filter(month=month).update(**updates)
@@ -0,0 +1,37 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from drone_app.models import Drone
+from fleet_app.backfill import backfill_fleet_statistics
+
+
+class Command(BaseCommand):
+    help = 'Recompute fleet statistics from drone data for a range of months'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First month (YYYY-MM). Defaults to the month of the oldest drone.')
+        parser.add_argument('--end', help='Last month (YYYY-MM). Defaults to the current month.')
+
+    def handle(self, *args, **options):
+        end_month = self._parse_month(options['end']) if options['end'] else timezone.now().replace(day=1).date()
+        if options['start']:
+            start_month = self._parse_month(options['start'])
+        else:
+            oldest = Drone.objects.order_by('created_at').values_list('created_at', flat=True).first()
+            start_month = timezone.localdate(oldest).replace(day=1) if oldest else end_month
+        if start_month > end_month:
+            raise CommandError('--start must not be after --end')
+
+        rows = backfill_fleet_statistics(start_month, end_month)
+        for stats in rows:
+            self.stdout.write(
+                f'{stats.month.strftime("%B %Y")}: {stats.number_of_successful_deliveries} successful, '
+                f'{stats.number_of_unsuccessful_deliveries} unsuccessful, {stats.number_of_active_drones} active'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {len(rows)} month(s)'))
+
+    def _parse_month(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m').date()
+        except ValueError:
+            raise CommandError(f'Invalid month "{value}". Use YYYY-MM')
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from datetime import timedelta
+from fleet_app.backfill import COUNTER_FIELDS, add_months
 from fleet_app.models import FleetStatistics
 
 class Command(BaseCommand):
@@ -9,12 +9,12 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         self.stdout.write('Populating fleet statistics...')
         
-        # Generate data for last 12 months
+        # Generate data for last 12 months (calendar months, no 30-day drift)
         current_date = timezone.now().replace(day=1).date()
         
+        rows = []
         for i in range(12):
-            month_date = current_date - timedelta(days=30 * i)
-            month_date = month_date.replace(day=1)
+            month_date = add_months(current_date, -i)
             
             # Generate sample data
             active_drones = 10 + (i % 5)
@@ -22,22 +22,27 @@ class Command(BaseCommand):
             unsuccessful_deliveries = 5 + (i % 3)
             avg_response_time = 12.0 + (i * 0.5)
             
-            stats, created = FleetStatistics.objects.update_or_create(
+            rows.append(FleetStatistics(
                 month=month_date,
-                defaults={
-                    'number_of_active_drones': active_drones,
-                    'number_of_successful_deliveries': successful_deliveries,
-                    'number_of_unsuccessful_deliveries': unsuccessful_deliveries,
-                    'average_response_time': avg_response_time
-                }
-            )
+                number_of_active_drones=active_drones,
+                number_of_successful_deliveries=successful_deliveries,
+                number_of_unsuccessful_deliveries=unsuccessful_deliveries,
+                average_response_time=avg_response_time
+            ))
             
-            action = "Created" if created else "Updated"
             self.stdout.write(
-                f'{action} stats for {month_date.strftime("%B %Y")}: '
+                f'Stats for {month_date.strftime("%B %Y")}: '
                 f'{active_drones} active drones, {successful_deliveries} successful deliveries'
             )
         
+        # One upsert for all months
+        FleetStatistics.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['month'],
+            update_fields=COUNTER_FIELDS + ['updated_at'],
+        )
+        
         self.stdout.write(
             self.style.SUCCESS('Successfully populated fleet statistics!')
-        )
\ No newline at end of file
+        )
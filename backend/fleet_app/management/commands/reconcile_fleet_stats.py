@@ -0,0 +1,70 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from fleet_app.counters import current_month
+from fleet_app.models import FleetStatistics
+
+COUNTER_FIELDS = [
+    'number_of_active_drones',
+    'number_of_successful_deliveries',
+    'number_of_unsuccessful_deliveries',
+]
+
+
+class Command(BaseCommand):
+    help = 'Recompute fleet statistics counters from raw drone data and report (or fix) drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--month', action='append', default=[],
+            help='Month to check in YYYY-MM format (repeatable). Defaults to every stored month.'
+        )
+        parser.add_argument('--fix', action='store_true', help='Overwrite drifted counters with recomputed values')
+
+    def handle(self, *args, **options):
+        months = [self._parse_month(value) for value in options['month']]
+        if not months:
+            months = list(FleetStatistics.objects.values_list('month', flat=True))
+
+        drifted = 0
+        for month in sorted(months):
+            expected = FleetStatistics.compute_month(month)
+            stats = FleetStatistics.objects.filter(month=month).first()
+
+            # The active count is a point-in-time snapshot; it can only be
+            # recomputed for the month that is still running
+            fields = COUNTER_FIELDS if month == current_month() else COUNTER_FIELDS[1:]
+            if stats is None:
+                drift = {field: (None, expected[field]) for field in fields}
+            else:
+                drift = {
+                    field: (getattr(stats, field), expected[field])
+                    for field in fields if getattr(stats, field) != expected[field]
+                }
+
+            label = month.strftime('%B %Y')
+            if not drift:
+                self.stdout.write(f'{label}: OK')
+                continue
+
+            drifted += 1
+            details = ', '.join(f'{field} {stored} -> {value}' for field, (stored, value) in drift.items())
+            self.stdout.write(self.style.WARNING(f'{label}: drift ({details})'))
+            if options['fix']:
+                if stats is None:
+                    # A missing month gets every column compute_month knows, not just the counters
+                    FleetStatistics.objects.create(month=month, **expected)
+                else:
+                    FleetStatistics.objects.filter(month=month).update(
+                        updated_at=timezone.now(), **{field: value for field, (_, value) in drift.items()}
+                    )
+                self.stdout.write(f'{label}: fixed')
+
+        summary = f'{len(months)} month(s) checked, {drifted} with drift'
+        self.stdout.write(self.style.SUCCESS(summary) if not drifted else self.style.WARNING(summary))
+
+    def _parse_month(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m').date()
+        except ValueError:
+            raise CommandError(f'Invalid month "{value}". Use YYYY-MM')
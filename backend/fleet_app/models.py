@@ -7,6 +7,11 @@ from datetime import timedelta
 
 User = get_user_model()
 
+# Urgency level is used as a proxy for delivery outcome until deliveries are tracked
+SUCCESSFUL_URGENCIES = ['Low', 'Medium']
+UNSUCCESSFUL_URGENCIES = ['High', 'Critical']
+DEFAULT_RESPONSE_TIME = 15.5  # minutes
+
 class FleetStatistics(models.Model):
     """Model to track fleet performance metrics"""
     
@@ -47,14 +52,20 @@ class FleetStatistics(models.Model):
         )
         return stats
     
+    @staticmethod
+    def month_bounds(month_date):
+        """Return (first day, first day of next month) for a month"""
+        month_start = month_date.replace(day=1)
+        month_end = (month_start.replace(month=month_start.month % 12 + 1) 
+                    if month_start.month < 12 
+                    else month_start.replace(year=month_start.year + 1, month=1))
+        return month_start, month_end
+    
     @classmethod
-    def update_monthly_stats(cls, month_date=None):
-        """Update statistics for a given month"""
+    def compute_month(cls, month_date):
+        """Recompute the counters of a month from raw drone data"""
         from drone_app.models import Drone
         
-        if month_date is None:
-            month_date = timezone.now().replace(day=1).date()
-        
         # Calculate stats from drone data
         active_drones = Drone.objects.filter(
             status='Active', is_deleted=False
@@ -62,35 +73,33 @@ class FleetStatistics(models.Model):
         
         # For now, use urgency level as proxy for delivery success
         # In a real system, you'd have delivery status tracking
-        month_start = month_date
-        month_end = (month_start.replace(month=month_start.month % 12 + 1) 
-                    if month_start.month < 12 
-                    else month_start.replace(year=month_start.year + 1, month=1))
+        month_start, month_end = cls.month_bounds(month_date)
         
-        monthly_drones = Drone.objects.filter(
+        monthly = Drone.objects.filter(
             created_at__date__gte=month_start,
             created_at__date__lt=month_end,
             is_deleted=False
+        ).aggregate(
+            successful=Count('id', filter=Q(urgency_level__in=SUCCESSFUL_URGENCIES)),
+            unsuccessful=Count('id', filter=Q(urgency_level__in=UNSUCCESSFUL_URGENCIES)),
         )
         
-        successful = monthly_drones.filter(
-            urgency_level__in=['Low', 'Medium']
-        ).count()
-        
-        unsuccessful = monthly_drones.filter(
-            urgency_level__in=['High', 'Critical']
-        ).count()
-        
-        # Calculate average response time (mock calculation)
-        avg_response = 15.5  # Default response time in minutes
+        return {
+            'number_of_active_drones': active_drones,
+            'number_of_successful_deliveries': monthly['successful'],
+            'number_of_unsuccessful_deliveries': monthly['unsuccessful'],
+            # Calculate average response time (mock calculation)
+            'average_response_time': DEFAULT_RESPONSE_TIME
+        }
+    
+    @classmethod
+    def update_monthly_stats(cls, month_date=None):
+        """Update statistics for a given month"""
+        if month_date is None:
+            month_date = timezone.now().replace(day=1).date()
         
         stats, created = cls.objects.update_or_create(
             month=month_date,
-            defaults={
-                'number_of_active_drones': active_drones,
-                'number_of_successful_deliveries': successful,
-                'number_of_unsuccessful_deliveries': unsuccessful,
-                'average_response_time': avg_response
-            }
+            defaults=cls.compute_month(month_date)
         )
-        return stats
\ No newline at end of file
+        return stats
@@ -0,0 +1,39 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from drone_app.models import Drone
+from drone_app.signals import drones_bulk_created
+from drone_app.snapshot import fleet_snapshot
+from .counters import apply_deltas, contributions, state_delta
+from .models import FleetStatistics
+
+
+@receiver(post_save, sender=Drone)
+def update_counters_on_save(sender, instance, created, **kwargs):
+    old_state = None if created else getattr(instance, 'saved_state', None)
+    if not created and old_state is None:
+        # Saved without a loaded state (e.g. constructed by hand); reconcile_fleet_stats repairs it
+        return
+    apply_deltas(state_delta(old_state, instance.tracked_state()))
+
+
+@receiver(post_delete, sender=Drone)
+def update_counters_on_delete(sender, instance, **kwargs):
+    apply_deltas(state_delta(getattr(instance, 'saved_state', None), None))
+
+
+@receiver(drones_bulk_created, sender=Drone)
+def update_counters_on_bulk_create(sender, drones, **kwargs):
+    deltas = Counter()
+    for drone in drones:
+        deltas.update(contributions(drone.tracked_state()))
+    apply_deltas(deltas)
+
+
+@receiver(post_save, sender=FleetStatistics)
+@receiver(post_delete, sender=FleetStatistics)
+def invalidate_snapshot_on_stats_change(sender, **kwargs):
+    # Counter deltas from drone writes are covered by the Drone receivers;
+    # this catches admin edits and reconcile_fleet_stats --fix
+    transaction.on_commit(fleet_snapshot.invalidate)
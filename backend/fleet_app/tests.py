@@ -0,0 +1,89 @@
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from drone_app.models import Drone
+from .counters import current_month
+from .models import DEFAULT_RESPONSE_TIME, FleetStatistics
+
+COUNTERS = ['number_of_active_drones', 'number_of_successful_deliveries', 'number_of_unsuccessful_deliveries']
+
+
+def make_drone(**fields):
+    fields.setdefault('location_latitude', 1)
+    fields.setdefault('location_longitude', 1)
+    return Drone.objects.create(**fields)
+
+
+class CounterTests(TestCase):
+    def assertCountersMatchRawData(self):
+        stats = FleetStatistics.objects.get(month=current_month())
+        expected = FleetStatistics.compute_month(current_month())
+        self.assertEqual(
+            {field: getattr(stats, field) for field in COUNTERS},
+            {field: expected[field] for field in COUNTERS}
+        )
+
+    def test_creates_seed_and_then_increment_the_month_row(self):
+        make_drone(urgency_level='Low')
+        make_drone(urgency_level='Critical', status='Inactive')
+        make_drone(urgency_level='Medium')
+        stats = FleetStatistics.objects.get(month=current_month())
+        self.assertEqual(stats.number_of_active_drones, 2)
+        self.assertEqual(stats.number_of_successful_deliveries, 2)
+        self.assertEqual(stats.number_of_unsuccessful_deliveries, 1)
+        self.assertCountersMatchRawData()
+
+    def test_updates_move_counters_between_fields(self):
+        drone = make_drone(urgency_level='Low')
+        drone = Drone.objects.get(id=drone.id)
+        drone.urgency_level = 'High'
+        drone.status = 'In Maintenance'
+        drone.save()
+        self.assertCountersMatchRawData()
+
+    def test_location_saves_leave_counters_alone(self):
+        drone = Drone.objects.get(id=make_drone().id)
+        before = FleetStatistics.objects.get(month=current_month()).number_of_active_drones
+        drone.location_latitude = 2
+        drone.save(update_fields=['location_latitude'])
+        self.assertEqual(FleetStatistics.objects.get(month=current_month()).number_of_active_drones, before)
+
+    def test_soft_and_hard_deletes_are_subtracted(self):
+        kept = make_drone(urgency_level='Low')
+        soft = Drone.objects.get(id=make_drone(urgency_level='High').id)
+        soft.is_deleted = True
+        soft.save()
+        Drone.objects.get(id=kept.id).delete()
+        self.assertCountersMatchRawData()
+        self.assertEqual(FleetStatistics.objects.get(month=current_month()).number_of_active_drones, 0)
+
+
+class ReconcileTests(TestCase):
+    def test_fix_creates_a_missing_month_in_full(self):
+        make_drone(urgency_level='Low')
+        FleetStatistics.objects.all().delete()
+        call_command('reconcile_fleet_stats', '--month', current_month().strftime('%Y-%m'), '--fix', stdout=StringIO())
+        stats = FleetStatistics.objects.get(month=current_month())
+        self.assertEqual(stats.number_of_successful_deliveries, 1)
+        self.assertEqual(stats.average_response_time, DEFAULT_RESPONSE_TIME)
+
+    def test_fix_only_rewrites_drifted_counters(self):
+        make_drone(urgency_level='Low')
+        FleetStatistics.objects.filter(month=current_month()).update(
+            number_of_successful_deliveries=40, average_response_time=3.0
+        )
+        out = StringIO()
+        call_command('reconcile_fleet_stats', '--fix', stdout=out)
+        self.assertIn('number_of_successful_deliveries 40 -> 1', out.getvalue())
+        stats = FleetStatistics.objects.get(month=current_month())
+        self.assertEqual(stats.number_of_successful_deliveries, 1)
+        self.assertEqual(stats.average_response_time, 3.0)
+
+    def test_statistics_seed_the_current_month_on_read(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username='ops', password='pw'))
+        response = client.get('/api/fleet/statistics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['monthly_stats'][0]['month'], current_month().isoformat())
@@ -2,39 +2,38 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Count
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime
+from drone_app.aggregates import STATUS_KEYS, cached_fleet_counts
 from drone_app.models import Drone
 from drone_app.serializers import DroneSerializer
+from .counters import current_month, seed_month
 from .models import FleetStatistics
 from .serializers import FleetStatisticsSerializer, FleetStatisticsUpdateSerializer
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def fleet_status(request):
-    # Get drones grouped by status
-    active_drones = Drone.objects.filter(status='Active', is_deleted=False)
-    maintenance_drones = Drone.objects.filter(status='In Maintenance', is_deleted=False)
-    inactive_drones = Drone.objects.filter(status='Inactive', is_deleted=False)
+    counts = cached_fleet_counts()
     
-    # Get counts
-    status_counts = Drone.objects.filter(is_deleted=False).values('status').annotate(count=Count('status'))
+    # Get drones grouped by status from a single query
+    drones_by_status = {key: [] for key in STATUS_KEYS.values()}
+    for drone in Drone.objects.select_related('assigned_pilot'):
+        drones_by_status[STATUS_KEYS[drone.status]].append(drone)
     
     # Prepare response data
     fleet_data = {
         'summary': {
-            'total_drones': Drone.objects.filter(is_deleted=False).count(),
-            'active': active_drones.count(),
-            'maintenance': maintenance_drones.count(),
-            'inactive': inactive_drones.count(),
+            'total_drones': counts['total'],
+            'active': counts['active'],
+            'maintenance': counts['maintenance'],
+            'inactive': counts['inactive'],
         },
         'drones_by_status': {
-            'active': DroneSerializer(active_drones, many=True).data,
-            'maintenance': DroneSerializer(maintenance_drones, many=True).data,
-            'inactive': DroneSerializer(inactive_drones, many=True).data,
+            key: DroneSerializer(drones, many=True).data
+            for key, drones in drones_by_status.items()
         },
-        'status_distribution': {item['status']: item['count'] for item in status_counts}
+        'status_distribution': counts['status_distribution']
     }
     
     return Response(fleet_data, status=status.HTTP_200_OK)
@@ -44,6 +43,8 @@ def fleet_status(request):
 def fleet_statistics(request):
     """Get fleet statistics with optional month-wise filtering"""
     month_filter = request.GET.get('month')  # Format: YYYY-MM
+    # The running month's row otherwise appears only with its first counted drone write
+    seed_month(current_month())
     
     if month_filter:
         try:
@@ -56,8 +57,7 @@ def fleet_statistics(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
     else:
-        # Update current month stats
-        FleetStatistics.update_monthly_stats()
+        # Counters are maintained incrementally on drone writes (fleet_app.counters)
         stats = FleetStatistics.objects.all()[:12]  # Last 12 months
     
     serializer = FleetStatisticsSerializer(stats, many=True)
@@ -1,3 +1,11 @@
 from django.contrib import admin
+from .models import ExportJob
 
-# Reports are generated from Drone data, no separate models to register
\ No newline at end of file
+# Reports are generated from Drone data; export jobs are the only report model
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'format', 'status', 'stale', 'file_size', 'requested_by', 'created_at']
+    list_filter = ['format', 'status', 'stale', 'created_at']
+    readonly_fields = ['id', 'created_at', 'started_at', 'finished_at']
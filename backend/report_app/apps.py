@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class ReportAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'report_app'
\ No newline at end of file
+    name = 'report_app'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,263 @@
+import csv
+from datetime import datetime, time, timedelta
+import orjson
+from django.db.models import FloatField, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+from drone_app.models import Drone
+
+EXPORT_CHUNK_SIZE = 2000
+DEFAULT_BATCH_ROWS = 65536
+MAX_BATCH_ROWS = 262144
+
+# (header, queryset field) in output order; the pilot name is joined in SQL
+EXPORT_COLUMNS = [
+    ('Drone ID', 'id'),
+    ('Status', 'status'),
+    ('Urgency Level', 'urgency_level'),
+    ('Assigned Pilot', 'pilot_name'),
+    ('Location Lat', 'location_latitude'),
+    ('Location Lng', 'location_longitude'),
+    ('Created At', 'created_at'),
+    ('Updated At', 'updated_at'),
+]
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'Invalid {name} date. Use YYYY-MM-DD')
+
+
+def export_filters(params):
+    """
+    Normalise export filters from query params: start/end (YYYY-MM-DD,
+    inclusive, on created_at), status and urgency. Raises ValueError.
+    """
+    filters = {}
+    for name in ('start', 'end'):
+        if params.get(name):
+            filters[name] = _parse_date(params[name], name).isoformat()
+    for name, choices in (('status', Drone.STATUS_CHOICES), ('urgency', Drone.URGENCY_CHOICES)):
+        value = params.get(name)
+        if value:
+            if value not in dict(choices):
+                raise ValueError(f'Invalid {name} "{value}"')
+            filters[name] = value
+    return filters
+
+
+# Drone fields an export reads, as columns or in export_drones filters (the
+# manager's is_deleted included); writes touching none of them leave artifacts valid
+EXPORT_MODEL_FIELDS = {
+    'id', 'status', 'urgency_level', 'assigned_pilot',
+    'location_latitude', 'location_longitude', 'created_at', 'updated_at',
+    'is_deleted',
+}
+
+
+def export_drones(filters):
+    """Drones matching normalised export filters (see export_filters)"""
+    tz = timezone.get_current_timezone()
+    drones = Drone.objects.all()
+    if 'start' in filters:
+        start = datetime.combine(datetime.fromisoformat(filters['start']).date(), time.min)
+        drones = drones.filter(created_at__gte=timezone.make_aware(start, tz))
+    if 'end' in filters:
+        end = datetime.combine(datetime.fromisoformat(filters['end']).date() + timedelta(days=1), time.min)
+        drones = drones.filter(created_at__lt=timezone.make_aware(end, tz))
+    if 'status' in filters:
+        drones = drones.filter(status=filters['status'])
+    if 'urgency' in filters:
+        drones = drones.filter(urgency_level=filters['urgency'])
+    return drones
+
+
+def export_queryset(filters, float_coordinates=False):
+    """
+    values_list queryset of EXPORT_COLUMNS for live drones matching filters.
+    float_coordinates casts latitude/longitude to floats in SQL, which is
+    what columnar and JSON formats want, instead of building Decimals.
+    """
+    drones = export_drones(filters).annotate(pilot_name=Coalesce('assigned_pilot__username', Value('Unassigned')))
+    fields = [field for _, field in EXPORT_COLUMNS]
+    if float_coordinates:
+        drones = drones.annotate(
+            latitude=Cast('location_latitude', FloatField()),
+            longitude=Cast('location_longitude', FloatField()),
+        )
+        fields = [{'location_latitude': 'latitude', 'location_longitude': 'longitude'}.get(f, f) for f in fields]
+    return drones.order_by('-created_at', '-id').values_list(*fields)
+
+
+class Echo:
+    """File-like object whose write() hands the line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield CSV lines for an export queryset without materialising it"""
+    writer = csv.writer(Echo())
+    lines = [writer.writerow([header for header, _ in EXPORT_COLUMNS])]
+    for row in queryset.iterator(chunk_size=chunk_size):
+        lines.append(writer.writerow(row))
+        if len(lines) >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+# Column names for JSON and columnar formats, in EXPORT_COLUMNS order
+FIELD_NAMES = [
+    'drone_id', 'status', 'urgency_level', 'assigned_pilot',
+    'latitude', 'longitude', 'created_at', 'updated_at',
+]
+
+
+def iter_ndjson(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield one JSON object per line; queryset from export_queryset(float_coordinates=True)"""
+    lines = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        lines.append(orjson.dumps(dict(zip(FIELD_NAMES, row))))
+        if len(lines) >= chunk_size:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
+
+def iter_record_batches(queryset, batch_rows=DEFAULT_BATCH_ROWS):
+    """
+    Yield pyarrow RecordBatches of at most batch_rows rows, built column-wise
+    from the row tuples of an export_queryset(float_coordinates=True) query.
+    """
+    import pyarrow as pa
+
+    schema = arrow_schema()
+    rows = []
+    for row in queryset.iterator(chunk_size=min(batch_rows, 10000)):
+        rows.append(row)
+        if len(rows) >= batch_rows:
+            yield _record_batch(pa, schema, rows)
+            rows = []
+    if rows:
+        yield _record_batch(pa, schema, rows)
+
+
+def arrow_schema():
+    import pyarrow as pa
+
+    timestamp = pa.timestamp('us', tz='UTC')
+    return pa.schema([
+        ('drone_id', pa.string()),
+        ('status', pa.dictionary(pa.int8(), pa.string())),
+        ('urgency_level', pa.dictionary(pa.int8(), pa.string())),
+        ('assigned_pilot', pa.string()),
+        ('latitude', pa.float64()),
+        ('longitude', pa.float64()),
+        ('created_at', timestamp),
+        ('updated_at', timestamp),
+    ])
+
+
+def _record_batch(pa, schema, rows):
+    columns = list(zip(*rows))
+    arrays = [pa.array([str(value) for value in columns[0]], pa.string())]
+    for index in range(1, len(FIELD_NAMES)):
+        field = schema.field(index)
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(columns[index], pa.string()).dictionary_encode().cast(field.type))
+        else:
+            arrays.append(pa.array(columns[index], field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """Write-only file object collecting bytes for a streaming response"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_arrow_stream(queryset, batch_rows=DEFAULT_BATCH_ROWS):
+    """Yield an Arrow IPC stream, one record batch at a time"""
+    import pyarrow as pa
+
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, arrow_schema()) as writer:
+        for batch in iter_record_batches(queryset, batch_rows):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_parquet(queryset, batch_rows=DEFAULT_BATCH_ROWS):
+    """Yield a Parquet file with one row group per record batch"""
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, arrow_schema(), compression='zstd') as writer:
+        for batch in iter_record_batches(queryset, batch_rows):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def pyarrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# format -> (content type, file extension, row generator, needs pyarrow)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv', iter_csv, False),
+    'ndjson': ('application/x-ndjson', 'ndjson', iter_ndjson, False),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows', iter_arrow_stream, True),
+    'parquet': ('application/vnd.apache.parquet', 'parquet', iter_parquet, True),
+}
+
+
+def export_stream(format_type, filters, batch_rows=DEFAULT_BATCH_ROWS):
+    """Chunk iterator producing the export file for a format in EXPORT_FORMATS"""
+    generator = EXPORT_FORMATS[format_type][2]
+    if format_type == 'csv':
+        return generator(export_queryset(filters))
+    queryset = export_queryset(filters, float_coordinates=True)
+    if format_type == 'ndjson':
+        return generator(queryset)
+    return generator(queryset, batch_rows)
+
+
+def parse_batch_rows(value):
+    if not value:
+        return DEFAULT_BATCH_ROWS
+    return max(1000, min(int(value), MAX_BATCH_ROWS))
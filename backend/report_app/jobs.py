@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .exports import EXPORT_FORMATS, export_drones, export_stream
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+# Seconds between heartbeat writes for the jobs this process owns
+HEARTBEAT_INTERVAL = 30
+
+_executor = None
+_executor_lock = threading.Lock()
+# Ids of jobs submitted to this process's pool and not finished yet
+_owned = set()
+
+
+def get_executor():
+    """Process-wide worker pool for export jobs, created on first use with its heartbeat thread"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'EXPORT_WORKERS', 2),
+                thread_name_prefix='export-worker'
+            )
+            threading.Thread(target=_heartbeat_loop, name='export-heartbeat', daemon=True).start()
+    return _executor
+
+
+def submit(job_id):
+    """Hand a job to the pool; it is heartbeated until run_export finishes with it"""
+    executor = get_executor()
+    with _executor_lock:
+        _owned.add(job_id)
+    executor.submit(run_export, job_id)
+
+
+def beat():
+    """Bump heartbeat_at of every queued or running job owned by this process"""
+    with _executor_lock:
+        owned = list(_owned)
+    if owned:
+        ExportJob.objects.filter(id__in=owned, status__in=['queued', 'running']).update(
+            heartbeat_at=timezone.now()
+        )
+
+
+def _heartbeat_loop():
+    # Jobs waiting for a free worker beat as well, so a busy pool never looks dead
+    while True:
+        time.sleep(HEARTBEAT_INTERVAL)
+        close_old_connections()
+        try:
+            beat()
+        except Exception:
+            logger.exception('Export heartbeat failed')
+        finally:
+            close_old_connections()
+
+
+def export_root():
+    root = getattr(settings, 'EXPORT_ROOT', settings.BASE_DIR / 'exports')
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def params_hash(format_type, filters, batch_rows):
+    payload = json.dumps({'format': format_type, 'filters': filters, 'batch_rows': batch_rows}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def heartbeat_cutoff():
+    """Queued or running jobs whose last heartbeat is older than this are orphans"""
+    return timezone.now() - timedelta(seconds=getattr(settings, 'EXPORT_JOB_HEARTBEAT', 300))
+
+
+def enqueue_export(user, format_type, filters, batch_rows):
+    """
+    Return (job, reused). A job with identical parameters is reused while no
+    drone write has made it stale and it is younger than EXPORT_ARTIFACT_TTL:
+    completed jobs always, queued and running ones only while the process
+    that owns them still heartbeats. Otherwise a new job is queued.
+    """
+    purge_expired()
+    digest = params_hash(format_type, filters, batch_rows)
+    ttl = getattr(settings, 'EXPORT_ARTIFACT_TTL', 3600)
+    cutoff = heartbeat_cutoff()
+    existing = ExportJob.objects.filter(
+        Q(status='completed') | Q(status__in=['queued', 'running'], heartbeat_at__gte=cutoff),
+        params_hash=digest,
+        stale=False,
+        created_at__gte=timezone.now() - timedelta(seconds=ttl),
+    ).first()
+    if existing:
+        return existing, True
+
+    job = ExportJob.objects.create(
+        requested_by=user,
+        format=format_type,
+        params={'filters': filters, 'batch_rows': batch_rows},
+        params_hash=digest,
+        heartbeat_at=timezone.now(),
+    )
+    # The worker must not look the job up before this transaction commits
+    transaction.on_commit(lambda: submit(job.id))
+    return job, False
+
+
+def run_export(job_id):
+    """Worker entry point: write the artifact to a temp file, then publish it"""
+    close_old_connections()
+    try:
+        now = timezone.now()
+        updated = ExportJob.objects.filter(id=job_id, status='queued').update(
+            status='running', started_at=now, heartbeat_at=now
+        )
+        if not updated:
+            return
+        job = ExportJob.objects.get(id=job_id)
+        extension = EXPORT_FORMATS[job.format][1]
+        path = os.path.join(export_root(), f'{job.id}.{extension}')
+        temp_path = f'{path}.part'
+        try:
+            with open(temp_path, 'wb') as output:
+                for chunk in export_stream(job.format, job.params['filters'], job.params['batch_rows']):
+                    output.write(chunk.encode() if isinstance(chunk, str) else chunk)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.exception('Export job %s failed', job_id)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            ExportJob.objects.filter(id=job_id).update(
+                status='failed', error=str(e), finished_at=timezone.now()
+            )
+            return
+        completed = ExportJob.objects.filter(id=job_id, status='running').update(
+            status='completed', file_path=path, file_size=os.path.getsize(path), finished_at=timezone.now()
+        )
+        if not completed:
+            # Failed as an orphan meanwhile; a newer job owns these parameters
+            os.remove(path)
+    finally:
+        with _executor_lock:
+            _owned.discard(job_id)
+        close_old_connections()
+
+
+def invalidate_artifacts(drone_ids=None):
+    """
+    Mark running and completed exports stale after a drone write. With
+    drone_ids, only exports whose filters select one of those drones.
+    """
+    jobs = ExportJob.objects.filter(stale=False, status__in=['running', 'completed'])
+    if drone_ids is None:
+        jobs.update(stale=True)
+        return
+    if not drone_ids:
+        return
+    # One probe per distinct filter set; jobs past the TTL are never reused anyway
+    ttl = getattr(settings, 'EXPORT_ARTIFACT_TTL', 3600)
+    by_filters = {}
+    for job_id, params in jobs.filter(
+        created_at__gte=timezone.now() - timedelta(seconds=ttl)
+    ).values_list('id', 'params'):
+        key = json.dumps(params['filters'], sort_keys=True)
+        by_filters.setdefault(key, []).append(job_id)
+    stale = []
+    for key, job_ids in by_filters.items():
+        if export_drones(json.loads(key)).filter(id__in=drone_ids).exists():
+            stale.extend(job_ids)
+    if stale:
+        ExportJob.objects.filter(id__in=stale).update(stale=True)
+
+
+def fail_orphaned():
+    """
+    Fail queued and running jobs no live process heartbeats any more, e.g.
+    after a restart. A queued job waiting for a free worker is still beaten
+    by its process, so its age alone never makes it an orphan.
+    """
+    ExportJob.objects.filter(
+        Q(heartbeat_at__lt=heartbeat_cutoff()) | Q(heartbeat_at__isnull=True),
+        status__in=['queued', 'running'],
+    ).update(status='failed', error='Export worker stopped responding', finished_at=timezone.now())
+
+
+def purge_expired():
+    """
+    Fail orphaned jobs, then delete artifacts (files and rows) of jobs that
+    finished before EXPORT_JOB_RETENTION.
+    """
+    fail_orphaned()
+    retention = getattr(settings, 'EXPORT_JOB_RETENTION', 24 * 3600)
+    expired = ExportJob.objects.filter(finished_at__lt=timezone.now() - timedelta(seconds=retention))
+    for path in expired.exclude(file_path='').values_list('file_path', flat=True):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    expired.delete()
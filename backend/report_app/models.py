@@ -1,3 +1,47 @@
+import uuid
 from django.db import models
+from django.contrib.auth import get_user_model
 
-# Report app uses Drone model from drone_app for generating reports
\ No newline at end of file
+User = get_user_model()
+
+# Reports are generated from the Drone model in drone_app; the only state kept
+# here is the bookkeeping for background export jobs
+
+
+class ExportJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    format = models.CharField(max_length=10)
+    params = models.JSONField(default=dict)
+    params_hash = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    file_path = models.CharField(max_length=500, blank=True)
+    file_size = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    # Set when a drone write makes the artifact out of date; stale jobs are never reused
+    stale = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Bumped by the process owning a queued or running job; jobs that stop beating are orphans
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['params_hash', '-created_at'],
+                condition=models.Q(stale=False),
+                name='exportjob_reusable_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Export {str(self.id)[:8]} ({self.format}) - {self.status}"
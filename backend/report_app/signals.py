@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from drone_app.models import Drone
+from drone_app.signals import drones_bulk_created, telemetry_flushed
+from .exports import EXPORT_MODEL_FIELDS
+from .jobs import invalidate_artifacts
+
+
+# Every drone write that reaches an exported column can change export content,
+# location-only saves included
+@receiver(post_save, sender=Drone)
+def invalidate_on_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & EXPORT_MODEL_FIELDS:
+        return
+    transaction.on_commit(invalidate_artifacts)
+
+
+@receiver(post_delete, sender=Drone)
+@receiver(drones_bulk_created, sender=Drone)
+def invalidate_export_artifacts(sender, **kwargs):
+    transaction.on_commit(invalidate_artifacts)
+
+
+# Telemetry only moves drones: stale just the exports that select one of them
+@receiver(telemetry_flushed, sender=Drone)
+def invalidate_on_telemetry(sender, drone_ids, **kwargs):
+    transaction.on_commit(lambda: invalidate_artifacts(drone_ids))
@@ -0,0 +1,93 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from drone_app.models import Drone
+from drone_app.signals import telemetry_flushed
+from . import jobs
+from .models import ExportJob
+
+
+def make_drone(**fields):
+    fields.setdefault('location_latitude', 1)
+    fields.setdefault('location_longitude', 1)
+    return Drone.objects.create(**fields)
+
+
+def make_job(status, filters=None, heartbeat_ago=0, **fields):
+    return ExportJob.objects.create(
+        format='csv',
+        params={'filters': filters or {}, 'batch_rows': 65536},
+        params_hash=jobs.params_hash('csv', filters or {}, 65536),
+        status=status,
+        heartbeat_at=timezone.now() - timedelta(seconds=heartbeat_ago),
+        **fields
+    )
+
+
+class OrphanedJobTests(TestCase):
+    def tearDown(self):
+        jobs._owned.clear()
+
+    def test_jobs_without_a_recent_heartbeat_are_failed(self):
+        orphan = make_job('running', heartbeat_ago=600)
+        queued = make_job('queued', heartbeat_ago=600)
+        live = make_job('running', heartbeat_ago=10)
+        done = make_job('completed', heartbeat_ago=600, finished_at=timezone.now())
+        jobs.purge_expired()
+        self.assertEqual(ExportJob.objects.get(id=orphan.id).status, 'failed')
+        self.assertEqual(ExportJob.objects.get(id=queued.id).status, 'failed')
+        self.assertEqual(ExportJob.objects.get(id=live.id).status, 'running')
+        self.assertEqual(ExportJob.objects.get(id=done.id).status, 'completed')
+
+    def test_queued_jobs_owned_by_this_process_stay_alive(self):
+        waiting = make_job('queued', heartbeat_ago=600)
+        jobs._owned.add(waiting.id)
+        jobs.beat()
+        jobs.purge_expired()
+        self.assertEqual(ExportJob.objects.get(id=waiting.id).status, 'queued')
+
+    def test_orphans_are_not_reused(self):
+        orphan = make_job('running', heartbeat_ago=600)
+        job, reused = jobs.enqueue_export(None, 'csv', {}, 65536)
+        self.assertFalse(reused)
+        self.assertNotEqual(job.id, orphan.id)
+        live, reused = jobs.enqueue_export(None, 'csv', {}, 65536)
+        self.assertTrue(reused)
+        self.assertEqual(live.id, job.id)
+
+
+class InvalidationTests(TestCase):
+    def setUp(self):
+        self.drone = make_drone(status='Active')
+        self.active = make_job('completed', {'status': 'Active'})
+        self.inactive = make_job('completed', {'status': 'Inactive'})
+
+    def assertStale(self, *expected):
+        self.assertEqual(
+            (ExportJob.objects.get(id=self.active.id).stale, ExportJob.objects.get(id=self.inactive.id).stale),
+            expected
+        )
+
+    def test_saves_of_exported_fields_stale_every_export(self):
+        drone = Drone.objects.get(id=self.drone.id)
+        drone.urgency_level = 'High'
+        with self.captureOnCommitCallbacks(execute=True):
+            drone.save()
+        self.assertStale(True, True)
+
+    def test_soft_deletes_stale_exports(self):
+        drone = Drone.objects.get(id=self.drone.id)
+        drone.is_deleted = True
+        with self.captureOnCommitCallbacks(execute=True):
+            drone.save(update_fields=['is_deleted'])
+        self.assertStale(True, True)
+
+    def test_saves_of_other_fields_leave_exports_fresh(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Drone.objects.get(id=self.drone.id).save(update_fields=['package_details'])
+        self.assertStale(False, False)
+
+    def test_telemetry_only_stales_exports_selecting_the_moved_drones(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            telemetry_flushed.send(sender=Drone, drone_ids=[str(self.drone.id)])
+        self.assertStale(True, False)
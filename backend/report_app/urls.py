@@ -6,4 +6,7 @@ urlpatterns = [
     path('', views.reports_overview, name='reports_list'),
     path('overview/', views.reports_overview, name='reports_overview'),
     path('export/', views.export_report, name='reports_export'),
+    path('export/jobs/', views.create_export_job, name='reports_export_job_create'),
+    path('export/jobs/<uuid:job_id>/', views.export_job_status, name='reports_export_job'),
+    path('export/jobs/<uuid:job_id>/download/', views.download_export, name='reports_export_download'),
 ]
\ No newline at end of file
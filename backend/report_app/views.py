@@ -1,32 +1,40 @@
-import csv
-from django.http import HttpResponse
+import os
+import re
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Count, Q
 from django.utils import timezone
-from datetime import timedelta
+from drone_app.aggregates import cached_fleet_counts, percentage
 from drone_app.models import Drone
+from .exports import (
+    EXPORT_FORMATS, export_filters, export_stream, parse_batch_rows, pyarrow_available
+)
+from .jobs import enqueue_export
+from .models import ExportJob
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def reports_overview(request):
-    total_drones = Drone.objects.filter(is_deleted=False).count()
+    counts = cached_fleet_counts()
+    total_drones = counts['total']
     
     # Calculate missions completed (assuming status changes indicate missions)
-    missions_completed = Drone.objects.filter(is_deleted=False).count()
+    missions_completed = total_drones
     
     # Active vs maintenance ratio
-    active_count = Drone.objects.filter(status='Active', is_deleted=False).count()
-    maintenance_count = Drone.objects.filter(status='In Maintenance', is_deleted=False).count()
-    inactive_count = Drone.objects.filter(status='Inactive', is_deleted=False).count()
-    
-    # Urgency level distribution
-    urgency_distribution = Drone.objects.filter(is_deleted=False).values('urgency_level').annotate(count=Count('urgency_level'))
+    active_count = counts['active']
+    maintenance_count = counts['maintenance']
+    inactive_count = counts['inactive']
     
     # Last activity timestamps
-    recent_activity = Drone.objects.filter(is_deleted=False).order_by('-updated_at')[:5]
+    recent_activity = Drone.objects.order_by('-updated_at').values(
+        'id', 'status', 'updated_at', 'urgency_level'
+    )[:5]
     
     report_data = {
         'overview': {
@@ -36,16 +44,16 @@ def reports_overview(request):
                 'active': active_count,
                 'maintenance': maintenance_count,
                 'inactive': inactive_count,
-                'active_percentage': round((active_count / total_drones * 100) if total_drones > 0 else 0, 2),
-                'maintenance_percentage': round((maintenance_count / total_drones * 100) if total_drones > 0 else 0, 2)
+                'active_percentage': percentage(active_count, total_drones, 2),
+                'maintenance_percentage': percentage(maintenance_count, total_drones, 2)
             },
-            'urgency_level_distribution': {item['urgency_level']: item['count'] for item in urgency_distribution},
+            'urgency_level_distribution': counts['urgency_distribution'],
             'last_activity_timestamps': [
                 {
-                    'drone_id': str(drone.id),
-                    'status': drone.status,
-                    'last_updated': drone.updated_at,
-                    'urgency_level': drone.urgency_level
+                    'drone_id': str(drone['id']),
+                    'status': drone['status'],
+                    'last_updated': drone['updated_at'],
+                    'urgency_level': drone['urgency_level']
                 } for drone in recent_activity
             ]
         },
@@ -59,26 +67,123 @@ def reports_overview(request):
 def export_report(request):
     format_type = request.GET.get('format', 'csv').lower()
     
-    if format_type == 'csv':
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="drone_report.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Drone ID', 'Status', 'Urgency Level', 'Assigned Pilot', 'Location Lat', 'Location Lng', 'Created At', 'Updated At'])
-        
-        drones = Drone.objects.filter(is_deleted=False)
-        for drone in drones:
-            writer.writerow([
-                str(drone.id),
-                drone.status,
-                drone.urgency_level,
-                drone.assigned_pilot.username if drone.assigned_pilot else 'Unassigned',
-                drone.location_latitude,
-                drone.location_longitude,
-                drone.created_at,
-                drone.updated_at
-            ])
-        
-        return response
+    if format_type not in EXPORT_FORMATS:
+        return Response({'error': 'Unsupported format'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    content_type, extension, _, needs_pyarrow = EXPORT_FORMATS[format_type]
+    if needs_pyarrow and not pyarrow_available():
+        return Response(
+            {'error': f'{format_type} export requires the pyarrow package'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        filters = export_filters(request.GET)
+        batch_rows = parse_batch_rows(request.GET.get('batch_size'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Streamed chunk by chunk from a server-side iterator, so memory stays flat
+    response = StreamingHttpResponse(
+        export_stream(format_type, filters, batch_rows), content_type=content_type
+    )
+    response['Content-Disposition'] = f'attachment; filename="drone_report.{extension}"'
+    return response
+
+
+def _job_data(request, job):
+    data = {
+        'job_id': str(job.id),
+        'format': job.format,
+        'params': job.params,
+        'status': job.status,
+        'stale': job.stale,
+        'file_size': job.file_size,
+        'error': job.error,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
+    if job.status == 'completed':
+        data['download_url'] = request.build_absolute_uri(f'/api/reports/export/jobs/{job.id}/download/')
+    return data
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_export_job(request):
+    """Queue an export in the background worker pool, reusing a fresh identical artifact"""
+    format_type = str(request.data.get('format', 'csv')).lower()
+    if format_type not in EXPORT_FORMATS:
+        return Response({'error': 'Unsupported format'}, status=status.HTTP_400_BAD_REQUEST)
+    if EXPORT_FORMATS[format_type][3] and not pyarrow_available():
+        return Response(
+            {'error': f'{format_type} export requires the pyarrow package'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        filters = export_filters(request.data)
+        batch_rows = parse_batch_rows(request.data.get('batch_size'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
-    return Response({'error': 'Unsupported format'}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+    job, reused = enqueue_export(request.user, format_type, filters, batch_rows)
+    return Response({
+        **_job_data(request, job),
+        'reused': reused
+    }, status=status.HTTP_200_OK if job.status == 'completed' else status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_job_status(request, job_id):
+    job = get_object_or_404(ExportJob, id=job_id)
+    return Response(_job_data(request, job), status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_export(request, job_id):
+    """Serve a finished artifact from disk, honouring single byte-range requests"""
+    job = get_object_or_404(ExportJob, id=job_id, status='completed')
+    if not os.path.exists(job.file_path):
+        raise Http404('Export file no longer available')
+    
+    content_type, extension = EXPORT_FORMATS[job.format][:2]
+    size = os.path.getsize(job.file_path)
+    start, end = 0, size - 1
+    
+    range_header = request.META.get('HTTP_RANGE', '')
+    match = RANGE_RE.match(range_header.strip())
+    if match and (match.group(1) or match.group(2)):
+        if match.group(1):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(match.group(2)), 0)
+        if start > end or start >= size:
+            response = Response(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    
+    response = StreamingHttpResponse(
+        _read_range(job.file_path, start, end),
+        content_type=content_type,
+        status=status.HTTP_206_PARTIAL_CONTENT if match and (start, end) != (0, size - 1) else status.HTTP_200_OK
+    )
+    if response.status_code == status.HTTP_206_PARTIAL_CONTENT:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = f'attachment; filename="drone_report.{extension}"'
+    return response
+
+def _read_range(path, start, end, block_size=64 * 1024):
+    with open(path, 'rb') as artifact:
+        artifact.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = artifact.read(min(block_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block